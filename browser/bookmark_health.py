@@ -0,0 +1,182 @@
+import http.client
+import ssl
+import threading
+import time
+from collections import OrderedDict, deque, namedtuple
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from urllib.parse import urljoin, urlsplit
+
+HealthResult = namedtuple("HealthResult", "status final_url latency_ms error")
+
+REDIRECT_STATUSES = (301, 302, 303, 307, 308)
+# server không hỗ trợ / chặn HEAD thì thử lại bằng GET
+HEAD_FALLBACK_STATUSES = (400, 403, 404, 405, 501)
+USER_AGENT = "MiniBrowser-LinkChecker/1.0"
+
+
+class BookmarkHealthChecker:
+    """
+    Kiểm tra link chết cho danh sách bookmark (không phụ thuộc Qt).
+    - thread pool, mỗi host chỉ có tối đa `per_host` URL đang chờ / đang chạy trong pool
+      (URL tiếp theo của host được đưa vào khi 1 URL xong), nên 1 host nhiều bookmark
+      không chiếm hết worker của các host khác
+    - mỗi thread giữ connection keep-alive theo (scheme, host, port) để dùng lại,
+      tất cả được đóng khi check_all xong (pool đã dừng)
+    - HEAD trước, GET nếu server không chịu HEAD; tự theo redirect tối đa `max_redirects`
+    """
+
+    def __init__(self, max_workers=16, per_host=2, timeout=10.0, max_redirects=5):
+        self.max_workers = max_workers
+        self.per_host = per_host
+        self.timeout = timeout
+        self.max_redirects = max_redirects
+        self._local = threading.local()
+        self._thread_connections = []  # dict connection của từng thread worker, để đóng khi pool dừng
+        self._connections_lock = threading.Lock()
+        self._ssl_context = ssl.create_default_context()
+
+    # ---------- connections ----------
+    def _connection(self, scheme, netloc):
+        connections = getattr(self._local, "connections", None)
+        if connections is None:
+            connections = self._local.connections = {}
+            with self._connections_lock:
+                self._thread_connections.append(connections)
+        key = (scheme, netloc)
+        conn = connections.get(key)
+        if conn is None:
+            if scheme == "https":
+                conn = http.client.HTTPSConnection(netloc, timeout=self.timeout, context=self._ssl_context)
+            else:
+                conn = http.client.HTTPConnection(netloc, timeout=self.timeout)
+            connections[key] = conn
+        return conn
+
+    def _drop_connection(self, scheme, netloc):
+        conn = self._local.connections.pop((scheme, netloc), None)
+        if conn is not None:
+            conn.close()
+
+    def close_connections(self):
+        """Đóng các connection của thread hiện tại"""
+        for conn in getattr(self._local, "connections", {}).values():
+            conn.close()
+        self._local.connections = {}
+
+    def _close_thread_connections(self):
+        """Đóng connection keep-alive của mọi thread worker (gọi sau khi pool đã dừng)"""
+        with self._connections_lock:
+            thread_connections, self._thread_connections = self._thread_connections, []
+        for connections in thread_connections:
+            for conn in connections.values():
+                conn.close()
+            connections.clear()
+
+    def _request(self, method, url):
+        """Gửi 1 request, trả về (status, location); thử lại 1 lần nếu connection keep-alive đã bị đóng"""
+        parts = urlsplit(url)
+        path = parts.path or "/"
+        if parts.query:
+            path += "?" + parts.query
+        headers = {"User-Agent": USER_AGENT, "Accept": "*/*"}
+        for attempt in range(2):
+            conn = self._connection(parts.scheme, parts.netloc)
+            try:
+                conn.request(method, path, headers=headers)
+                response = conn.getresponse()
+                if method == "GET":
+                    # không cần body: đóng luôn thay vì đọc hết
+                    response.close()
+                    self._drop_connection(parts.scheme, parts.netloc)
+                else:
+                    response.read()
+                    if response.will_close:
+                        self._drop_connection(parts.scheme, parts.netloc)
+                return response.status, response.getheader("Location")
+            except (http.client.RemoteDisconnected, BrokenPipeError, ConnectionResetError):
+                self._drop_connection(parts.scheme, parts.netloc)
+                if attempt:
+                    raise
+            except Exception:
+                self._drop_connection(parts.scheme, parts.netloc)
+                raise
+
+    # ---------- check ----------
+    def check(self, url):
+        """Kiểm tra 1 URL, trả về HealthResult (status None nếu lỗi mạng / timeout)"""
+        start = time.monotonic()
+        current = url
+        status = None
+        try:
+            for _ in range(self.max_redirects + 1):
+                parts = urlsplit(current)
+                if parts.scheme not in ("http", "https") or not parts.netloc:
+                    return HealthResult(None, current, 0, "unsupported URL")
+                status, location = self._request("HEAD", current)
+                if status in HEAD_FALLBACK_STATUSES:
+                    status, location = self._request("GET", current)
+                if status in REDIRECT_STATUSES and location:
+                    current = urljoin(current, location)
+                    continue
+                break
+            else:
+                return HealthResult(status, current, self._elapsed(start), "too many redirects")
+        except (OSError, ValueError, http.client.HTTPException) as e:
+            return HealthResult(None, current, self._elapsed(start), str(e) or type(e).__name__)
+        return HealthResult(status, current, self._elapsed(start), None)
+
+    @staticmethod
+    def _elapsed(start):
+        return int((time.monotonic() - start) * 1000)
+
+    def check_all(self, bookmarks, on_result, is_cancelled=None):
+        """
+        Kiểm tra song song danh sách (id, title, url); gọi on_result(id, HealthResult)
+        ở thread gọi hàm này (theo thứ tự hoàn thành).
+        Giới hạn per_host được áp dụng khi đưa việc vào pool (theo host của URL ban đầu),
+        worker không bao giờ phải đứng chờ 1 host.
+        """
+        queues = OrderedDict()  # host -> deque (id, url) chưa gửi
+        for bookmark_id, _, url in bookmarks:
+            queues.setdefault(_host_key(url), deque()).append((bookmark_id, url))
+
+        try:
+            self._check_queues(queues, on_result, is_cancelled)
+        finally:
+            self._close_thread_connections()
+
+    def _check_queues(self, queues, on_result, is_cancelled):
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="link-check") as pool:
+            futures = {}  # future -> (id, host)
+
+            def submit_next(host):
+                pending = queues.get(host)
+                if pending:
+                    bookmark_id, url = pending.popleft()
+                    futures[pool.submit(self.check, url)] = (bookmark_id, host)
+
+            # vòng đầu: mỗi host per_host URL, xen kẽ giữa các host
+            for _ in range(self.per_host):
+                for host in queues:
+                    submit_next(host)
+
+            try:
+                while futures:
+                    done, _ = wait(futures, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        bookmark_id, host = futures.pop(future)
+                        on_result(bookmark_id, future.result())
+                        if is_cancelled and is_cancelled():
+                            return
+                        submit_next(host)
+            finally:
+                # hủy / on_result lỗi: bỏ các URL chưa chạy, pool chỉ chờ các URL đang chạy
+                for pending in futures:
+                    pending.cancel()
+
+
+def _host_key(url):
+    try:
+        return urlsplit(url).netloc.lower()
+    except ValueError:
+        return ""
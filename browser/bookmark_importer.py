@@ -0,0 +1,298 @@
+import json
+import os
+import sqlite3
+from html.parser import HTMLParser
+
+from PyQt5.QtCore import QObject, QThread, pyqtSignal
+
+from browser.bookmark_manager import insert_folder
+
+CHUNK_SIZE = 64 * 1024
+BATCH_SIZE = 5000
+
+
+class NetscapeBookmarkParser(HTMLParser):
+    """
+    Parser cho file export bookmark dạng Netscape (Chrome/Firefox/Edge đều dùng).
+    <H3> là tên folder, <DL> mở/đóng cấp folder, <A HREF> là 1 bookmark.
+    Kết quả được đẩy vào self.entries dạng (folder_path, title, url).
+    """
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.entries = []
+        self.path = []              # folder đang đứng (tuple các tên)
+        self.pending_folder = None  # tên <H3> chờ <DL> kế tiếp
+        self.capture = None         # "folder" | "link" khi đang đọc text
+        self.href = None
+        self.text = []
+
+    def handle_starttag(self, tag, attrs):
+        if tag == "h3":
+            self.capture = "folder"
+            self.text = []
+        elif tag == "a":
+            self.href = dict(attrs).get("href")
+            self.capture = "link"
+            self.text = []
+        elif tag == "dl":
+            # <DL> ngay sau <H3> là nội dung folder đó; <DL> gốc thì giữ nguyên path
+            self.path.append(self.pending_folder)
+            self.pending_folder = None
+
+    def handle_endtag(self, tag):
+        if tag == "h3" and self.capture == "folder":
+            self.pending_folder = "".join(self.text).strip() or "Untitled"
+            self.capture = None
+        elif tag == "a" and self.capture == "link":
+            url = (self.href or "").strip()
+            if url and not url.lower().startswith(("javascript:", "place:")):
+                title = "".join(self.text).strip() or url
+                self.entries.append((self.folder_path(), title, url))
+            self.capture = None
+            self.href = None
+        elif tag == "dl" and self.path:
+            self.path.pop()
+
+    def handle_data(self, data):
+        if self.capture:
+            self.text.append(data)
+
+    def folder_path(self):
+        return tuple(name for name in self.path if name is not None)
+
+
+def iter_netscape_bookmarks(path, chunk_size=CHUNK_SIZE):
+    """
+    Đọc file HTML theo từng chunk, yield (folder_path, title, url, bytes_read).
+    Bộ nhớ chỉ phụ thuộc kích thước chunk, không phụ thuộc kích thước file.
+    """
+    parser = NetscapeBookmarkParser()
+    bytes_read = 0
+    with open(path, "r", encoding="utf-8", errors="replace") as f:
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                break
+            bytes_read += len(chunk.encode("utf-8"))
+            parser.feed(chunk)
+            for entry in parser.entries:
+                yield entry + (bytes_read,)
+            parser.entries.clear()
+    parser.close()
+    for entry in parser.entries:
+        yield entry + (bytes_read,)
+
+
+def _flatten_json_item(item, folder_path=()):
+    """1 phần tử JSON: bookmark {"title", "url"} hoặc folder {"title", "children": [...]}"""
+    if not isinstance(item, dict):
+        return
+    children = item.get("children")
+    title = (item.get("title") or item.get("name") or "").strip()
+    if isinstance(children, list):
+        path = folder_path + (title or "Untitled",)
+        for child in children:
+            yield from _flatten_json_item(child, path)
+        return
+    url = (item.get("url") or "").strip()
+    if url:
+        folder = item.get("folder")
+        if isinstance(folder, str):
+            folder = folder.split("/")  # "A/B" -> ("A", "B")
+        yield (tuple(f for f in folder or () if f) or folder_path, title or url, url)
+
+
+def iter_json_bookmarks(path, chunk_size=CHUNK_SIZE):
+    """
+    Đọc data/bookmarks.json cũ, yield (folder_path, title, url, bytes_read).
+    File dạng mảng [...] được decode từng phần tử một (raw_decode trên buffer trượt);
+    dạng object {"bookmarks": [...]} thì đọc cả file (chỉ có ở bản rất cũ, file nhỏ).
+    """
+    decoder = json.JSONDecoder()
+    bytes_read = 0
+    with open(path, "r", encoding="utf-8") as f:
+        buffer = ""
+        eof = False
+
+        def fill():
+            nonlocal buffer, eof, bytes_read
+            chunk = f.read(chunk_size)
+            if not chunk:
+                eof = True
+            else:
+                bytes_read += len(chunk.encode("utf-8"))
+                buffer += chunk
+
+        # bỏ khoảng trắng đầu file để biết là mảng hay object
+        while not eof and not buffer.strip():
+            fill()
+        buffer = buffer.lstrip()
+        if not buffer:
+            return  # file rỗng
+        if buffer[0] != "[":
+            buffer += f.read()
+            data = json.loads(buffer)
+            items = data.get("bookmarks", []) if isinstance(data, dict) else []
+            for item in items:
+                for entry in _flatten_json_item(item):
+                    yield entry + (os.path.getsize(path),)
+            return
+
+        pos = 1
+        while True:
+            # bỏ khoảng trắng / dấu phẩy giữa các phần tử
+            while True:
+                while pos < len(buffer) and buffer[pos] in " \t\r\n,":
+                    pos += 1
+                if pos < len(buffer) or eof:
+                    break
+                fill()
+            if pos >= len(buffer) or buffer[pos] == "]":
+                return
+            try:
+                item, end = decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+                fill()  # phần tử bị cắt ngang giữa 2 chunk
+                continue
+            for entry in _flatten_json_item(item):
+                yield entry + (bytes_read,)
+            # bỏ phần đã decode để buffer không lớn dần
+            buffer = buffer[end:]
+            pos = 0
+
+
+def iter_bookmark_file(path):
+    """Chọn parser theo đuôi file"""
+    if path.lower().endswith(".json"):
+        return iter_json_bookmarks(path)
+    return iter_netscape_bookmarks(path)
+
+
+def import_bookmarks(conn, entries, existing_urls, batch_size=BATCH_SIZE,
+                     progress=None, is_cancelled=None):
+    """
+    Ghi các entry (folder_path, title, url, bytes_read) vào DB.
+    - trùng URL (với DB hoặc trong chính file) được loại bằng set trong RAM, không query từng dòng
+    - mỗi batch là 1 transaction với 1 executemany
+    Trả về (imported, skipped, [(id, url, title), ...] các bookmark mới).
+    """
+    seen = set(existing_urls)
+    folder_ids = {(): None}  # folder_path -> id (folder trùng tên cùng cha thì dùng lại)
+    imported = skipped = 0
+    added = []
+    batch = []
+
+    def folder_id_for(folder_path):
+        if folder_path in folder_ids:
+            return folder_ids[folder_path]
+        parent_id = folder_id_for(folder_path[:-1])
+        title = folder_path[-1]
+        row = conn.execute(
+            "SELECT id FROM bookmark_folders WHERE parent_id IS ? AND title = ? LIMIT 1",
+            (parent_id, title),
+        ).fetchone()
+        folder_id = row[0] if row else insert_folder(conn, title, parent_id)
+        folder_ids[folder_path] = folder_id
+        return folder_id
+
+    def flush(bytes_read):
+        nonlocal imported, skipped
+        if batch:
+            with conn:
+                # folder của batch được tạo trong cùng transaction
+                rows = [(title, url, folder_id_for(path)) for path, title, url in batch]
+                last_id = conn.execute("SELECT COALESCE(MAX(id), 0) FROM bookmarks").fetchone()[0]
+                changes = conn.total_changes
+                conn.executemany(
+                    "INSERT OR IGNORE INTO bookmarks (title, url, folder_id) VALUES (?, ?, ?)", rows
+                )
+                inserted = conn.total_changes - changes
+            # INSERT OR IGNORE bỏ qua URL đã có trong DB (vd. vừa được thêm sau khi chụp existing_urls)
+            imported += inserted
+            skipped += len(batch) - inserted
+            if inserted:
+                # id AUTOINCREMENT: dòng mới luôn có id > last_id
+                added.extend(row for row in _select_ids(conn, [url for _, _, url in batch]) if row[0] > last_id)
+            batch.clear()
+        if progress:
+            progress(imported, skipped, bytes_read)
+
+    bytes_read = 0
+    for folder_path, title, url, bytes_read in entries:
+        if is_cancelled and is_cancelled():
+            break
+        if url in seen:
+            skipped += 1
+            continue
+        seen.add(url)
+        batch.append((folder_path, title, url))
+        if len(batch) >= batch_size:
+            flush(bytes_read)
+    flush(bytes_read)
+    return imported, skipped, added
+
+
+def _select_ids(conn, urls, chunk=900):
+    """Lấy id của các URL vừa thêm (chia nhỏ theo giới hạn số tham số của SQLite)"""
+    rows = []
+    for start in range(0, len(urls), chunk):
+        part = urls[start:start + chunk]
+        placeholders = ",".join("?" * len(part))
+        rows.extend(conn.execute(
+            f"SELECT id, url, title FROM bookmarks WHERE url IN ({placeholders})", part
+        ).fetchall())
+    return rows
+
+
+class BookmarkImportWorker(QObject):
+    """Chạy import trong QThread riêng; GUI chỉ nhận signal tiến độ / kết quả"""
+    progress = pyqtSignal(int, int, int)  # imported, skipped, percent
+    finished = pyqtSignal(int, int, list)  # imported, skipped, [(id, url, title)]
+    failed = pyqtSignal(str)
+
+    def __init__(self, storage, path, existing_urls):
+        super().__init__()
+        self.storage = storage
+        self.path = path
+        self.existing_urls = set(existing_urls)  # chụp lại ở GUI thread
+        self.total_bytes = max(os.path.getsize(path), 1)
+        self.cancelled = False
+
+    def cancel(self):
+        self.cancelled = True
+
+    def run(self):
+        conn = None
+        try:
+            conn = self.storage.connect()  # connection ghi riêng của thread import
+            imported, skipped, added = import_bookmarks(
+                conn, iter_bookmark_file(self.path), self.existing_urls,
+                progress=self.report, is_cancelled=lambda: self.cancelled,
+            )
+        except (OSError, ValueError, UnicodeDecodeError, sqlite3.Error) as e:
+            # vd. DB đang bị khóa: vẫn phải báo để GUI đóng progress và thread dừng
+            self.failed.emit(str(e))
+            return
+        finally:
+            if conn is not None:
+                conn.close()
+        self.finished.emit(imported, skipped, added)
+
+    def report(self, imported, skipped, bytes_read):
+        self.progress.emit(imported, skipped, min(100, bytes_read * 100 // self.total_bytes))
+
+
+def start_import(storage, path, existing_urls, parent=None):
+    """Tạo worker + QThread, trả về (thread, worker); caller nối signal rồi gọi thread.start()"""
+    thread = QThread(parent)
+    worker = BookmarkImportWorker(storage, path, existing_urls)
+    worker.moveToThread(thread)
+    thread.started.connect(worker.run)
+    worker.finished.connect(thread.quit)
+    worker.failed.connect(thread.quit)
+    thread.finished.connect(worker.deleteLater)
+    thread.finished.connect(thread.deleteLater)
+    return thread, worker
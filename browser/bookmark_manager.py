@@ -1,16 +1,65 @@
-import os
-import sqlite3
+import time
+
+from browser.storage import StorageEngine
+
+
+def insert_folder(conn, title, parent_id=None):
+    """Thêm folder + các dòng closure table (không commit), trả về id"""
+    cursor = conn.execute(
+        "INSERT INTO bookmark_folders (parent_id, title) VALUES (?, ?)", (parent_id, title)
+    )
+    folder_id = cursor.lastrowid
+    # đường đi tới chính nó + mọi tổ tiên của parent
+    conn.execute(
+        "INSERT INTO bookmark_folder_tree (ancestor_id, descendant_id, depth) VALUES (?, ?, 0)",
+        (folder_id, folder_id),
+    )
+    if parent_id is not None:
+        conn.execute("""
+        INSERT INTO bookmark_folder_tree (ancestor_id, descendant_id, depth)
+        SELECT ancestor_id, ?, depth + 1 FROM bookmark_folder_tree WHERE descendant_id = ?
+        """, (folder_id, parent_id))
+    return folder_id
+
+
+def record_health(conn, results, checked_at=None):
+    """Lưu kết quả kiểm tra link [(bookmark_id, HealthResult), ...] (1 transaction)"""
+    checked_at = checked_at or time.strftime("%Y-%m-%d %H:%M:%S", time.gmtime())
+    with conn:
+        conn.executemany("""
+        INSERT INTO bookmark_health (bookmark_id, status, final_url, latency_ms, error, checked_at)
+        SELECT ?, ?, ?, ?, ?, ? WHERE EXISTS (SELECT 1 FROM bookmarks WHERE id = ?)
+        ON CONFLICT(bookmark_id) DO UPDATE SET
+            status = excluded.status, final_url = excluded.final_url,
+            latency_ms = excluded.latency_ms, error = excluded.error, checked_at = excluded.checked_at
+        """, [
+            (bookmark_id, r.status, r.final_url, r.latency_ms, r.error, checked_at, bookmark_id)
+            for bookmark_id, r in results
+        ])
+
 
 class BookmarkManager:
-    def __init__(self, db_path=None):
-        if db_path is None:
-            project_root = os.path.dirname(os.path.dirname(__file__))
-            db_path = os.path.join(project_root, "data", "MiniBrowser.db")
+    def __init__(self, db_path=None, storage=None):
+        if storage is None:
+            # mặc định: engine dùng chung cho data/MiniBrowser.db
+            storage = StorageEngine.get(db_path)
+        self.storage = storage
+        self.conn = storage.conn
+        storage.migrate("bookmarks", [
+            self.create_table,
+            self.create_folder_tables,
+            self.create_health_table,
+        ])
 
-        self.conn = sqlite3.connect(db_path)
-        self.create_table()
+        # callback(event, *args) khi bookmark thay đổi (vd. index gợi ý ở thanh địa chỉ)
+        self.listeners = []
 
-    def create_table(self):
+        # index URL trong RAM: kiểm tra sao/trùng URL O(1), không cần query DB
+        self.url_to_id = {}
+        self.id_to_url = {}
+        self.load_url_index()
+
+    def create_table(self, conn):
         query = """
         CREATE TABLE IF NOT EXISTS bookmarks (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -18,21 +67,115 @@ class BookmarkManager:
             url TEXT NOT NULL UNIQUE
         )
         """
-        self.conn.execute(query)
-        self.conn.commit()
+        conn.execute(query)
+
+    def create_folder_tables(self, conn):
+        """
+        Folder lồng nhau + tag.
+        Cây folder lưu bằng closure table (mọi cặp tổ tiên → hậu duệ kèm độ sâu),
+        nên liệt kê / đếm / mở cả 1 nhánh chỉ là 1 query có index.
+        """
+        columns = [row[1] for row in conn.execute("PRAGMA table_info(bookmarks)")]
+        if "folder_id" not in columns:
+            # NULL = nằm ở gốc
+            conn.execute("ALTER TABLE bookmarks ADD COLUMN folder_id INTEGER REFERENCES bookmark_folders(id)")
+        conn.executescript("""
+        CREATE TABLE IF NOT EXISTS bookmark_folders (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            parent_id INTEGER REFERENCES bookmark_folders(id),
+            title TEXT NOT NULL
+        );
+
+        CREATE TABLE IF NOT EXISTS bookmark_folder_tree (
+            ancestor_id INTEGER NOT NULL,
+            descendant_id INTEGER NOT NULL,
+            depth INTEGER NOT NULL,
+            PRIMARY KEY (ancestor_id, descendant_id)
+        ) WITHOUT ROWID;
+
+        CREATE TABLE IF NOT EXISTS tags (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL UNIQUE
+        );
+
+        CREATE TABLE IF NOT EXISTS bookmark_tags (
+            bookmark_id INTEGER NOT NULL,
+            tag_id INTEGER NOT NULL,
+            PRIMARY KEY (bookmark_id, tag_id)
+        ) WITHOUT ROWID;
+
+        CREATE INDEX IF NOT EXISTS idx_folder_tree_descendant ON bookmark_folder_tree(descendant_id, ancestor_id);
+        CREATE INDEX IF NOT EXISTS idx_folders_parent ON bookmark_folders(parent_id, title);
+        CREATE INDEX IF NOT EXISTS idx_bookmarks_folder ON bookmarks(folder_id, id);
+        CREATE INDEX IF NOT EXISTS idx_bookmark_tags_tag ON bookmark_tags(tag_id, bookmark_id);
+
+        CREATE TRIGGER IF NOT EXISTS bookmarks_tags_ad AFTER DELETE ON bookmarks BEGIN
+            DELETE FROM bookmark_tags WHERE bookmark_id = old.id;
+        END;
+        """)
+
+    def create_health_table(self, conn):
+        """Kết quả kiểm tra link chết (bảng phụ, 1 dòng / bookmark)"""
+        conn.executescript("""
+        CREATE TABLE IF NOT EXISTS bookmark_health (
+            bookmark_id INTEGER PRIMARY KEY,
+            status INTEGER,            -- HTTP status cuối cùng, NULL = lỗi mạng / timeout
+            final_url TEXT,
+            latency_ms INTEGER,
+            error TEXT,
+            checked_at DATETIME NOT NULL
+        );
+
+        CREATE TRIGGER IF NOT EXISTS bookmarks_health_ad AFTER DELETE ON bookmarks BEGIN
+            DELETE FROM bookmark_health WHERE bookmark_id = old.id;
+        END;
+        """)
+
+    def load_url_index(self):
+        """Load toàn bộ URL bookmark vào RAM (1 lần lúc khởi động)"""
+        self.url_to_id.clear()
+        self.id_to_url.clear()
+        for bookmark_id, url in self.conn.execute("SELECT id, url FROM bookmarks"):
+            self.url_to_id[url] = bookmark_id
+            self.id_to_url[bookmark_id] = url
+
+    def add_listener(self, callback):
+        """
+        Đăng ký callback(event, *args):
+        ("added", title, url), ("removed", url), ("updated", old_url, title, url), ("cleared",)
+        """
+        self.listeners.append(callback)
+
+    def _notify(self, event, *args):
+        for callback in self.listeners:
+            callback(event, *args)
+
+    def index_bookmarks(self, rows):
+        """Cập nhật index RAM cho các bookmark (id, url, title) được thêm từ connection khác (import)"""
+        for bookmark_id, url, title in rows:
+            self.url_to_id[url] = bookmark_id
+            self.id_to_url[bookmark_id] = url
+            self._notify("added", title, url)
+
+    def is_bookmarked(self, url):
+        """URL đã được bookmark chưa (tra trong RAM)"""
+        return url in self.url_to_id
 
     # ------------------------------
     # CRUD FUNCTIONS
     # ------------------------------
 
-    def add_bookmark(self, title, url):
+    def add_bookmark(self, title, url, folder_id=None):
         """Thêm bookmark (không thêm nếu trùng URL)"""
-        if self.get_by_url(url) is not None:
+        if url in self.url_to_id:
             return False  # đã tồn tại, không thêm
 
-        query = "INSERT INTO bookmarks (title, url) VALUES (?, ?)"
-        self.conn.execute(query, (title, url))
+        query = "INSERT INTO bookmarks (title, url, folder_id) VALUES (?, ?, ?)"
+        cursor = self.conn.execute(query, (title, url, folder_id))
         self.conn.commit()
+        self.url_to_id[url] = cursor.lastrowid
+        self.id_to_url[cursor.lastrowid] = url
+        self._notify("added", title, url)
         return True
 
     def delete_bookmark_by_id(self, bookmark_id):
@@ -40,12 +183,31 @@ class BookmarkManager:
         query = "DELETE FROM bookmarks WHERE id = ?"
         self.conn.execute(query, (bookmark_id,))
         self.conn.commit()
+        url = self.id_to_url.pop(bookmark_id, None)
+        if url is not None:
+            self.url_to_id.pop(url, None)
+            self._notify("removed", url)
 
     def delete_bookmark_by_url(self, url):
         """Xoá bookmark theo URL"""
         query = "DELETE FROM bookmarks WHERE url = ?"
         self.conn.execute(query, (url,))
         self.conn.commit()
+        bookmark_id = self.url_to_id.pop(url, None)
+        if bookmark_id is not None:
+            self.id_to_url.pop(bookmark_id, None)
+            self._notify("removed", url)
+
+    def clear(self):
+        """Xoá toàn bộ bookmark (kể cả folder và tag)"""
+        with self.conn:
+            self.conn.execute("DELETE FROM bookmarks")
+            self.conn.execute("DELETE FROM bookmark_folder_tree")
+            self.conn.execute("DELETE FROM bookmark_folders")
+            self.conn.execute("DELETE FROM tags")
+        self.url_to_id.clear()
+        self.id_to_url.clear()
+        self._notify("cleared")
 
     def list_bookmarks(self):
         """Lấy tất cả bookmark (id, title, url)"""
@@ -55,6 +217,8 @@ class BookmarkManager:
 
     def get_by_url(self, url):
         """Lấy bookmark theo URL (để kiểm tra trùng)"""
+        if url not in self.url_to_id:
+            return None
         cursor = self.conn.cursor()
         cursor.execute("SELECT id, title, url FROM bookmarks WHERE url = ?", (url,))
         return cursor.fetchone()
@@ -64,9 +228,203 @@ class BookmarkManager:
         query = "UPDATE bookmarks SET title = ?, url = ? WHERE id = ?"
         self.conn.execute(query, (title, url, bookmark_id))
         self.conn.commit()
+        old_url = self.id_to_url.get(bookmark_id)
+        if old_url is not None:
+            self.url_to_id.pop(old_url, None)
+            self.url_to_id[url] = bookmark_id
+            self.id_to_url[bookmark_id] = url
+            self._notify("updated", old_url, title, url)
     
+    # ------------------------------
+    # FOLDERS
+    # ------------------------------
+
+    def create_folder(self, title, parent_id=None):
+        """Tạo folder mới (parent_id=None → ở gốc), trả về id"""
+        with self.conn:
+            return insert_folder(self.conn, title, parent_id)
+
+    def rename_folder(self, folder_id, title):
+        self.conn.execute("UPDATE bookmark_folders SET title = ? WHERE id = ?", (title, folder_id))
+        self.conn.commit()
+
+    def move_folder(self, folder_id, new_parent_id):
+        """Chuyển cả nhánh folder sang parent mới (không cho chuyển vào chính nhánh của nó)"""
+        if new_parent_id is not None and self.conn.execute(
+            "SELECT 1 FROM bookmark_folder_tree WHERE ancestor_id = ? AND descendant_id = ?",
+            (folder_id, new_parent_id),
+        ).fetchone():
+            raise ValueError("Cannot move a folder into its own subtree")
+
+        with self.conn:
+            # bỏ các đường đi từ tổ tiên cũ (ngoài nhánh) vào trong nhánh
+            self.conn.execute("""
+            DELETE FROM bookmark_folder_tree
+            WHERE descendant_id IN (SELECT descendant_id FROM bookmark_folder_tree WHERE ancestor_id = ?)
+              AND ancestor_id NOT IN (SELECT descendant_id FROM bookmark_folder_tree WHERE ancestor_id = ?)
+            """, (folder_id, folder_id))
+            if new_parent_id is not None:
+                # nối mọi tổ tiên của parent mới với mọi nút trong nhánh
+                self.conn.execute("""
+                INSERT INTO bookmark_folder_tree (ancestor_id, descendant_id, depth)
+                SELECT above.ancestor_id, below.descendant_id, above.depth + below.depth + 1
+                FROM bookmark_folder_tree AS above
+                CROSS JOIN bookmark_folder_tree AS below
+                WHERE above.descendant_id = ? AND below.ancestor_id = ?
+                """, (new_parent_id, folder_id))
+            self.conn.execute(
+                "UPDATE bookmark_folders SET parent_id = ? WHERE id = ?", (new_parent_id, folder_id)
+            )
+
+    def delete_folder(self, folder_id):
+        """Xoá folder cùng toàn bộ folder con và bookmark bên trong"""
+        subtree = "SELECT descendant_id FROM bookmark_folder_tree WHERE ancestor_id = ?"
+        removed = self.conn.execute(
+            f"SELECT id, url FROM bookmarks WHERE folder_id IN ({subtree})", (folder_id,)
+        ).fetchall()
+        with self.conn:
+            self.conn.execute(f"DELETE FROM bookmarks WHERE folder_id IN ({subtree})", (folder_id,))
+            self.conn.execute(f"DELETE FROM bookmark_folders WHERE id IN ({subtree})", (folder_id,))
+            self.conn.execute("""
+            DELETE FROM bookmark_folder_tree WHERE descendant_id IN (
+                SELECT descendant_id FROM bookmark_folder_tree WHERE ancestor_id = ?
+            )
+            """, (folder_id,))
+        for bookmark_id, url in removed:
+            self.id_to_url.pop(bookmark_id, None)
+            self.url_to_id.pop(url, None)
+            self._notify("removed", url)
+
+    def move_bookmark(self, bookmark_id, folder_id):
+        self.conn.execute("UPDATE bookmarks SET folder_id = ? WHERE id = ?", (folder_id, bookmark_id))
+        self.conn.commit()
+
+    def list_children(self, folder_id=None):
+        """
+        Con trực tiếp của 1 folder (None = gốc):
+        (folders, bookmarks) với folders = [(id, title, có_con)], bookmarks = [(id, title, url)]
+        """
+        folders = self.conn.execute("""
+        SELECT f.id, f.title,
+               EXISTS (SELECT 1 FROM bookmark_folders c WHERE c.parent_id = f.id)
+               OR EXISTS (SELECT 1 FROM bookmarks b WHERE b.folder_id = f.id)
+        FROM bookmark_folders f
+        WHERE f.parent_id IS ?
+        ORDER BY f.title COLLATE NOCASE
+        """, (folder_id,)).fetchall()
+        bookmarks = self.conn.execute(
+            "SELECT id, title, url FROM bookmarks WHERE folder_id IS ? ORDER BY id DESC", (folder_id,)
+        ).fetchall()
+        return folders, bookmarks
+
+    def list_subtree_bookmarks(self, folder_id):
+        """Mọi bookmark nằm trong folder và các folder con (1 query qua closure table)"""
+        return self.conn.execute("""
+        SELECT b.id, b.title, b.url
+        FROM bookmark_folder_tree t JOIN bookmarks b ON b.folder_id = t.descendant_id
+        WHERE t.ancestor_id = ?
+        ORDER BY t.depth, b.id DESC
+        """, (folder_id,)).fetchall()
+
+    def count_subtree_bookmarks(self, folder_id):
+        return self.conn.execute("""
+        SELECT COUNT(*)
+        FROM bookmark_folder_tree t JOIN bookmarks b ON b.folder_id = t.descendant_id
+        WHERE t.ancestor_id = ?
+        """, (folder_id,)).fetchone()[0]
+
+    def folder_paths(self):
+        """Tất cả folder kèm đường dẫn đầy đủ, vd (id, "Work / Docs")"""
+        rows = self.conn.execute("""
+        SELECT t.descendant_id, f.title
+        FROM bookmark_folder_tree t JOIN bookmark_folders f ON f.id = t.ancestor_id
+        ORDER BY t.descendant_id, t.depth DESC
+        """).fetchall()
+        paths = {}
+        for folder_id, title in rows:
+            paths.setdefault(folder_id, []).append(title)
+        return sorted(((i, " / ".join(p)) for i, p in paths.items()), key=lambda x: x[1].lower())
+
+    # ------------------------------
+    # TAGS
+    # ------------------------------
+
+    def set_tags(self, bookmark_id, names):
+        """Gán lại danh sách tag cho bookmark"""
+        names = {name.strip().lower() for name in names if name.strip()}
+        with self.conn:
+            self.conn.execute("DELETE FROM bookmark_tags WHERE bookmark_id = ?", (bookmark_id,))
+            for name in names:
+                self.conn.execute("INSERT OR IGNORE INTO tags (name) VALUES (?)", (name,))
+                self.conn.execute("""
+                INSERT OR IGNORE INTO bookmark_tags (bookmark_id, tag_id)
+                SELECT ?, id FROM tags WHERE name = ?
+                """, (bookmark_id, name))
+
+    def get_tags(self, bookmark_id):
+        return [row[0] for row in self.conn.execute("""
+        SELECT t.name FROM bookmark_tags bt JOIN tags t ON t.id = bt.tag_id
+        WHERE bt.bookmark_id = ? ORDER BY t.name
+        """, (bookmark_id,))]
+
+    def list_tags(self):
+        """Các tag đang được dùng"""
+        return [row[0] for row in self.conn.execute("""
+        SELECT name FROM tags WHERE id IN (SELECT tag_id FROM bookmark_tags) ORDER BY name
+        """)]
+
+    def list_bookmarks_by_tag(self, name):
+        return self.conn.execute("""
+        SELECT b.id, b.title, b.url
+        FROM tags t JOIN bookmark_tags bt ON bt.tag_id = t.id JOIN bookmarks b ON b.id = bt.bookmark_id
+        WHERE t.name = ?
+        ORDER BY b.id DESC
+        """, (name.strip().lower(),)).fetchall()
+
+    # ------------------------------
+    # HEALTH (link chết)
+    # ------------------------------
+
+    # điều kiện SQL cho từng bộ lọc (h = bookmark_health, b = bookmarks)
+    HEALTH_FILTERS = {
+        "ok": "h.status BETWEEN 200 AND 299 AND h.final_url = b.url",
+        "redirected": "h.status BETWEEN 200 AND 299 AND h.final_url != b.url",
+        "broken": "(h.status IS NULL OR h.status >= 300) AND h.bookmark_id IS NOT NULL",
+        "unchecked": "h.bookmark_id IS NULL",
+    }
+
+    def get_health(self, bookmark_ids):
+        """{bookmark_id: (status, final_url, latency_ms, error)} cho các id đã được kiểm tra"""
+        ids = list(bookmark_ids)
+        health = {}
+        for start in range(0, len(ids), 900):
+            part = ids[start:start + 900]
+            placeholders = ",".join("?" * len(part))
+            for row in self.conn.execute(f"""
+            SELECT bookmark_id, status, final_url, latency_ms, error
+            FROM bookmark_health WHERE bookmark_id IN ({placeholders})
+            """, part):
+                health[row[0]] = row[1:]
+        return health
+
+    def list_bookmarks_by_health(self, kind, tag=None):
+        """Bookmark theo trạng thái: ok / redirected / broken / unchecked (có thể lọc thêm theo tag)"""
+        condition = self.HEALTH_FILTERS[kind]
+        params = []
+        tag_join = ""
+        if tag:
+            tag_join = ("JOIN bookmark_tags bt ON bt.bookmark_id = b.id "
+                        "JOIN tags t ON t.id = bt.tag_id AND t.name = ?")
+            params.append(tag.strip().lower())
+        return self.conn.execute(f"""
+        SELECT b.id, b.title, b.url
+        FROM bookmarks b {tag_join}
+        LEFT JOIN bookmark_health h ON h.bookmark_id = b.id
+        WHERE {condition}
+        ORDER BY b.id DESC
+        """, params).fetchall()
+
     def search(self, keyword, limit=5):
-        cursor = self.conn.cursor()
         query = """
         SELECT title, url FROM bookmarks
         WHERE title LIKE ? OR url LIKE ?
@@ -78,6 +436,6 @@ class BookmarkManager:
         LIMIT ?
         """
         like = f"%{keyword}%"
-        cursor.execute(query, (like, like, like, limit))
-        return cursor.fetchall()
+        with self.storage.read() as conn:
+            return conn.execute(query, (like, like, like, limit)).fetchall()
 
@@ -1,8 +1,231 @@
+import os
+import sqlite3
+
 from PyQt5.QtWidgets import *
 from PyQt5.QtCore import *
 from PyQt5.QtGui import QCursor, QColor
 from PyQt5.QtCore import QUrl
 
+from browser.bookmark_health import BookmarkHealthChecker
+from browser.bookmark_importer import start_import
+from browser.bookmark_manager import record_health
+
+
+class BookmarkNode:
+    """1 nút trong cây bookmark (folder hoặc bookmark)"""
+    __slots__ = ("kind", "id", "title", "url", "parent", "row", "children", "fetched", "has_children")
+
+    FOLDER = "folder"
+    BOOKMARK = "bookmark"
+
+    def __init__(self, kind, id_=None, title="", url="", parent=None, row=0, has_children=False):
+        self.kind = kind
+        self.id = id_
+        self.title = title
+        self.url = url
+        self.parent = parent
+        self.row = row
+        self.children = []
+        self.fetched = kind != self.FOLDER
+        self.has_children = has_children
+
+    def is_folder(self):
+        return self.kind == self.FOLDER
+
+
+class BookmarkTreeModel(QAbstractItemModel):
+    """Model cây bookmark: con của 1 folder chỉ được query khi folder đó được mở"""
+    HEADERS = ["Title", "URL", "Status"]
+
+    def __init__(self, bookmark_manager, parent=None):
+        super().__init__(parent)
+        self.bookmark_manager = bookmark_manager
+        self.tag = None  # đang lọc theo tag / trạng thái link thì hiển thị danh sách phẳng
+        self.health_filter = None
+        self.health = {}  # bookmark_id -> (status, final_url, latency_ms, error) của các dòng đã load
+        self.root = BookmarkNode(BookmarkNode.FOLDER, has_children=True)
+        style = QApplication.style()
+        self.folder_icon = style.standardIcon(QStyle.SP_DirIcon)
+        self.bookmark_icon = style.standardIcon(QStyle.SP_FileIcon)
+
+    def node(self, index):
+        return index.internalPointer() if index.isValid() else self.root
+
+    # ---------- Qt model API ----------
+    def index(self, row, column, parent=QModelIndex()):
+        parent_node = self.node(parent)
+        if not self.hasIndex(row, column, parent):
+            return QModelIndex()
+        return self.createIndex(row, column, parent_node.children[row])
+
+    def parent(self, index):
+        if not index.isValid():
+            return QModelIndex()
+        parent_node = index.internalPointer().parent
+        if parent_node is None or parent_node is self.root:
+            return QModelIndex()
+        return self.createIndex(parent_node.row, 0, parent_node)
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.isValid() and parent.column() != 0:
+            return 0
+        return len(self.node(parent).children)
+
+    def columnCount(self, parent=QModelIndex()):
+        return len(self.HEADERS)
+
+    def hasChildren(self, parent=QModelIndex()):
+        node = self.node(parent)
+        if not node.is_folder():
+            return False
+        return bool(node.children) if node.fetched else node.has_children
+
+    def canFetchMore(self, parent=QModelIndex()):
+        node = self.node(parent)
+        return node.is_folder() and not node.fetched
+
+    def fetchMore(self, parent=QModelIndex()):
+        node = self.node(parent)
+        if node.fetched:
+            return
+        node.fetched = True
+
+        if node is self.root and self.health_filter:
+            folders, bookmarks = [], self.bookmark_manager.list_bookmarks_by_health(self.health_filter, self.tag)
+        elif node is self.root and self.tag:
+            folders, bookmarks = [], self.bookmark_manager.list_bookmarks_by_tag(self.tag)
+        else:
+            folders, bookmarks = self.bookmark_manager.list_children(node.id)
+        if bookmarks:
+            self.health.update(self.bookmark_manager.get_health(row[0] for row in bookmarks))
+        count = len(folders) + len(bookmarks)
+        if not count:
+            return
+
+        self.beginInsertRows(parent, 0, count - 1)
+        for folder_id, title, has_children in folders:
+            node.children.append(BookmarkNode(
+                BookmarkNode.FOLDER, folder_id, title, parent=node,
+                row=len(node.children), has_children=bool(has_children),
+            ))
+        for bookmark_id, title, url in bookmarks:
+            node.children.append(BookmarkNode(
+                BookmarkNode.BOOKMARK, bookmark_id, title, url, parent=node, row=len(node.children),
+            ))
+        self.endInsertRows()
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return self.HEADERS[section]
+        return None
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        node = index.internalPointer()
+        if role == Qt.DisplayRole:
+            if index.column() == 0:
+                return node.title
+            if index.column() == 1:
+                return node.url
+            return self.status_text(node)
+        if role == Qt.ToolTipRole and index.column() == 2:
+            health = self.health.get(node.id) if not node.is_folder() else None
+            if health:
+                status, final_url, latency_ms, error = health
+                return f"{error or status} · {latency_ms} ms\n{final_url}"
+        if role == Qt.ForegroundRole and index.column() == 2 and not node.is_folder():
+            health = self.health.get(node.id)
+            if health and (health[0] is None or health[0] >= 300):
+                return QColor("#c62828")
+        if role == Qt.DecorationRole and index.column() == 0:
+            return self.folder_icon if node.is_folder() else self.bookmark_icon
+        if role == Qt.UserRole:
+            return node
+        return None
+
+    def flags(self, index):
+        if not index.isValid():
+            return Qt.NoItemFlags
+        return Qt.ItemIsEnabled | Qt.ItemIsSelectable
+
+    # ---------- helpers ----------
+    def status_text(self, node):
+        health = self.health.get(node.id) if not node.is_folder() else None
+        if not health:
+            return ""
+        status, final_url, _, error = health
+        if status is None:
+            return error or "Error"
+        if final_url and final_url != node.url:
+            return f"{status} → {final_url}"
+        return str(status)
+
+    def is_flat(self):
+        return bool(self.tag or self.health_filter)
+
+    def reload(self):
+        self.beginResetModel()
+        self.root = BookmarkNode(BookmarkNode.FOLDER, has_children=True)
+        self.health = {}
+        self.endResetModel()
+        self.fetchMore()
+
+    def set_tag(self, tag):
+        self.tag = tag or None
+        self.reload()
+
+    def set_health_filter(self, kind):
+        self.health_filter = kind or None
+        self.reload()
+
+
+class BookmarkHealthWorker(QObject):
+    """Chạy kiểm tra link trong QThread riêng, ghi kết quả theo batch bằng connection riêng"""
+    progress = pyqtSignal(int, int)  # đã kiểm tra, tổng
+    finished = pyqtSignal(int)
+    failed = pyqtSignal(str)
+    BATCH_SIZE = 50
+
+    def __init__(self, storage, bookmarks):
+        super().__init__()
+        self.storage = storage
+        self.bookmarks = bookmarks
+        self.cancelled = False
+
+    def cancel(self):
+        self.cancelled = True
+
+    def run(self):
+        conn = None
+        checker = BookmarkHealthChecker()
+        pending = []
+        done = 0
+
+        def on_result(bookmark_id, result):
+            nonlocal done
+            done += 1
+            pending.append((bookmark_id, result))
+            if len(pending) >= self.BATCH_SIZE:
+                record_health(conn, pending)
+                pending.clear()
+            self.progress.emit(done, len(self.bookmarks))
+
+        try:
+            conn = self.storage.connect()  # connection ghi riêng của thread kiểm tra
+            checker.check_all(self.bookmarks, on_result, is_cancelled=lambda: self.cancelled)
+            if pending:
+                record_health(conn, pending)
+        except sqlite3.Error as e:
+            # vd. DB đang bị khóa: vẫn phải báo để GUI đóng progress và thread dừng
+            self.failed.emit(str(e))
+            return
+        finally:
+            if conn is not None:
+                conn.close()
+        self.finished.emit(done)
+
+
 class BookmarkWindow(QWidget):
     def __init__(self, bookmark_manager):
         super().__init__()
@@ -13,22 +236,59 @@ class BookmarkWindow(QWidget):
 
         layout = QVBoxLayout()
 
-        self.table = QTableWidget()
-        self.table.setColumnCount(4)
-        self.table.setHorizontalHeaderLabels(["Select", "Title", "URL", "Edit"])
-        self.table.setAlternatingRowColors(True)
-        self.table.setCursor(QCursor(Qt.PointingHandCursor))
-        self.table.setWordWrap(True)
+        # Lọc theo tag
+        filter_layout = QHBoxLayout()
+        filter_layout.addWidget(QLabel("Tag:"))
+        self.tag_filter = QComboBox()
+        self.tag_filter.currentIndexChanged.connect(self.on_tag_changed)
+        filter_layout.addWidget(self.tag_filter)
+        filter_layout.addWidget(QLabel("Status:"))
+        self.health_filter = QComboBox()
+        for label, kind in (("All", None), ("OK", "ok"), ("Redirected", "redirected"),
+                            ("Broken", "broken"), ("Unchecked", "unchecked")):
+            self.health_filter.addItem(label, kind)
+        self.health_filter.currentIndexChanged.connect(self.on_health_filter_changed)
+        filter_layout.addWidget(self.health_filter)
+        filter_layout.addStretch()
+        layout.addLayout(filter_layout)
+
+        self.model = BookmarkTreeModel(bookmark_manager, self)
+        self.tree = QTreeView()
+        self.tree.setModel(self.model)
+        self.tree.setAlternatingRowColors(True)
+        self.tree.setCursor(QCursor(Qt.PointingHandCursor))
+        self.tree.setUniformRowHeights(True)
+        self.tree.setSelectionMode(QAbstractItemView.ExtendedSelection)
+        self.tree.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.tree.setContextMenuPolicy(Qt.CustomContextMenu)
+        self.tree.header().setSectionResizeMode(0, QHeaderView.Interactive)
+        self.tree.header().setSectionResizeMode(1, QHeaderView.Stretch)
+        self.tree.header().setSectionResizeMode(2, QHeaderView.Interactive)
+        self.tree.header().setStretchLastSection(False)
+        self.tree.header().resizeSection(0, 400)
+        self.tree.header().resizeSection(2, 160)
+
+        layout.addWidget(self.tree)
+
+        # Buttons: Import, Check Links, New Folder, Edit, Delete, Clear All, Close
+        button_layout = QHBoxLayout()
 
-        self.table.horizontalHeader().setSectionResizeMode(0, QHeaderView.ResizeToContents)
-        self.table.horizontalHeader().setSectionResizeMode(1, QHeaderView.Stretch)
-        self.table.horizontalHeader().setSectionResizeMode(2, QHeaderView.Stretch)
-        self.table.horizontalHeader().setSectionResizeMode(3, QHeaderView.ResizeToContents)
+        self.btn_import = QPushButton("Import...")
+        self.btn_import.clicked.connect(self.import_file)
+        button_layout.addWidget(self.btn_import)
 
-        layout.addWidget(self.table)
+        self.btn_check_links = QPushButton("Check Links")
+        self.btn_check_links.clicked.connect(self.check_links)
+        button_layout.addWidget(self.btn_check_links)
 
-        # Buttons: Delete, Clear All, Close
-        button_layout = QHBoxLayout()
+        btn_new_folder = QPushButton("New Folder")
+        btn_new_folder.clicked.connect(lambda: self.new_folder())
+        button_layout.addWidget(btn_new_folder)
+
+        self.btn_edit = QPushButton("Edit")
+        self.btn_edit.setEnabled(False)
+        self.btn_edit.clicked.connect(self.edit_current)
+        button_layout.addWidget(self.btn_edit)
 
         self.btn_delete_selected = QPushButton("Delete Selected")
         self.btn_delete_selected.setEnabled(False)
@@ -47,98 +307,170 @@ class BookmarkWindow(QWidget):
         self.setLayout(layout)
 
         # Signals
-        self.table.itemChanged.connect(self.on_item_changed)
-        self.table.cellDoubleClicked.connect(self.open_bookmark)
+        self.tree.selectionModel().selectionChanged.connect(self.update_buttons)
+        self.tree.doubleClicked.connect(self.open_bookmark)
+        self.tree.customContextMenuRequested.connect(self.show_context_menu)
 
         self.load_bookmarks()
 
     def load_bookmarks(self):
-        self.table.blockSignals(True)
-        entries = self.bookmark_manager.list_bookmarks()
-        self.table.setRowCount(len(entries))
-
-        for row, (id_, title, url) in enumerate(entries):
-            # Checkbox
-            check_item = QTableWidgetItem()
-            check_item.setFlags(Qt.ItemIsUserCheckable | Qt.ItemIsEnabled)
-            check_item.setCheckState(Qt.Unchecked)
-            check_item.setData(Qt.UserRole, id_)
-            self.table.setItem(row, 0, check_item)
-
-            # Title
-            title_item = QTableWidgetItem(title)
-            title_item.setFlags(Qt.ItemIsEnabled | Qt.ItemIsSelectable)
-            self.table.setItem(row, 1, title_item)
-
-            # URL
-            url_item = QTableWidgetItem(url)
-            url_item.setFlags(Qt.ItemIsEnabled | Qt.ItemIsSelectable)
-            self.table.setItem(row, 2, url_item)
-
-            # Edit button
-            btn_edit = QPushButton("Edit")
-            btn_edit.clicked.connect(lambda _, r=row: self.edit_row(r))
-            self.table.setCellWidget(row, 3, btn_edit)
-
-        self.table.blockSignals(False)
-        self.update_delete_button()
-        self.btn_clear_all.setEnabled(len(entries) > 0)
-
-    def update_delete_button(self):
-        any_checked = any(self.table.item(r, 0).checkState() == Qt.Checked
-                          for r in range(self.table.rowCount()))
-        self.btn_delete_selected.setEnabled(any_checked)
-
-    def on_item_changed(self, item):
-        if item.column() == 0:
-            self.update_delete_button()
-
-    def edit_row(self, row):
-        bookmark_id = self.table.item(row, 0).data(Qt.UserRole)
-        title = self.table.item(row, 1).text()
-        url = self.table.item(row, 2).text()
-
-        dialog = EditBookmarkDialog(title, url)
+        self.load_tags()
+        self.model.reload()
+        self.update_buttons()
+        self.btn_clear_all.setEnabled(bool(self.bookmark_manager.url_to_id) or self.model.rowCount() > 0)
+
+    def load_tags(self):
+        current = self.tag_filter.currentData()
+        self.tag_filter.blockSignals(True)
+        self.tag_filter.clear()
+        self.tag_filter.addItem("All Bookmarks", None)
+        for tag in self.bookmark_manager.list_tags():
+            self.tag_filter.addItem(tag, tag)
+        index = self.tag_filter.findData(current)
+        self.tag_filter.setCurrentIndex(index if index >= 0 else 0)
+        self.tag_filter.blockSignals(False)
+        self.model.tag = self.tag_filter.currentData()
+
+    def on_tag_changed(self, _):
+        self.model.set_tag(self.tag_filter.currentData())
+        self.update_buttons()
+
+    def on_health_filter_changed(self, _):
+        self.model.set_health_filter(self.health_filter.currentData())
+        self.update_buttons()
+
+    def selected_nodes(self):
+        return [index.data(Qt.UserRole) for index in self.tree.selectionModel().selectedRows()]
+
+    def current_node(self):
+        index = self.tree.currentIndex()
+        return index.data(Qt.UserRole) if index.isValid() else None
+
+    def update_buttons(self, *args):
+        selected = self.tree.selectionModel().selectedRows()
+        self.btn_delete_selected.setEnabled(bool(selected))
+        self.btn_edit.setEnabled(len(selected) == 1)
+
+    # ---------- actions ----------
+    def target_folder_id(self):
+        """Folder đang chọn (hoặc folder chứa bookmark đang chọn); None = gốc"""
+        node = self.current_node()
+        if node is None or self.model.is_flat():
+            return None
+        if not node.is_folder():
+            node = node.parent
+        return node.id if node is not None else None
+
+    def new_folder(self, parent_id=None):
+        if parent_id is None:
+            parent_id = self.target_folder_id()
+        title, ok = QInputDialog.getText(self, "New Folder", "Folder name:")
+        if ok and title.strip():
+            self.bookmark_manager.create_folder(title.strip(), parent_id)
+            self.load_bookmarks()
+
+    def edit_current(self):
+        node = self.current_node()
+        if node is not None:
+            self.edit_node(node)
+
+    def edit_node(self, node):
+        if node.is_folder():
+            title, ok = QInputDialog.getText(self, "Rename Folder", "Folder name:", text=node.title)
+            if ok and title.strip():
+                self.bookmark_manager.rename_folder(node.id, title.strip())
+                self.load_bookmarks()
+            return
+
+        dialog = EditBookmarkDialog(node.title, node.url, self.bookmark_manager.get_tags(node.id))
         if dialog.exec_():
-            new_title, new_url = dialog.get_data()
-            self.bookmark_manager.update_bookmark(bookmark_id, new_title, new_url)
+            new_title, new_url, tags = dialog.get_data()
+            self.bookmark_manager.update_bookmark(node.id, new_title, new_url)
+            self.bookmark_manager.set_tags(node.id, tags)
             self.load_bookmarks()  # reload dữ liệu mới
 
-    def open_bookmark(self, row, column):
-        # Chỉ mở khi double-click vào Title hoặc URL
-        if column not in [1, 2]:
+    def move_node(self, node):
+        folders = [(None, "(Top level)")] + [
+            (folder_id, path) for folder_id, path in self.bookmark_manager.folder_paths()
+            if not (node.is_folder() and folder_id == node.id)
+        ]
+        labels = [path for _, path in folders]
+        label, ok = QInputDialog.getItem(self, "Move To", "Folder:", labels, 0, False)
+        if not ok:
             return
-
-        title_item = self.table.item(row, 1)
-        url_item = self.table.item(row, 2)
-        if not url_item:
+        folder_id = folders[labels.index(label)][0]
+        try:
+            if node.is_folder():
+                self.bookmark_manager.move_folder(node.id, folder_id)
+            else:
+                self.bookmark_manager.move_bookmark(node.id, folder_id)
+        except ValueError as e:
+            QMessageBox.warning(self, "Move", str(e))
             return
+        self.load_bookmarks()
 
-        title = title_item.text()
-        url = url_item.text()
-
+    def open_url(self, title, url):
         if hasattr(self, "main_window"):
             self.main_window.tab_manager.add_new_tab(QUrl(url))
             self.main_window.history_manager.add_entry(title, url)
 
+    def open_bookmark(self, index):
+        # Double-click vào folder chỉ mở/đóng folder
+        node = index.data(Qt.UserRole)
+        if node is None or node.is_folder():
+            return
+        self.open_url(node.title, node.url)
+
+    def open_folder(self, node):
+        """Mở toàn bộ bookmark trong folder và các folder con"""
+        for _, title, url in self.bookmark_manager.list_subtree_bookmarks(node.id):
+            self.open_url(title, url)
+
+    def show_context_menu(self, position):
+        index = self.tree.indexAt(position)
+        if not index.isValid():
+            return
+        node = index.data(Qt.UserRole)
+        menu = QMenu(self)
+
+        if node.is_folder():
+            count = self.bookmark_manager.count_subtree_bookmarks(node.id)
+            action_open_all = menu.addAction(f"Open All ({count})")
+            action_open_all.setEnabled(count > 0)
+            action_open_all.triggered.connect(lambda: self.open_folder(node))
+            menu.addAction("New Subfolder").triggered.connect(lambda: self.new_folder(node.id))
+            menu.addAction("Rename").triggered.connect(lambda: self.edit_node(node))
+        else:
+            menu.addAction("Open").triggered.connect(lambda: self.open_url(node.title, node.url))
+            menu.addAction("Edit").triggered.connect(lambda: self.edit_node(node))
+        menu.addAction("Move To...").triggered.connect(lambda: self.move_node(node))
+        menu.addSeparator()
+        menu.addAction("Delete").triggered.connect(self.delete_selected)
+
+        menu.exec_(self.tree.viewport().mapToGlobal(position))
+
     def delete_selected(self):
+        nodes = self.selected_nodes()
+        if not nodes:
+            return
         confirm = QMessageBox.question(
             self, "Confirm Delete",
-            "Are you sure you want to delete selected bookmarks?",
+            "Are you sure you want to delete selected bookmarks?\n"
+            "Deleting a folder also deletes everything inside it.",
             QMessageBox.Yes | QMessageBox.No
         )
         if confirm != QMessageBox.Yes:
             return
 
-        for row in range(self.table.rowCount()):
-            item = self.table.item(row, 0)
-            if item.checkState() == Qt.Checked:
-                bookmark_id = item.data(Qt.UserRole)
-                self.bookmark_manager.delete_bookmark_by_id(bookmark_id)
+        for node in nodes:
+            if node.is_folder():
+                self.bookmark_manager.delete_folder(node.id)
+            else:
+                self.bookmark_manager.delete_bookmark_by_id(node.id)
         self.load_bookmarks()
 
     def clear_all(self):
-        if self.table.rowCount() == 0:
+        if self.model.rowCount() == 0:
             QMessageBox.information(self, "No bookmarks", "You do not have any bookmarks.")
             return
 
@@ -151,26 +483,113 @@ class BookmarkWindow(QWidget):
         if confirm != QMessageBox.Yes:
             return
 
-        cursor = self.bookmark_manager.conn.cursor()
-        cursor.execute("DELETE FROM bookmarks")
-        cursor.connection.commit()
+        self.bookmark_manager.clear()
+        self.load_bookmarks()
+
+    # ---------- kiểm tra link ----------
+    def check_links(self):
+        bookmarks = self.bookmark_manager.list_bookmarks()
+        if not bookmarks:
+            return
+        self.health_thread = QThread(self)
+        self.health_worker = BookmarkHealthWorker(self.bookmark_manager.storage, bookmarks)
+        self.health_worker.moveToThread(self.health_thread)
+        self.health_thread.started.connect(self.health_worker.run)
+        self.health_worker.finished.connect(self.health_thread.quit)
+        self.health_worker.failed.connect(self.health_thread.quit)
+        self.health_thread.finished.connect(self.health_worker.deleteLater)
+        self.health_thread.finished.connect(self.health_thread.deleteLater)
+
+        self.health_progress = QProgressDialog("Checking links...", "Cancel", 0, len(bookmarks), self)
+        self.health_progress.setWindowTitle("Check Links")
+        self.health_progress.setMinimumDuration(300)
+        self.health_progress.canceled.connect(self.health_worker.cancel, Qt.DirectConnection)
+        self.health_worker.progress.connect(self.on_check_progress)
+        self.health_worker.finished.connect(self.on_check_finished)
+        self.health_worker.failed.connect(self.on_check_failed)
+        self.btn_check_links.setEnabled(False)
+        self.health_thread.start()
+
+    def on_check_progress(self, done, total):
+        self.health_progress.setLabelText(f"Checked {done} of {total} links")
+        self.health_progress.setValue(done)
+
+    def on_check_finished(self, done):
+        self.health_progress.reset()
+        self.btn_check_links.setEnabled(True)
+        self.load_bookmarks()
+
+    def on_check_failed(self, message):
+        self.health_progress.reset()
+        self.btn_check_links.setEnabled(True)
+        # các batch trước lỗi vẫn đã được ghi
+        self.load_bookmarks()
+        QMessageBox.warning(self, "Check Links", f"Could not save link check results:\n{message}")
+
+    # ---------- import ----------
+    def import_file(self):
+        data_dir = os.path.dirname(self.bookmark_manager.storage.db_path)
+        path, _ = QFileDialog.getOpenFileName(
+            self, "Import Bookmarks", data_dir,
+            "Bookmark files (*.html *.htm *.json);;All files (*)"
+        )
+        if not path:
+            return
+
+        # import chạy ở thread riêng, GUI chỉ cập nhật progress
+        self.import_thread, self.import_worker = start_import(
+            self.bookmark_manager.storage, path, self.bookmark_manager.url_to_id, self
+        )
+        self.import_progress = QProgressDialog("Importing bookmarks...", "Cancel", 0, 100, self)
+        self.import_progress.setWindowTitle("Import Bookmarks")
+        self.import_progress.setMinimumDuration(300)
+        self.import_progress.canceled.connect(self.import_worker.cancel, Qt.DirectConnection)
+        self.import_worker.progress.connect(self.on_import_progress)
+        self.import_worker.finished.connect(self.on_import_finished)
+        self.import_worker.failed.connect(self.on_import_failed)
+        self.btn_import.setEnabled(False)
+        self.import_thread.start()
+
+    def on_import_progress(self, imported, skipped, percent):
+        self.import_progress.setLabelText(f"Imported {imported} bookmarks ({skipped} duplicates skipped)")
+        self.import_progress.setValue(percent)
+
+    def on_import_finished(self, imported, skipped, added):
+        self.import_progress.reset()
+        self.btn_import.setEnabled(True)
+        self.bookmark_manager.index_bookmarks(added)
+        self.load_bookmarks()
+        QMessageBox.information(
+            self, "Import Bookmarks",
+            f"Imported {imported} bookmarks, skipped {skipped} duplicates."
+        )
+
+    def on_import_failed(self, message):
+        self.import_progress.reset()
+        self.btn_import.setEnabled(True)
+        # các batch trước lỗi vẫn đã được ghi
+        self.bookmark_manager.load_url_index()
         self.load_bookmarks()
+        QMessageBox.warning(self, "Import Bookmarks", f"Could not import file:\n{message}")
 
 
 #  class này là của BookmarkDialog khi ấn vào nút edit
 class EditBookmarkDialog(QDialog):
-    def __init__(self, title, url):
+    def __init__(self, title, url, tags=None):
         super().__init__()
         self.setWindowTitle("Edit Bookmark")
 
         self.input_title = QLineEdit(title)
         self.input_url = QLineEdit(url)
+        self.input_tags = QLineEdit(", ".join(tags or []))
+        self.input_tags.setPlaceholderText("Tags, separated by commas")
 
         btn_save = QPushButton("Save")
 
         layout = QVBoxLayout()
         layout.addWidget(self.input_title)
         layout.addWidget(self.input_url)
+        layout.addWidget(self.input_tags)
         layout.addWidget(btn_save)
 
         btn_save.clicked.connect(self.accept)
@@ -178,4 +597,5 @@ class EditBookmarkDialog(QDialog):
         self.setLayout(layout)
 
     def get_data(self):
-        return self.input_title.text(), self.input_url.text()
+        tags = [tag for tag in self.input_tags.text().split(",") if tag.strip()]
+        return self.input_title.text(), self.input_url.text(), tags
@@ -0,0 +1,511 @@
+"""
+Log request bắt được ghi ra đĩa (chỉ ghi thêm), giữ được hàng triệu request với RAM cố định.
+
+Thư mục gồm các segment, tên = số thứ tự (seq) của record đầu tiên trong segment:
+    00000000000000000000.seg   record nối tiếp nhau
+    00000000000000000000.idx   offset (u64) của từng record trong .seg
+Mỗi record: u32 độ dài body + u32 crc32(body) + body (BODY_HEAD + các chuỗi UTF-8).
+Segment đầy (segment_bytes) thì đóng lại và mở segment mới; tổng dung lượng vượt max_bytes thì
+xóa segment cũ nhất. Index của segment đã đóng được mmap chỉ đọc → tra seq → offset O(1).
+Mở lại log (khởi động lại trình duyệt) thì đọc lại segment đang ghi dở, bỏ phần record ghi dở.
+Mở chỉ đọc (read_only=True, để xem log cũ) thì không sửa file nào: phần ghi dở chỉ bị bỏ qua khi đọc.
+Ghi từ nhiều thread đi qua CaptureLogWriter: thread gọi chỉ đưa record vào hàng đợi.
+"""
+import json
+import math
+import mmap
+import os
+import queue
+import struct
+import sys
+import threading
+import time
+import zlib
+from array import array
+from bisect import bisect_right
+
+PREFIX = struct.Struct("<II")
+# request_id, start_time, end_time, duration, status, response_size, độ dài các chuỗi
+BODY_HEAD = struct.Struct("<QdddqQ9I")
+OFFSET = struct.Struct("<Q")
+NONE_LENGTH = 0xFFFFFFFF
+STRING_FIELDS = ("url", "method", "mime_type", "ip_address", "error", "first_party_url", "post_data")
+JSON_FIELDS = ("headers", "response_headers")
+
+
+def default_capture_path():
+    """data/network_capture cùng cấp với thư mục browser"""
+    project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    return os.path.join(project_root, "data", "network_capture")
+
+
+def _optional_float(value):
+    return math.nan if value is None else float(value)
+
+
+def _from_float(value):
+    return None if math.isnan(value) else value
+
+
+def encode_record(record):
+    """dict (NetworkRequest.to_record) -> bytes của 1 record, gồm cả prefix"""
+    strings = [record.get(name) for name in STRING_FIELDS]
+    strings += [json.dumps(record[name], ensure_ascii=False) if record.get(name) else None for name in JSON_FIELDS]
+    encoded = [None if value is None else str(value).encode("utf-8") for value in strings]
+    status = record.get("status_code")
+    head = BODY_HEAD.pack(
+        record.get("request_id") or 0,
+        _optional_float(record.get("start_time")),
+        _optional_float(record.get("end_time")),
+        _optional_float(record.get("duration")),
+        -1 if status is None else status,
+        record.get("response_size") or 0,
+        *(NONE_LENGTH if value is None else len(value) for value in encoded),
+    )
+    body = head + b"".join(value for value in encoded if value)
+    return PREFIX.pack(len(body), zlib.crc32(body)) + body
+
+
+def decode_body(body):
+    values = BODY_HEAD.unpack_from(body, 0)
+    request_id, start_time, end_time, duration, status, response_size = values[:6]
+    record = {
+        "request_id": request_id,
+        "start_time": _from_float(start_time),
+        "end_time": _from_float(end_time),
+        "duration": _from_float(duration),
+        "status_code": None if status < 0 else status,
+        "response_size": response_size,
+    }
+    pos = BODY_HEAD.size
+    names = STRING_FIELDS + JSON_FIELDS
+    for name, length in zip(names, values[6:]):
+        if length == NONE_LENGTH:
+            record[name] = None
+            continue
+        value = body[pos:pos + length].decode("utf-8", errors="replace")
+        pos += length
+        record[name] = json.loads(value) if name in JSON_FIELDS else value
+    for name in JSON_FIELDS:
+        if record[name] is None:
+            record[name] = {}
+    return record
+
+
+class Segment:
+    """1 cặp file .seg/.idx; segment đang ghi giữ offset trong RAM, segment đã đóng thì mmap .idx"""
+
+    def __init__(self, directory, first_seq):
+        self.first_seq = first_seq
+        base = os.path.join(directory, f"{first_seq:020d}")
+        self.data_path = base + ".seg"
+        self.index_path = base + ".idx"
+        self.offsets = None   # array offset (segment đang ghi)
+        self.index_map = None  # mmap .idx (segment đã đóng)
+        self.count = 0
+        self.size = 0
+        self.reader = None
+        self.writer = None
+        self.index_writer = None
+
+    # ---------- mở ----------
+    def open_sealed(self):
+        """Segment cũ: tin .idx (dựng lại nếu thiếu / hỏng / trỏ ra ngoài .seg)"""
+        self.size = os.path.getsize(self.data_path)
+        if not self._index_fits():
+            self._write_index(self._scan())
+            self.size = os.path.getsize(self.data_path)
+        self.count = os.path.getsize(self.index_path) // OFFSET.size
+        self._map_index()
+        self.reader = open(self.data_path, "rb")
+
+    def _index_fits(self):
+        """.idx có đúng kích thước và offset cuối còn nằm trong .seg (vd. .seg bị cắt cụt thì không)"""
+        index_size = os.path.getsize(self.index_path) if os.path.exists(self.index_path) else -1
+        if index_size < 0 or index_size % OFFSET.size:
+            return False
+        if not index_size:
+            return self.size == 0
+        with open(self.index_path, "rb") as f:
+            f.seek(index_size - OFFSET.size)
+            last = OFFSET.unpack(f.read(OFFSET.size))[0]
+        return last + PREFIX.size <= self.size
+
+    def open_active(self):
+        """Segment cuối: đọc lại toàn bộ, cắt bỏ record ghi dở, dựng lại .idx"""
+        if not os.path.exists(self.data_path):
+            open(self.data_path, "wb").close()
+        offsets = self._scan()
+        self._write_index(offsets)
+        self.offsets = offsets
+        self.count = len(offsets)
+        self.size = os.path.getsize(self.data_path)
+        self.writer = open(self.data_path, "ab")
+        self.index_writer = open(self.index_path, "ab")
+        self.reader = open(self.data_path, "rb")
+
+    def open_readonly(self, last=False):
+        """
+        Chỉ đọc, không ghi / cắt / dựng lại file nào. Segment cuối (có thể đang được ghi dở)
+        và segment thiếu / hỏng .idx được quét trong RAM, record ghi dở ở cuối bị bỏ qua.
+        """
+        self.size = os.path.getsize(self.data_path)
+        if last or not self._index_fits():
+            self.offsets, self.size = self._scan_readonly()
+            self.count = len(self.offsets)
+        else:
+            self.count = os.path.getsize(self.index_path) // OFFSET.size
+            self._map_index()
+        self.reader = open(self.data_path, "rb")
+
+    def open_empty(self):
+        """Segment rỗng chỉ nằm trong RAM (log chỉ đọc không có / đã xóa hết dữ liệu)"""
+        self.offsets = array("Q")
+
+    @staticmethod
+    def _valid_records(data):
+        """Offset các record nguyên vẹn và vị trí kết thúc của record cuối"""
+        offsets = array("Q")
+        pos = 0
+        while pos + PREFIX.size <= len(data):
+            length, crc = PREFIX.unpack_from(data, pos)
+            end = pos + PREFIX.size + length
+            if end > len(data) or zlib.crc32(data[pos + PREFIX.size:end]) != crc:
+                break
+            offsets.append(pos)
+            pos = end
+        return offsets, pos
+
+    def _scan(self):
+        """Offset các record nguyên vẹn; cắt file ở record hỏng / ghi dở đầu tiên"""
+        with open(self.data_path, "r+b") as f:
+            data = f.read()
+            offsets, pos = self._valid_records(data)
+            if pos < len(data):
+                f.truncate(pos)
+        return offsets
+
+    def _scan_readonly(self):
+        with open(self.data_path, "rb") as f:
+            return self._valid_records(f.read())
+
+    def _write_index(self, offsets):
+        data = array("Q", offsets)
+        if sys.byteorder != "little":
+            data.byteswap()  # .idx luôn little-endian như OFFSET
+        with open(self.index_path, "wb") as f:
+            f.write(data.tobytes())
+
+    def _map_index(self):
+        if self.count:
+            with open(self.index_path, "rb") as f:
+                self.index_map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    # ---------- ghi ----------
+    def append(self, data):
+        offset = self.size
+        self.writer.write(data)
+        self.index_writer.write(OFFSET.pack(offset))
+        self.offsets.append(offset)
+        self.size += len(data)
+        self.count += 1
+
+    def flush(self):
+        if self.writer is not None:
+            self.writer.flush()
+            self.index_writer.flush()
+
+    def seal(self):
+        """Đóng segment đang ghi: từ giờ chỉ đọc, .idx được mmap"""
+        self.flush()
+        self.writer.close()
+        self.index_writer.close()
+        self.writer = self.index_writer = None
+        self.offsets = None
+        self._map_index()
+
+    # ---------- đọc ----------
+    def offset(self, position):
+        if self.offsets is not None:
+            return self.offsets[position]
+        return OFFSET.unpack_from(self.index_map, position * OFFSET.size)[0]
+
+    def read(self, position, count=1):
+        """
+        Đọc count record liên tiếp bắt đầu từ position (1 lần đọc file).
+        Record thiếu byte / sai CRC / không giải mã được coi như hết segment: trả về các record trước nó.
+        """
+        count = min(count, self.count - position)
+        if count <= 0:
+            return []
+        start = self.offset(position)
+        end = self.offset(position + count) if position + count < self.count else self.size
+        self.reader.seek(start)
+        data = self.reader.read(max(end - start, 0))
+        records = []
+        pos = 0
+        for _ in range(count):
+            if pos + PREFIX.size > len(data):
+                break
+            length, crc = PREFIX.unpack_from(data, pos)
+            body = data[pos + PREFIX.size:pos + PREFIX.size + length]
+            if len(body) < length or zlib.crc32(body) != crc:
+                break
+            try:
+                records.append(decode_body(body))
+            except (struct.error, ValueError):
+                break
+            pos += PREFIX.size + length
+        return records
+
+    def close(self):
+        if self.writer is not None:
+            self.flush()
+            self.writer.close()
+            self.index_writer.close()
+            self.writer = self.index_writer = None
+        if self.index_map is not None:
+            self.index_map.close()
+            self.index_map = None
+        if self.reader is not None:
+            self.reader.close()
+            self.reader = None
+
+    def delete(self):
+        self.close()
+        for path in (self.data_path, self.index_path):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+
+class CaptureLog:
+    """
+    Log request trên đĩa; mỗi record có seq tăng dần liên tục (qua cả các lần khởi động lại).
+    first_seq ≤ seq < next_seq là các record còn giữ. Gọi được từ nhiều thread.
+    """
+
+    def __init__(self, directory, segment_bytes=64 * 1024 * 1024, max_bytes=2 * 1024 * 1024 * 1024,
+                 read_only=False):
+        self.directory = directory
+        self.segment_bytes = segment_bytes
+        self.max_bytes = max_bytes  # None = không giới hạn
+        self.read_only = read_only  # chỉ xem: không append, không sửa file khi mở
+        self.lock = threading.RLock()
+        if not read_only:
+            os.makedirs(directory, exist_ok=True)
+
+        first_seqs = sorted(
+            int(name[:-4]) for name in os.listdir(directory)
+            if name.endswith(".seg") and name[:-4].isdigit()
+        )
+        self.segments = []
+        if read_only:
+            for index, first_seq in enumerate(first_seqs):
+                segment = Segment(directory, first_seq)
+                segment.open_readonly(last=index == len(first_seqs) - 1)
+                self.segments.append(segment)
+            if not self.segments:
+                self.segments.append(self._empty_segment(0))
+            return
+        for first_seq in first_seqs[:-1]:
+            segment = Segment(directory, first_seq)
+            segment.open_sealed()
+            self.segments.append(segment)
+        active = Segment(directory, first_seqs[-1] if first_seqs else 0)
+        active.open_active()
+        self.segments.append(active)
+        self._enforce_retention()
+
+    def _empty_segment(self, first_seq):
+        segment = Segment(self.directory, first_seq)
+        segment.open_empty()
+        return segment
+
+    @property
+    def first_seq(self):
+        return self.segments[0].first_seq
+
+    @property
+    def next_seq(self):
+        active = self.segments[-1]
+        return active.first_seq + active.count
+
+    def __len__(self):
+        with self.lock:
+            return self.next_seq - self.first_seq
+
+    def total_bytes(self):
+        with self.lock:
+            return sum(segment.size for segment in self.segments)
+
+    def append(self, record):
+        """Ghi 1 record (dict), trả về seq của nó"""
+        if self.read_only:
+            raise ValueError("capture log is opened read-only")
+        data = encode_record(record)
+        with self.lock:
+            active = self.segments[-1]
+            if active.count and active.size + len(data) > self.segment_bytes:
+                active.seal()
+                active = Segment(self.directory, self.next_seq)
+                active.open_active()
+                self.segments.append(active)
+                self._enforce_retention()
+            seq = self.next_seq
+            active.append(data)
+            return seq
+
+    def _enforce_retention(self):
+        if self.max_bytes is None or self.read_only:
+            return
+        while len(self.segments) > 1 and sum(s.size for s in self.segments) > self.max_bytes:
+            self.segments.pop(0).delete()
+
+    def _locate(self, seq):
+        index = bisect_right([segment.first_seq for segment in self.segments], seq) - 1
+        return self.segments[index] if index >= 0 else None
+
+    def read(self, seq):
+        """Record theo seq (None nếu đã bị xóa / chưa có)"""
+        if seq < self.first_seq:
+            return None  # read_range sẽ đọc từ first_seq
+        records = self.read_range(seq, 1)
+        return records[0] if records else None
+
+    def read_range(self, start, count):
+        """Tối đa count record liên tiếp từ seq start (đọc theo trang khi cuộn)"""
+        with self.lock:
+            start = max(start, self.first_seq)
+            end = min(start + count, self.next_seq)
+            if start >= end:
+                return []
+            self.segments[-1].flush()  # để reader thấy cả record vừa ghi
+            records = []
+            while start < end:
+                segment = self._locate(start)
+                position = start - segment.first_seq
+                wanted = min(end - start, segment.count - position)
+                chunk = segment.read(position, wanted)
+                records.extend(chunk)
+                start += len(chunk)
+                if not chunk or len(chunk) < wanted:
+                    break  # record hỏng / thiếu: dừng ở đây để seq của các record trả về vẫn liên tiếp
+            return records
+
+    def next_readable(self, seq):
+        """seq đầu tiên >= seq còn đọc được (bỏ qua phần hỏng / thiếu ở cuối 1 segment)"""
+        with self.lock:
+            seq = max(seq, self.first_seq)
+            segment = self._locate(seq)
+            if segment is None or seq < segment.first_seq + segment.count:
+                return seq
+            index = self.segments.index(segment)
+            return self.segments[index + 1].first_seq if index + 1 < len(self.segments) else self.next_seq
+
+    def flush(self):
+        with self.lock:
+            self.segments[-1].flush()
+
+    def clear(self):
+        """Xóa hết dữ liệu đã ghi (seq vẫn tăng tiếp); log chỉ đọc cũng xóa được (người dùng chọn xóa)"""
+        with self.lock:
+            next_seq = self.next_seq
+            for segment in self.segments:
+                segment.delete()
+            if self.read_only:
+                self.segments = [self._empty_segment(next_seq)]
+                return
+            active = Segment(self.directory, next_seq)
+            active.open_active()
+            self.segments = [active]
+
+    def close(self):
+        with self.lock:
+            for segment in self.segments:
+                segment.close()
+
+
+class CaptureLogWriter(threading.Thread):
+    """
+    Thread ghi CaptureLog: thread gọi (IO thread của Chromium, GUI thread) chỉ đưa record vào hàng đợi;
+    ghi file, đóng segment đầy / mở segment mới, xóa segment cũ đều diễn ra ở thread này.
+    Flush ra đĩa sau mỗi flush_interval giây có ghi, hoặc khi hàng đợi rảnh.
+    """
+
+    _FLUSH = object()
+    _STOP = object()
+
+    def __init__(self, capture_log, flush_interval=2.0, max_pending=100_000):
+        super().__init__(name="CaptureLogWriter", daemon=True)
+        self.capture_log = capture_log
+        self.flush_interval = flush_interval  # giây
+        self.queue = queue.Queue(max_pending)
+        self.dropped = 0  # record bị bỏ vì đĩa không theo kịp (hàng đợi đầy)
+        self.closed = False
+
+    def write(self, record, on_written=None):
+        """Đưa record vào hàng đợi, không chặn; on_written(seq) được gọi ở thread writer sau khi ghi"""
+        if self.closed:
+            return
+        try:
+            self.queue.put_nowait((record, on_written))
+        except queue.Full:
+            self.dropped += 1  # không được chặn IO thread của Chromium
+
+    def flush(self):
+        """Chờ tới khi mọi record đã đưa vào hàng đợi được ghi và flush"""
+        if self.closed or not self.is_alive():
+            return
+        done = threading.Event()
+        self.queue.put((self._FLUSH, done))
+        done.wait()
+
+    def close(self):
+        """Ghi nốt hàng đợi rồi dừng thread (không đóng capture_log)"""
+        if self.closed:
+            return
+        self.closed = True
+        if self.is_alive():
+            self.queue.put((self._STOP, None))
+            self.join()
+
+    def run(self):
+        last_flush = time.monotonic()
+        dirty = False
+        while True:
+            try:
+                record, extra = self.queue.get(timeout=self.flush_interval if dirty else None)
+            except queue.Empty:
+                self._flush()  # rảnh: flush phần đã ghi
+                dirty = False
+                continue
+            if record is self._STOP:
+                break
+            if record is self._FLUSH:
+                self._flush()
+                dirty = False
+                extra.set()
+                continue
+            try:
+                seq = self.capture_log.append(record)
+            except (OSError, ValueError) as e:
+                print("CaptureLogWriter: write failed:", e)
+                continue
+            if extra is not None:
+                extra(seq)
+            dirty = True
+            if time.monotonic() - last_flush >= self.flush_interval:
+                self._flush()
+                last_flush = time.monotonic()
+                dirty = False
+        if self.dropped:
+            print(f"CaptureLogWriter: {self.dropped} requests dropped (disk too slow)")
+        self._flush()
+
+    def _flush(self):
+        try:
+            self.capture_log.flush()
+        except (OSError, ValueError) as e:
+            print("CaptureLogWriter: flush failed:", e)
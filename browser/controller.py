@@ -6,6 +6,8 @@ class BrowserController:
         self.address_bar = address_bar
         self.btn_back = btn_back
         self.btn_next = btn_next
+        # URL người dùng tự gõ gần nhất, dùng để đếm typed_count trong history
+        self.last_typed_url = None
 
     def navigate_to_url(self):
         url = self.address_bar.text().strip()
@@ -16,6 +18,7 @@ class BrowserController:
                 url = "https://" + url
             else:
                 url = f"https://www.google.com/search?q={url}"
+        self.last_typed_url = url
         self.browser.setUrl(QUrl(url))
 
     #  Hàm cập nhật thanh url khi chuyển sang 1 trang khác
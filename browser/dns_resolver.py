@@ -0,0 +1,76 @@
+import socket
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+
+class DnsResolver:
+    """
+    Resolve hostname → IP ở thread pool, không chặn thread gọi (không phụ thuộc Qt).
+    - cache dùng chung theo host, có TTL (gethostbyname không trả TTL thật nên dùng TTL cố định),
+      lỗi cũng được cache nhưng ngắn hơn để không hỏi lại liên tục host không tồn tại
+    - nhiều request cùng host trong lúc đang resolve chỉ tạo 1 lần tra cứu, các callback chờ chung
+    """
+
+    def __init__(self, max_workers=4, ttl=300.0, negative_ttl=30.0, max_entries=2048):
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.max_entries = max_entries
+        self._cache = OrderedDict()  # host -> (ip, error, hết hạn lúc)
+        self._pending = {}           # host -> [callback] đang chờ kết quả
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="dns")
+        self._closed = False
+
+    def resolve(self, host, callback):
+        """
+        Trả về (ip, error) ngay nếu host còn trong cache.
+        Nếu không trả về None và gọi callback(ip, error) ở thread của pool khi có kết quả.
+        """
+        now = time.monotonic()
+        with self._lock:
+            entry = self._cache.get(host)
+            if entry is not None:
+                if entry[2] > now:
+                    self._cache.move_to_end(host)
+                    return entry[0], entry[1]
+                del self._cache[host]
+            if self._closed:
+                return None
+            waiting = self._pending.get(host)
+            if waiting is not None:
+                waiting.append(callback)
+                return None
+            self._pending[host] = [callback]
+            # submit trong lock: close() đặt _closed cũng trong lock nên không thể submit sau shutdown
+            self._executor.submit(self._lookup, host)
+        return None
+
+    def _lookup(self, host):
+        try:
+            ip, error = socket.gethostbyname(host), None
+        except (OSError, UnicodeError) as e:
+            ip, error = None, str(e)
+        expires = time.monotonic() + (self.ttl if error is None else self.negative_ttl)
+        with self._lock:
+            self._cache[host] = (ip, error, expires)
+            if len(self._cache) > self.max_entries:
+                self._cache.popitem(last=False)
+            callbacks = self._pending.pop(host, [])
+        for callback in callbacks:
+            try:
+                callback(ip, error)
+            except Exception:
+                pass  # 1 callback lỗi không được làm mất kết quả của các callback khác
+
+    def clear(self):
+        with self._lock:
+            self._cache.clear()
+
+    def close(self):
+        """Bỏ các lượt tra cứu chưa chạy, không chờ các lượt đang chạy"""
+        with self._lock:
+            self._closed = True
+            self._pending.clear()
+        self._executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,150 @@
+import time
+from array import array
+from collections import defaultdict
+
+FUZZY_PENALTY = 2.0  # điểm (dạng log) bị trừ cho mỗi lỗi gõ
+MAX_TERM_LENGTH = 64
+
+
+def max_edits(length):
+    """Số lỗi cho phép theo độ dài từ gõ (từ ngắn mà cho 2 lỗi thì khớp bừa)"""
+    if length < 3:
+        return 0
+    return 1 if length < 8 else 2
+
+
+def prefix_distance(query, term, limit):
+    """
+    Khoảng cách Damerau (optimal string alignment) nhỏ nhất giữa query và 1 prefix của term
+    ("githbu" ~ "github.com" = 1). Trả về limit + 1 nếu vượt limit (dừng sớm).
+    """
+    n = len(query)
+    previous = None
+    row = list(range(n + 1))  # cột j = 0: so query với prefix rỗng
+    best_prefix = row[n]
+    for j in range(1, len(term) + 1):
+        tj = term[j - 1]
+        current = [j] + [0] * n
+        for i in range(1, n + 1):
+            cost = 0 if query[i - 1] == tj else 1
+            value = min(row[i] + 1, current[i - 1] + 1, row[i - 1] + cost)
+            if (previous is not None and i > 1 and query[i - 1] == term[j - 2]
+                    and query[i - 2] == tj):
+                value = min(value, previous[i - 2] + 1)  # đảo 2 ký tự liền nhau
+            current[i] = value
+        best_prefix = min(best_prefix, current[n])
+        if best_prefix == 0 or min(current) > limit and min(row) > limit:
+            break  # khớp hẳn, hoặc mọi đường đi đã vượt limit
+        previous, row = row, current
+    return best_prefix if best_prefix <= limit else limit + 1
+
+
+def query_trigrams(query):
+    """Trigram của từ đang gõ: có đánh dấu đầu từ nhưng không có cuối từ (user gõ dở)"""
+    padded = "$" + query
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def term_trigrams(term):
+    padded = "$" + term + "$"
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class TrigramIndex:
+    """
+    Index trigram trên các "term" (hostname, từ trong title) cho gợi ý chịu lỗi gõ.
+    - posting list lưu id của term (array 4 byte/phần tử), không lưu URL → nhỏ gọn
+    - sinh ứng viên theo bổ đề q-gram: mỗi lỗi gõ phá tối đa 4 trigram (đảo 2 ký tự liền nhau),
+      nên term cách query ≤ k lỗi phải chung ít nhất (số trigram - 4k) trigram với query
+    - kiểm tra ứng viên bằng khoảng cách Damerau có giới hạn, dừng khi hết latency budget
+    """
+
+    def __init__(self, budget_ms=5.0):
+        self.budget_ms = budget_ms
+        self.term_ids = {}                 # term -> id
+        self.terms = []                    # id -> term
+        self.term_urls = []                # id -> set URL (rỗng = term đã chết)
+        self.postings = defaultdict(lambda: array("I"))
+        self.dead_terms = 0
+
+    def add(self, term, url):
+        term = term[:MAX_TERM_LENGTH]
+        term_id = self.term_ids.get(term)
+        if term_id is None:
+            term_id = len(self.terms)
+            self.term_ids[term] = term_id
+            self.terms.append(term)
+            self.term_urls.append(set())
+            for trigram in term_trigrams(term):
+                self.postings[trigram].append(term_id)
+        elif not self.term_urls[term_id]:
+            self.dead_terms -= 1  # term sống lại, posting vẫn còn
+        self.term_urls[term_id].add(url)
+
+    def remove(self, term, url):
+        term_id = self.term_ids.get(term[:MAX_TERM_LENGTH])
+        if term_id is None:
+            return
+        urls = self.term_urls[term_id]
+        if url in urls:
+            urls.discard(url)
+            if not urls:
+                self.dead_terms += 1
+                if self.dead_terms > 1000 and self.dead_terms > len(self.terms) // 2:
+                    self.compact()
+
+    def compact(self):
+        """Dựng lại posting list, bỏ các term không còn URL nào"""
+        live = [(term, urls) for term, urls in zip(self.terms, self.term_urls) if urls]
+        self.term_ids, self.terms, self.term_urls = {}, [], []
+        self.postings = defaultdict(lambda: array("I"))
+        self.dead_terms = 0
+        for term, urls in live:
+            for url in urls:
+                self.add(term, url)
+
+    def clear(self):
+        self.term_ids, self.terms, self.term_urls = {}, [], []
+        self.postings = defaultdict(lambda: array("I"))
+        self.dead_terms = 0
+
+    def search(self, query, limit=50):
+        """
+        Các term gần đúng với query: [(distance, term_id)] khoảng cách tăng dần.
+        Dừng khi hết budget_ms và trả về những gì đã kiểm tra được.
+        """
+        query = query[:MAX_TERM_LENGTH]
+        k = max_edits(len(query))
+        if k == 0:
+            return []
+        deadline = time.perf_counter() + self.budget_ms / 1000.0
+
+        trigrams = query_trigrams(query)
+        lists = sorted((self.postings[t] for t in trigrams if t in self.postings), key=len)
+        threshold = len(trigrams) - 4 * k
+        if threshold < 1:
+            # query quá ngắn so với số lỗi cho phép: chỉ lọc bằng 2 trigram ít phổ biến nhất
+            threshold, lists = 1, lists[:2]
+        # bỏ bớt các posting dài nhất (trigram phổ biến như "com"), hạ ngưỡng tương ứng
+        while len(lists) > 1 and threshold > 1 and len(lists[-1]) > 4 * len(lists[0]) + 1000:
+            lists.pop()
+            threshold -= 1
+
+        counts = defaultdict(int)
+        for posting in lists:
+            for term_id in posting:
+                counts[term_id] += 1
+        candidates = [term_id for term_id, count in counts.items()
+                      if count >= threshold and self.term_urls[term_id]]
+        # term chung nhiều trigram nhất kiểm tra trước (dễ khớp nhất nếu bị cắt bởi budget)
+        candidates.sort(key=lambda term_id: counts[term_id], reverse=True)
+
+        matches = []
+        for checked, term_id in enumerate(candidates):
+            if checked % 64 == 0 and time.perf_counter() > deadline:
+                break
+            distance = prefix_distance(query, self.terms[term_id], k)
+            if distance <= k:
+                matches.append((distance, term_id))
+        matches.sort()
+        return matches[:limit]
@@ -1,37 +1,144 @@
-import json
+import os
+import struct
+import time
 from PyQt5.QtCore import QObject, pyqtSignal, QUrl
-from PyQt5.QtNetwork import QNetworkAccessManager, QNetworkRequest
+from PyQt5.QtNetwork import QNetworkAccessManager, QNetworkRequest, QNetworkReply
+
+from browser.offline_suggest import OfflineSuggestFile, default_offline_path
+from browser.suggest_cache import SuggestCache, parse_response, suggest_url
+
+DEFAULT_ENDPOINT = "https://suggestqueries.google.com/complete/search?client=firefox"
+
+
+def default_cache_path():
+    """data/suggest_cache.json cùng cấp với thư mục browser"""
+    project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    return os.path.join(project_root, "data", "suggest_cache.json")
 
 
 class GoogleSuggestProvider(QObject):
-    suggestions_ready = pyqtSignal(list)
+    suggestions_ready = pyqtSignal(str, list)  # keyword, suggestions
+    LATENCY_SMOOTHING = 0.3  # hệ số EWMA cho độ trễ server
 
-    def __init__(self):
+    def __init__(self, endpoint=DEFAULT_ENDPOINT, cache=None):
         super().__init__()
+        # endpoint trả về JSON dạng ["query", ["gợi ý 1", ...]]; đổi được để trỏ tới server giả khi test
+        self.endpoint = endpoint
+        self.cache = cache if cache is not None else SuggestCache(path=default_cache_path())
         self.manager = QNetworkAccessManager()
         self.manager.finished.connect(self.on_finished)
 
+        # chỉ request mới nhất được phép hiện kết quả; request cũ hơn bị abort
+        self.sequence = 0
+        self.active_reply = None
+        self.latency_ms = None  # EWMA độ trễ các request thành công
+
+    def build_url(self, keyword):
+        return QUrl(suggest_url(self.endpoint, keyword))
+
+    def cached(self, keyword):
+        """Gợi ý có sẵn trong cache cho đúng keyword (None nếu phải hỏi server)"""
+        return self.cache.get(keyword)
+
     def fetch(self, keyword):
         if not keyword or len(keyword) < 2:
             return
 
-        url = QUrl(
-            f"https://suggestqueries.google.com/complete/search"
-            f"?client=firefox&q={keyword}"
-        )
-        request = QNetworkRequest(url)
-        self.manager.get(request)
+        # cache hit: trả ngay, không gửi request
+        suggestions = self.cache.get(keyword)
+        if suggestions is not None:
+            self.cancel()
+            self.suggestions_ready.emit(keyword, suggestions)
+            return
+
+        # có prefix ngắn hơn trong cache: hiện tạm kết quả đã lọc trong lúc chờ server
+        partial = self.cache.get_prefix(keyword)
+        if partial:
+            self.suggestions_ready.emit(keyword, partial)
+
+        self.cancel()
+        self.sequence += 1
+        request = QNetworkRequest(self.build_url(keyword))
+        reply = self.manager.get(request)
+        reply.setProperty("keyword", keyword)
+        reply.setProperty("sequence", self.sequence)
+        reply.setProperty("sent_at", time.monotonic())
+        self.active_reply = reply
+
+    def cancel(self):
+        """Abort request đang chờ (kết quả của nó đã lỗi thời)"""
+        if self.active_reply is not None and self.active_reply.isRunning():
+            self.active_reply.abort()
+        self.active_reply = None
 
     def on_finished(self, reply):
+        reply.deleteLater()
+        if reply is self.active_reply:
+            self.active_reply = None
+        if reply.error() == QNetworkReply.OperationCanceledError:
+            return  # bị abort vì đã có request mới hơn
+        latest = reply.property("sequence") == self.sequence
+        keyword = reply.property("keyword")
         if reply.error():
-            self.suggestions_ready.emit([])
+            if latest:
+                self.suggestions_ready.emit(keyword, [])
             return
 
-        data = reply.readAll().data()
-        try:
-            json_data = json.loads(data)
-            suggestions = json_data[1]
-        except Exception:
+        elapsed_ms = (time.monotonic() - reply.property("sent_at")) * 1000
+        if self.latency_ms is None:
+            self.latency_ms = elapsed_ms
+        else:
+            self.latency_ms += self.LATENCY_SMOOTHING * (elapsed_ms - self.latency_ms)
+
+        parsed = parse_response(reply.readAll().data())
+        if parsed is None:
             suggestions = []
+        else:
+            suggestions = parsed[1]
+            self.cache.put(keyword or parsed[0], suggestions)
+
+        # response về trễ hơn request mới hơn: vẫn giữ trong cache nhưng không hiện
+        if latest:
+            self.suggestions_ready.emit(keyword, suggestions)
 
-        self.suggestions_ready.emit(suggestions)
+    def save_cache(self):
+        self.cache.save()
+
+
+class OfflineSuggestProvider(QObject):
+    """
+    Cùng interface với GoogleSuggestProvider nhưng đọc từ file gợi ý offline (mmap),
+    dùng khi có data/suggestions.sug (xem browser/offline_suggest.py)
+    """
+    suggestions_ready = pyqtSignal(str, list)  # keyword, suggestions
+
+    def __init__(self, path):
+        super().__init__()
+        self.file = OfflineSuggestFile(path)
+        self.latency_ms = 0  # tra file mất vài chục µs, debounce không cần cộng độ trễ
+
+    def cached(self, keyword):
+        """Luôn trả lời ngay, không bao giờ phải chờ"""
+        if not keyword or len(keyword) < 2:
+            return []
+        return self.file.query(keyword)
+
+    def fetch(self, keyword):
+        self.suggestions_ready.emit(keyword, self.cached(keyword))
+
+    def cancel(self):
+        pass
+
+    def save_cache(self):
+        pass
+
+
+def create_suggest_provider():
+    """File gợi ý offline nếu đã build, không thì hỏi Google"""
+    path = default_offline_path()
+    if os.path.exists(path):
+        try:
+            return OfflineSuggestProvider(path)
+        except (OSError, ValueError, struct.error):
+            pass  # file hỏng / sai định dạng: quay về Google
+    return GoogleSuggestProvider()
@@ -0,0 +1,182 @@
+import os
+import re
+from collections import OrderedDict
+
+
+class HistoryArchive:
+    """
+    Kho lưu trữ history cũ: mỗi tháng 1 file SQLite (history-YYYY-MM.db) nằm cạnh
+    MiniBrowser.db. File archive được ATTACH vào connection chính khi cần đọc,
+    nên vẫn truy vấn được bằng SQL bình thường mà không làm phình DB "nóng".
+    """
+    FILE_PATTERN = re.compile(r"^history-(\d{4}-\d{2})\.db$")
+
+    def __init__(self, conn, archive_dir, max_attached=4):
+        self.conn = conn
+        self.archive_dir = archive_dir
+        self.max_attached = max_attached  # SQLite mặc định chỉ cho ATTACH tối đa 10 DB
+        self.attached = OrderedDict()     # month -> schema name (LRU)
+
+    # ---------- file / attach ----------
+    def path_for(self, month):
+        return os.path.join(self.archive_dir, f"history-{month}.db")
+
+    def months(self):
+        """Danh sách tháng đã có file archive, mới nhất trước"""
+        if not os.path.isdir(self.archive_dir):
+            return []
+        months = []
+        for name in os.listdir(self.archive_dir):
+            match = self.FILE_PATTERN.match(name)
+            if match:
+                months.append(match.group(1))
+        return sorted(months, reverse=True)
+
+    def attach(self, month):
+        """ATTACH file archive của tháng (tạo nếu chưa có), trả về tên schema"""
+        if month in self.attached:
+            self.attached.move_to_end(month)
+            return self.attached[month]
+
+        while len(self.attached) >= self.max_attached:
+            _, old_schema = self.attached.popitem(last=False)
+            self.conn.execute(f"DETACH DATABASE {old_schema}")
+
+        os.makedirs(self.archive_dir, exist_ok=True)
+        schema = "archive_" + month.replace("-", "_")
+        self.conn.execute(f"ATTACH DATABASE ? AS {schema}", (self.path_for(month),))
+        # bản ghi archive tự chứa đủ url/title để không phụ thuộc bảng urls
+        self.conn.executescript(f"""
+        CREATE TABLE IF NOT EXISTS {schema}.visits (
+            id INTEGER PRIMARY KEY,
+            url TEXT NOT NULL,
+            title TEXT NOT NULL DEFAULT '',
+            host TEXT NOT NULL DEFAULT '',
+            timestamp DATETIME NOT NULL,
+            typed INTEGER NOT NULL DEFAULT 0
+        );
+        CREATE INDEX IF NOT EXISTS {schema}.idx_archive_timestamp ON visits(timestamp, id);
+        CREATE INDEX IF NOT EXISTS {schema}.idx_archive_host ON visits(host, timestamp, id);
+        """)
+        self.attached[month] = schema
+        return schema
+
+    def detach_all(self):
+        for schema in self.attached.values():
+            self.conn.execute(f"DETACH DATABASE {schema}")
+        self.attached.clear()
+
+    @staticmethod
+    def month_range(month):
+        """Khoảng [đầu tháng, đầu tháng sau) dạng chuỗi timestamp"""
+        year, mon = int(month[:4]), int(month[5:7])
+        next_year, next_mon = (year + 1, 1) if mon == 12 else (year, mon + 1)
+        return f"{month}-01 00:00:00", f"{next_year:04d}-{next_mon:02d}-01 00:00:00"
+
+    # ---------- retention ----------
+    def archive_batch(self, cutoff, batch_size=2000):
+        """
+        Chuyển tối đa batch_size visits cũ nhất (timestamp < cutoff) sang file archive theo tháng;
+        trả về số visits đã chuyển (0 = hết). Bảng urls giữ nguyên (số lượt truy cập, frecency vẫn dùng cho gợi ý).
+        """
+        rows = self.conn.execute("""
+        SELECT v.id, u.url, u.title, u.host, v.timestamp, v.typed
+        FROM visits v JOIN urls u ON u.id = v.url_id
+        WHERE v.timestamp < ?
+        ORDER BY v.timestamp, v.id
+        LIMIT ?
+        """, (cutoff, batch_size)).fetchall()
+        by_month = OrderedDict()
+        for row in rows:
+            month = row[4][:7]
+            if month not in by_month and len(by_month) >= self.max_attached:
+                break  # ATTACH không chạy được trong transaction: tháng còn lại để lô sau
+            by_month.setdefault(month, []).append(row)
+        schemas = {month: self.attach(month) for month in by_month}
+        moved = [row for month_rows in by_month.values() for row in month_rows]
+        # ghi archive và xóa ở DB chính trong 1 transaction
+        with self.conn:
+            for month, month_rows in by_month.items():
+                self.conn.executemany(f"""
+                INSERT OR IGNORE INTO {schemas[month]}.visits (id, url, title, host, timestamp, typed)
+                VALUES (?, ?, ?, ?, ?, ?)
+                """, month_rows)
+            self.conn.executemany("DELETE FROM main.visits WHERE id = ?", [(row[0],) for row in moved])
+        return len(moved)
+
+    # ---------- đọc / xóa ----------
+    def query_page(self, limit, before=None, since=None, until=None, host=None, url_filter=None):
+        """
+        Giống HistoryManager.get_page nhưng đọc từ các file archive, tháng mới nhất trước.
+        url_filter: (subquery id trong main.urls, params) — cùng luật khớp keyword với DB chính
+        """
+        rows = []
+        for month in self.months():
+            if len(rows) >= limit:
+                break
+            start, end = self.month_range(month)
+            if since is not None and end <= since:
+                break  # các tháng sau còn cũ hơn
+            if until is not None and start >= until:
+                continue
+            if before is not None and start > before[0]:
+                continue
+
+            conditions = []
+            params = []
+            if host:
+                conditions.append("host = ?")
+                params.append(host.lower())
+            if since is not None:
+                conditions.append("timestamp >= ?")
+                params.append(since)
+            if until is not None:
+                conditions.append("timestamp < ?")
+                params.append(until)
+            if url_filter is not None:
+                subquery, filter_params = url_filter
+                conditions.append(f"url IN (SELECT url FROM main.urls WHERE id IN ({subquery}))")
+                params.extend(filter_params)
+            if before is not None:
+                conditions.append("(timestamp, id) < (?, ?)")
+                params.extend(before)
+
+            # DB chính ở chế độ WAL nên commit qua nhiều file không nguyên tử: visit còn ở
+            # DB chính (bị ngắt giữa lúc chuyển) thì chỉ hiện bản ở DB chính
+            conditions.append("NOT EXISTS (SELECT 1 FROM main.visits hot WHERE hot.id = archived.id)")
+
+            schema = self.attach(month)
+            where = "WHERE " + " AND ".join(conditions)
+            params.append(limit - len(rows))
+            rows.extend(self.conn.execute(f"""
+            SELECT id, title, url, timestamp FROM {schema}.visits archived
+            {where}
+            ORDER BY timestamp DESC, id DESC
+            LIMIT ?
+            """, params).fetchall())
+        return rows
+
+    def delete(self, entry_ids):
+        """Xóa các visits (theo id) khỏi các file archive; trả về list (url, timestamp, typed) đã xóa"""
+        remaining = set(entry_ids)
+        removed = []
+        for month in self.months():
+            if not remaining:
+                break
+            schema = self.attach(month)
+            with self.conn:
+                for entry_id in list(remaining):
+                    row = self.conn.execute(
+                        f"SELECT url, timestamp, typed FROM {schema}.visits WHERE id = ?", (entry_id,)
+                    ).fetchone()
+                    if row is not None:
+                        self.conn.execute(f"DELETE FROM {schema}.visits WHERE id = ?", (entry_id,))
+                        remaining.discard(entry_id)
+                        removed.append(row)
+        return removed
+
+    def clear(self):
+        """Xóa toàn bộ file archive"""
+        self.detach_all()
+        for month in self.months():
+            os.remove(self.path_for(month))
@@ -1,69 +1,587 @@
+import math
 import os
+import re
 import sqlite3
+import threading
+import urllib.parse
 from datetime import datetime, timezone, timedelta
+from functools import lru_cache
+from browser.history_writer import HistoryWriter
+from browser.history_archive import HistoryArchive
+from browser.storage import StorageEngine
+
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+# Frecency = log(Σ weight * 2^((t - EPOCH) / HALF_LIFE)) trên mọi lượt truy cập.
+# Lưu ở dạng log so với 1 mốc cố định nên điểm không cần "giảm dần" theo thời gian:
+# so sánh 2 URL ở bất kỳ thời điểm nào cũng cho cùng thứ tự, và mỗi lượt truy cập
+# mới chỉ cần cộng thêm 1 số hạng (O(1)).
+FRECENCY_EPOCH = datetime(2020, 1, 1, tzinfo=timezone.utc)
+FRECENCY_HALF_LIFE_DAYS = 30.0
+TYPED_VISIT_WEIGHT = 2.0
+
+# visits cũ hơn số ngày này được chuyển sang file archive theo tháng
+DEFAULT_RETENTION_DAYS = 90
+# số visits chuyển sang archive trong 1 transaction (giữ lock DB ngắn)
+ARCHIVE_BATCH_SIZE = 2000
+
+
+def url_host(url):
+    """Lấy hostname (chữ thường) từ URL, chuỗi rỗng nếu không có"""
+    try:
+        return urllib.parse.urlsplit(url).hostname or ""
+    except ValueError:
+        return ""
+
+
+def normalize_url(url):
+    """
+    Dạng so sánh của URL: bỏ http/https, "www.", cổng mặc định, fragment và "/" cuối path
+    (để URL người dùng gõ khớp với URL trang thực sự tải xong, vd. sau redirect sang https)
+    """
+    try:
+        parts = urllib.parse.urlsplit(url.strip())
+        host = (parts.hostname or "").lower()
+        port = parts.port
+    except ValueError:
+        return url.strip().lower()
+    if host.startswith("www."):
+        host = host[4:]
+    if port and port not in (80, 443):
+        host = f"{host}:{port}"
+    path = parts.path.rstrip("/")
+    return f"{host}{path}?{parts.query}" if parts.query else f"{host}{path}"
+
+
+def visit_score(timestamp, typed=False):
+    """Điểm (dạng log) của 1 lượt truy cập"""
+    dt = datetime.strptime(timestamp, TIMESTAMP_FORMAT).replace(tzinfo=timezone.utc)
+    days = (dt - FRECENCY_EPOCH).total_seconds() / 86400.0
+    weight = TYPED_VISIT_WEIGHT if typed else 1.0
+    return math.log(weight) + days * math.log(2) / FRECENCY_HALF_LIFE_DAYS
+
+
+def frecency_add(frecency, timestamp, typed=False):
+    """Cộng thêm 1 lượt truy cập vào frecency hiện có (log-sum-exp)"""
+    score = visit_score(timestamp, typed)
+    if frecency is None:
+        return score
+    high, low = max(frecency, score), min(frecency, score)
+    return high + math.log1p(math.exp(low - high))
+
+
+def frecency_remove(frecency, timestamp, typed=False):
+    """Bỏ 1 lượt truy cập khỏi frecency; None nếu không còn gì (hoặc sai số làm tròn)"""
+    diff = visit_score(timestamp, typed) - frecency
+    if diff >= -1e-9:
+        return None
+    return frecency + math.log1p(-math.exp(diff))
+
+
+def record_visits(conn, visits):
+    """
+    Ghi 1 lô lượt truy cập (title, url, host, timestamp, typed):
+    upsert vào urls (cập nhật count/frecency tăng dần) rồi thêm dòng visits
+    """
+    for title, url, host, timestamp, typed in visits:
+        row = conn.execute("SELECT id, frecency FROM urls WHERE url = ?", (url,)).fetchone()
+        if row is None:
+            cursor = conn.execute(
+                """
+                INSERT INTO urls (url, title, host, visit_count, typed_count, last_visit, frecency)
+                VALUES (?, ?, ?, 1, ?, ?, ?)
+                """,
+                (url, title, host, int(typed), timestamp, frecency_add(None, timestamp, typed)),
+            )
+            url_id = cursor.lastrowid
+        else:
+            url_id, frecency = row
+            conn.execute(
+                """
+                UPDATE urls
+                SET title = CASE WHEN ? != '' THEN ? ELSE title END,
+                    visit_count = visit_count + 1,
+                    typed_count = typed_count + ?,
+                    last_visit = MAX(last_visit, ?),
+                    frecency = ?
+                WHERE id = ?
+                """,
+                (title, title, int(typed), timestamp,
+                 frecency_add(frecency, timestamp, typed), url_id),
+            )
+        conn.execute(
+            "INSERT INTO visits (url_id, timestamp, typed) VALUES (?, ?, ?)",
+            (url_id, timestamp, int(typed)),
+        )
+
 
 class HistoryManager:
-    def __init__(self, db_path=None):
-        if db_path is None:
-            # lấy file MiniBrowser.db trong folder data cùng cấp với Browser
-            project_root = os.path.dirname(os.path.dirname(__file__))  # lên 1 cấp từ Browser
-            db_path = os.path.join(project_root, "data", "MiniBrowser.db")
-        self.conn = sqlite3.connect(db_path)
-        self.create_table()
-
-    def create_table(self):
-        query = """
-        CREATE TABLE IF NOT EXISTS history (
+    def __init__(self, db_path=None, async_writes=True,
+                 retention_days=DEFAULT_RETENTION_DAYS, archive_dir=None, storage=None):
+        if storage is None:
+            # mặc định: engine dùng chung cho data/MiniBrowser.db
+            storage = StorageEngine.get(db_path)
+        if archive_dir is None:
+            archive_dir = os.path.join(os.path.dirname(storage.db_path), "history_archive")
+        self.storage = storage
+        self.db_path = storage.db_path
+        self.retention_days = retention_days
+        self.conn = storage.conn
+        self.archive = HistoryArchive(self.conn, archive_dir)
+        # dọn history chạy ở thread nền; lock giữ trong từng lô để xóa / clear không đụng lô đang chuyển
+        self.maintenance_thread = None
+        self.maintenance_stop = threading.Event()
+        self.maintenance_lock = threading.Lock()
+        # callback(event, *args) khi history thay đổi (vd. index gợi ý ở thanh địa chỉ)
+        self.listeners = []
+
+        # mỗi bước idempotent; DB cũ (chưa có schema_versions) chạy lại an toàn
+        storage.migrate("history", [
+            self.create_table,
+            self.migrate_legacy_history,
+            self.create_fts_index,
+        ])
+        self.fts_enabled = self.conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE name = 'urls_fts'"
+        ).fetchone() is not None
+
+        # ghi history qua thread nền để GUI thread không phải chờ fsync
+        self.writer = None
+        if async_writes:
+            self.writer = HistoryWriter(storage, record_visits, on_error=self._on_write_error)
+            self.writer.start()
+
+    def create_table(self, conn):
+        """
+        Schema chuẩn hóa:
+        - urls: mỗi URL 1 dòng, kèm số lượt truy cập và frecency tính sẵn
+        - visits: mỗi lượt truy cập 1 dòng nhỏ trỏ về urls
+        """
+        conn.executescript("""
+        CREATE TABLE IF NOT EXISTS urls (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
-            title TEXT NOT NULL,
-            url TEXT NOT NULL,
-            timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
-        )
+            url TEXT NOT NULL UNIQUE,
+            title TEXT NOT NULL DEFAULT '',
+            host TEXT NOT NULL DEFAULT '',
+            visit_count INTEGER NOT NULL DEFAULT 0,
+            typed_count INTEGER NOT NULL DEFAULT 0,
+            last_visit DATETIME,
+            frecency REAL NOT NULL DEFAULT 0
+        );
+
+        CREATE TABLE IF NOT EXISTS visits (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            url_id INTEGER NOT NULL REFERENCES urls(id),
+            timestamp DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+            typed INTEGER NOT NULL DEFAULT 0
+        );
+
+        -- xếp hạng gợi ý = duyệt index frecency, không cần GROUP BY
+        CREATE INDEX IF NOT EXISTS idx_urls_frecency ON urls(frecency DESC);
+        CREATE INDEX IF NOT EXISTS idx_urls_host ON urls(host);
+        -- phân trang keyset cho cửa sổ History
+        CREATE INDEX IF NOT EXISTS idx_visits_timestamp ON visits(timestamp, id);
+        CREATE INDEX IF NOT EXISTS idx_visits_url ON visits(url_id, timestamp);
+        """)
+        conn.commit()
+
+    def migrate_legacy_history(self, conn):
+        """Chuyển dữ liệu từ bảng history cũ (1 dòng / lượt load) sang urls + visits"""
+        legacy = conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'history'"
+        ).fetchone()
+        if legacy is None:
+            return
+
+        with conn:
+            # bare column title đi kèm MAX(timestamp) → title của lần truy cập mới nhất
+            conn.execute("""
+            INSERT OR IGNORE INTO urls (url, title, visit_count, last_visit)
+            SELECT url, title, COUNT(*), MAX(timestamp) FROM history GROUP BY url
+            """)
+            # giữ nguyên id cũ cho visits
+            conn.execute("""
+            INSERT INTO visits (id, url_id, timestamp)
+            SELECT h.id, u.id, h.timestamp FROM history h JOIN urls u ON u.url = h.url
+            """)
+
+            # host + frecency tính bằng Python, duyệt visits theo từng url
+            updates = []
+            current_id, current_url, frecency = None, None, None
+            rows = conn.execute("""
+            SELECT v.url_id, u.url, v.timestamp FROM visits v
+            JOIN urls u ON u.id = v.url_id ORDER BY v.url_id
+            """)
+            for url_id, url, timestamp in rows:
+                if url_id != current_id:
+                    if current_id is not None:
+                        updates.append((url_host(current_url), frecency, current_id))
+                    current_id, current_url, frecency = url_id, url, None
+                frecency = frecency_add(frecency, timestamp)
+            if current_id is not None:
+                updates.append((url_host(current_url), frecency, current_id))
+            conn.executemany("UPDATE urls SET host = ?, frecency = ? WHERE id = ?", updates)
+
+            conn.execute("DROP TABLE IF EXISTS history_fts")
+            conn.execute("DROP TABLE history")
+
+        # file nhỏ lại đáng kể sau khi bỏ title/url lặp lại ở mỗi dòng
+        conn.execute("PRAGMA incremental_vacuum").fetchall()
+
+    def create_fts_index(self, conn):
+        """Tạo bảng FTS5 (shadow index) cho title/url, đồng bộ bằng trigger"""
+        exists = conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'urls_fts'"
+        ).fetchone() is not None
+
+        try:
+            # external content: FTS chỉ lưu token, dữ liệu gốc vẫn nằm ở urls
+            conn.executescript("""
+            CREATE VIRTUAL TABLE IF NOT EXISTS urls_fts USING fts5(
+                title, url,
+                content='urls', content_rowid='id',
+                tokenize='unicode61 remove_diacritics 2'
+            );
+
+            CREATE TRIGGER IF NOT EXISTS urls_fts_ai AFTER INSERT ON urls BEGIN
+                INSERT INTO urls_fts(rowid, title, url) VALUES (new.id, new.title, new.url);
+            END;
+
+            CREATE TRIGGER IF NOT EXISTS urls_fts_ad AFTER DELETE ON urls BEGIN
+                INSERT INTO urls_fts(urls_fts, rowid, title, url)
+                VALUES ('delete', old.id, old.title, old.url);
+            END;
+
+            CREATE TRIGGER IF NOT EXISTS urls_fts_au AFTER UPDATE OF title, url ON urls BEGIN
+                INSERT INTO urls_fts(urls_fts, rowid, title, url)
+                VALUES ('delete', old.id, old.title, old.url);
+                INSERT INTO urls_fts(rowid, title, url) VALUES (new.id, new.title, new.url);
+            END;
+            """)
+        except sqlite3.OperationalError:
+            # SQLite build không có FTS5 → quay về LIKE
+            return
+
+        if not exists:
+            # Backfill 1 lần cho các file MiniBrowser.db cũ
+            conn.execute("INSERT INTO urls_fts(urls_fts) VALUES ('rebuild')")
+        conn.commit()
+
+    def add_listener(self, callback):
         """
-        self.conn.execute(query)
-        self.conn.commit()
+        Đăng ký callback(event, *args):
+        ("visit", title, url, timestamp, typed), ("url_changed", url, title, frecency | None), ("cleared",),
+        ("write_failed", error, số visits) — gọi từ thread writer,
+        ("maintenance_failed", error) — gọi từ thread dọn history
+        """
+        self.listeners.append(callback)
+
+    def _notify(self, event, *args):
+        for callback in self.listeners:
+            callback(event, *args)
 
-    def add_entry(self, title, url):
-        """Thêm 1 entry vào lịch sử"""
-        query = "INSERT INTO history (title, url) VALUES (?, ?)"
-        self.conn.execute(query, (title, url))
-        self.conn.commit()
+    def _notify_urls_changed(self, url_rows):
+        """Báo frecency mới (None nếu đã bị xóa) cho các URL (id, url) vừa bị bớt visits"""
+        for url_id, url in url_rows:
+            row = self.conn.execute("SELECT title, frecency FROM urls WHERE id = ?", (url_id,)).fetchone()
+            self._notify("url_changed", url, *(row if row else ("", None)))
+
+    def add_entry(self, title, url, typed=False):
+        """Thêm 1 entry vào lịch sử (typed=True nếu người dùng tự gõ URL)"""
+        # timestamp lấy lúc truy cập (UTC, cùng định dạng CURRENT_TIMESTAMP), không phải lúc commit
+        timestamp = datetime.now(timezone.utc).strftime(TIMESTAMP_FORMAT)
+        visit = (title, url, url_host(url), timestamp, bool(typed))
+        self._notify("visit", title, url, timestamp, bool(typed))
+        if self.writer is not None and self.writer.is_alive():
+            self.writer.enqueue(visit)
+            return
+
+        with self.conn:
+            record_visits(self.conn, [visit])
+
+    def flush(self):
+        """Chờ writer commit hết các entry đang nằm trong hàng đợi (tối đa HistoryWriter.FLUSH_TIMEOUT)"""
+        if self.writer is not None:
+            self.writer.flush()
+
+    def _on_write_error(self, error, visits):
+        """Writer bỏ cuộc sau nhiều lần thử (gọi từ thread writer); các visits được ghi lại khi close"""
+        self._notify("write_failed", str(error), len(visits))
+
+    def close(self):
+        """Flush hàng đợi và nhả các DB archive (connection chính do StorageEngine đóng)"""
+        self.stop_maintenance()
+        if self.writer is not None:
+            self.writer.close()
+            failed, self.writer = self.writer.failed, None
+            if failed:
+                # lần thử cuối trên connection chính để không mất lượt truy cập nào
+                try:
+                    with self.conn:
+                        record_visits(self.conn, failed)
+                except sqlite3.Error as e:
+                    print(f"HistoryManager: {len(failed)} visits could not be saved:", e)
+        self.archive.detach_all()
 
     def get_all(self):
+        self.flush()
         cursor = self.conn.cursor()
-        cursor.execute("SELECT id, title, url, timestamp FROM history ORDER BY timestamp DESC")
+        cursor.execute("""
+        SELECT v.id, u.title, u.url, v.timestamp
+        FROM visits v JOIN urls u ON u.id = v.url_id
+        ORDER BY v.timestamp DESC
+        """)
         rows = cursor.fetchall()
 
         result = []
         for id_, title, url, ts in rows:
-            dt_utc = datetime.strptime(ts, "%Y-%m-%d %H:%M:%S").replace(tzinfo=timezone.utc)
-            dt_local = dt_utc.astimezone()
-            result.append((id_, title, url, dt_local))
+            result.append((id_, title, url, self.to_local_time(ts)))
         return result
 
+    def get_page(self, limit=100, before=None, since=None, until=None, host=None, keyword=None):
+        """
+        Lấy tối đa `limit` entry mới nhất (phân trang keyset, không dùng OFFSET)
+        - before: (timestamp, id) của dòng cuối trang trước
+        - since/until: datetime (có tzinfo hoặc local) giới hạn khoảng thời gian
+        - host: chỉ lấy entry của hostname này
+        - keyword: chỉ lấy entry có title/url khớp (prefix match qua FTS5)
+        Trả về list (id, title, url, timestamp) với timestamp là chuỗi UTC thô,
+        đổi sang giờ local bằng to_local_time() khi hiển thị.
+        Khi DB chính hết dữ liệu, trang được lấy tiếp từ các file archive.
+        """
+        self.flush()
+        since = self.to_utc_string(since) if since is not None else None
+        until = self.to_utc_string(until) if until is not None else None
+        conditions = []
+        params = []
+        if host:
+            conditions.append("v.url_id IN (SELECT id FROM urls WHERE host = ?)")
+            params.append(host.lower())
+        if since is not None:
+            conditions.append("v.timestamp >= ?")
+            params.append(since)
+        if until is not None:
+            conditions.append("v.timestamp < ?")
+            params.append(until)
+        url_filter = self.keyword_filter(keyword) if keyword else None
+        if url_filter is not None:
+            conditions.append(f"v.url_id IN ({url_filter[0]})")
+            params.extend(url_filter[1])
+        if before is not None:
+            conditions.append("(v.timestamp, v.id) < (?, ?)")
+            params.extend(before)
+
+        where = ("WHERE " + " AND ".join(conditions)) if conditions else ""
+        query = f"""
+        SELECT v.id, u.title, u.url, v.timestamp
+        FROM visits v JOIN urls u ON u.id = v.url_id
+        {where}
+        ORDER BY v.timestamp DESC, v.id DESC
+        LIMIT ?
+        """
+        params.append(limit)
+        rows = self.conn.execute(query, params).fetchall()
+
+        if len(rows) < limit:
+            # đi tiếp vào quá khứ: các file archive theo tháng
+            if rows:
+                before = (rows[-1][3], rows[-1][0])
+            rows.extend(self.archive.query_page(
+                limit - len(rows), before=before, since=since, until=until,
+                host=host, url_filter=url_filter,
+            ))
+        return rows
+
+    def keyword_filter(self, keyword):
+        """
+        Subquery các id trong urls khớp keyword, kèm params: FTS5 prefix match (LIKE nếu không có FTS5).
+        Dùng chung cho DB chính và archive để phân trang qua ranh giới 2 bên vẫn khớp cùng 1 luật.
+        """
+        match = self.build_match_query(keyword) if self.fts_enabled else None
+        if match is not None:
+            return "SELECT rowid FROM main.urls_fts WHERE urls_fts MATCH ?", [match]
+        return "SELECT id FROM main.urls WHERE title LIKE ? OR url LIKE ?", [f"%{keyword}%"] * 2
+
+    @staticmethod
+    @lru_cache(maxsize=4096)
+    def to_local_time(ts):
+        """Đổi chuỗi timestamp UTC trong DB sang datetime local (có cache)"""
+        dt_utc = datetime.strptime(ts, TIMESTAMP_FORMAT).replace(tzinfo=timezone.utc)
+        return dt_utc.astimezone()
+
+    @staticmethod
+    def to_utc_string(dt):
+        """Đổi datetime (naive = giờ local) sang chuỗi UTC để so sánh với cột timestamp"""
+        return dt.astimezone(timezone.utc).strftime(TIMESTAMP_FORMAT)
+
 
     def delete_entry_by_id(self, entry_id):
         """Xóa 1 entry theo id"""
-        self.conn.execute("DELETE FROM history WHERE id = ?", (entry_id,))
-        self.conn.commit()
+        self.delete_entries([entry_id])
+
+    def delete_entries(self, entry_ids):
+        """Xóa nhiều entry trong 1 transaction, cập nhật count/frecency cho các URL bị ảnh hưởng"""
+        self.flush()
+        with self.maintenance_lock:
+            self._delete_entries(entry_ids)
+
+    def _delete_entries(self, entry_ids):
+        remaining = set(entry_ids)
+        changed = {}  # url_id -> url
+        with self.conn:
+            for entry_id in entry_ids:
+                row = self.conn.execute(
+                    "SELECT v.url_id, v.timestamp, v.typed, u.url FROM visits v JOIN urls u ON u.id = v.url_id "
+                    "WHERE v.id = ?", (entry_id,)
+                ).fetchone()
+                if row is None:
+                    continue  # không nằm trong DB chính → có thể ở archive
+                remaining.discard(entry_id)
+                changed[row[0]] = row[3]
+                self.conn.execute("DELETE FROM visits WHERE id = ?", (entry_id,))
+                self._remove_visit_from_url(*row[:3])
+        if remaining:
+            # visits đã ở archive: xóa ở file archive rồi trừ vào thống kê của URL tương ứng
+            removed = self.archive.delete(remaining)
+            with self.conn:
+                for url, timestamp, typed in removed:
+                    row = self.conn.execute("SELECT id FROM urls WHERE url = ?", (url,)).fetchone()
+                    if row is not None:
+                        changed[row[0]] = url
+                        self._remove_visit_from_url(row[0], timestamp, typed)
+        self._notify_urls_changed(changed.items())
+
+    def _remove_visit_from_url(self, url_id, timestamp, typed):
+        """
+        Trừ 1 lượt truy cập khỏi thống kê của URL; xóa URL khi đó là lượt cuối cùng
+        (tính cả visits đã ở archive, nên không dựa vào bảng visits của DB chính)
+        """
+        row = self.conn.execute(
+            "SELECT visit_count, frecency, last_visit FROM urls WHERE id = ?", (url_id,)
+        ).fetchone()
+        if row is None:
+            return
+        visit_count, frecency, last_visit = row
+        if visit_count <= 1:
+            self.conn.execute("DELETE FROM urls WHERE id = ?", (url_id,))
+            return
+
+        hot_last_visit = self.conn.execute(
+            "SELECT MAX(timestamp) FROM visits WHERE url_id = ?", (url_id,)
+        ).fetchone()[0]
+        if hot_last_visit is not None:
+            last_visit = hot_last_visit  # các visits còn lại đều ở archive → giữ last_visit cũ
+        frecency = frecency_remove(frecency, timestamp, typed)
+        if frecency is None:
+            # sai số làm tròn → tính lại từ các visits còn lại ở DB chính
+            for visit_timestamp, visit_typed in self.conn.execute(
+                "SELECT timestamp, typed FROM visits WHERE url_id = ?", (url_id,)
+            ):
+                frecency = frecency_add(frecency, visit_timestamp, visit_typed)
+            if frecency is None:
+                frecency = visit_score(last_visit)
+        self.conn.execute(
+            """
+            UPDATE urls SET visit_count = MAX(visit_count - 1, 1), typed_count = MAX(typed_count - ?, 0),
+                last_visit = ?, frecency = ?
+            WHERE id = ?
+            """,
+            (int(typed), last_visit, frecency, url_id),
+        )
 
     def clear(self):
         """Xoá toàn bộ history"""
-        self.conn.execute("DELETE FROM history")
-        self.conn.commit()
-    
-    def search(self, keyword, limit=5):
-        cursor = self.conn.cursor()
+        self.flush()
+        self.stop_maintenance()
+        with self.conn:
+            self.conn.execute("DELETE FROM visits")
+            self.conn.execute("DELETE FROM urls")
+        self.archive.clear()
+        self.storage.incremental_vacuum()
+        self._notify("cleared")
+
+    def run_maintenance(self, vacuum_pages=2000):
+        """Bắt đầu dọn history ở thread nền (không làm gì nếu lần trước chưa xong)"""
+        if self.maintenance_thread is not None and self.maintenance_thread.is_alive():
+            return False
+        self.maintenance_stop.clear()
+        self.maintenance_thread = threading.Thread(
+            target=self._maintain, args=(vacuum_pages,), name="HistoryMaintenance", daemon=True
+        )
+        self.maintenance_thread.start()
+        return True
+
+    def stop_maintenance(self):
+        """Dừng lần dọn đang chạy (sau lô hiện tại) và chờ thread kết thúc"""
+        if self.maintenance_thread is not None:
+            self.maintenance_stop.set()
+            self.maintenance_thread.join()
+            self.maintenance_thread = None
+
+    def _maintain(self, vacuum_pages):
+        """
+        Retention trên connection riêng: chuyển visits quá retention_days sang archive theo từng lô
+        ARCHIVE_BATCH_SIZE, rồi trả lại tối đa vacuum_pages trang trống cho hệ điều hành.
+        Trả về số visits đã chuyển.
+        """
+        cutoff = (datetime.now(timezone.utc) - timedelta(days=self.retention_days)).strftime(TIMESTAMP_FORMAT)
+        conn = self.storage.connect()
+        archive = HistoryArchive(conn, self.archive.archive_dir)
+        moved = 0
+        try:
+            while not self.maintenance_stop.is_set():
+                with self.maintenance_lock:
+                    count = archive.archive_batch(cutoff, ARCHIVE_BATCH_SIZE)
+                moved += count
+                if not count:
+                    break
+                self.maintenance_stop.wait(0.05)  # nhường DB cho writer / GUI giữa các lô
+            if not self.maintenance_stop.is_set():
+                with self.maintenance_lock:
+                    # DB cũ chưa ở chế độ INCREMENTAL thì không làm gì: VACUUM chuyển đổi chạy lúc thoát
+                    self.storage.incremental_vacuum(vacuum_pages, conn=conn)
+        except sqlite3.Error as e:
+            self._notify("maintenance_failed", str(e))
+        finally:
+            archive.detach_all()
+            conn.close()
+        return moved
+
+    @staticmethod
+    def build_match_query(keyword, prefix=True):
+        """Chuyển keyword người dùng gõ thành biểu thức MATCH của FTS5"""
+        tokens = re.findall(r"[^\W_]+", keyword)
+        if not tokens:
+            return None
+        suffix = "*" if prefix else ""
+        # mỗi token được quote để ký tự đặc biệt không bị hiểu thành cú pháp FTS
+        return " ".join(f'"{token}"{suffix}' for token in tokens)
+
+    def search(self, keyword, limit=5, prefix=True):
+        """Tìm trong lịch sử, xếp hạng theo frecency tính sẵn"""
+        match = self.build_match_query(keyword, prefix) if self.fts_enabled else None
+        if match is None:
+            return self.search_like(keyword, limit)
+
+        query = """
+        SELECT title, url
+        FROM urls
+        WHERE id IN (SELECT rowid FROM urls_fts WHERE urls_fts MATCH ?)
+        ORDER BY frecency DESC
+        LIMIT ?
+        """
+        with self.storage.read() as conn:
+            return conn.execute(query, (match, limit)).fetchall()
+
+    def search_like(self, keyword, limit=5):
+        """Tìm bằng LIKE (quét bảng urls), dùng khi không có FTS5"""
         query = """
         SELECT title, url
-        FROM history
+        FROM urls
         WHERE title LIKE ? OR url LIKE ?
-        GROUP BY url
-        ORDER BY MAX(timestamp) DESC
+        ORDER BY frecency DESC
         LIMIT ?
         """
         like = f"%{keyword}%"
-        cursor.execute(query, (like, like, limit))
-        return cursor.fetchall()
-
-
+        with self.storage.read() as conn:
+            return conn.execute(query, (like, like, limit)).fetchall()
@@ -4,6 +4,128 @@ from PyQt5.QtGui import QCursor, QColor
 from PyQt5.QtWebEngineWidgets import QWebEngineView
 from PyQt5.QtCore import QUrl
 
+
+class HistoryTableModel(QAbstractTableModel):
+    """Model cho bảng history: chỉ load thêm trang khi view cuộn tới (canFetchMore/fetchMore)"""
+    PAGE_SIZE = 200
+    HEADERS = ["Select", "Title", "URL", "Time"]
+
+    checked_changed = pyqtSignal()
+
+    def __init__(self, history_manager, parent=None):
+        super().__init__(parent)
+        self.history_manager = history_manager
+        self.rows = []            # (id, title, url, timestamp) đã load
+        self.cursor = None        # (timestamp, id) của dòng cuối đã load
+        self.exhausted = False
+        self.keyword = ""
+        self.checked_ids = set()  # trạng thái tick lưu theo id, không theo item
+
+    # ---------- Qt model API ----------
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.rows)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.HEADERS)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return self.HEADERS[section]
+        return None
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        id_, title, url, timestamp = self.rows[index.row()]
+        column = index.column()
+
+        if role == Qt.DisplayRole:
+            if column == 1:
+                return title
+            if column == 2:
+                return url
+            if column == 3:
+                # chỉ đổi giờ cho các ô view thực sự vẽ
+                return self.history_manager.to_local_time(timestamp).strftime("%d %b %Y, %H:%M")
+        elif role == Qt.CheckStateRole and column == 0:
+            return Qt.Checked if id_ in self.checked_ids else Qt.Unchecked
+        elif role == Qt.BackgroundRole and column > 0:
+            if id_ in self.checked_ids:
+                return QColor("#ffe0b2")  # màu row tick
+        elif role == Qt.UserRole:
+            return id_
+        return None
+
+    def setData(self, index, value, role=Qt.EditRole):
+        if not index.isValid() or index.column() != 0 or role != Qt.CheckStateRole:
+            return False
+        id_ = self.rows[index.row()][0]
+        if value == Qt.Checked:
+            self.checked_ids.add(id_)
+        else:
+            self.checked_ids.discard(id_)
+        row = index.row()
+        self.dataChanged.emit(self.index(row, 0), self.index(row, len(self.HEADERS) - 1))
+        self.checked_changed.emit()
+        return True
+
+    def flags(self, index):
+        if not index.isValid():
+            return Qt.NoItemFlags
+        if index.column() == 0:
+            return Qt.ItemIsUserCheckable | Qt.ItemIsEnabled
+        return Qt.ItemIsEnabled | Qt.ItemIsSelectable
+
+    def canFetchMore(self, parent=QModelIndex()):
+        return not parent.isValid() and not self.exhausted
+
+    def fetchMore(self, parent=QModelIndex()):
+        if parent.isValid() or self.exhausted:
+            return
+        entries = self.history_manager.get_page(
+            self.PAGE_SIZE, before=self.cursor, keyword=self.keyword or None
+        )
+        self.exhausted = len(entries) < self.PAGE_SIZE
+        if not entries:
+            return
+
+        last_id, _, _, last_timestamp = entries[-1]
+        self.cursor = (last_timestamp, last_id)
+        start = len(self.rows)
+        self.beginInsertRows(QModelIndex(), start, start + len(entries) - 1)
+        self.rows.extend(entries)
+        self.endInsertRows()
+
+    # ---------- helpers ----------
+    def reload(self):
+        """Bỏ các trang đã load rồi load lại trang đầu"""
+        self.beginResetModel()
+        self.rows = []
+        self.cursor = None
+        self.exhausted = False
+        self.checked_ids.clear()  # id cũ có thể đã bị xóa
+        self.endResetModel()
+        self.fetchMore()
+        self.checked_changed.emit()
+
+    def set_filter(self, keyword):
+        self.keyword = keyword.strip()
+        self.reload()
+
+    def set_all_checked(self, checked):
+        """Tick/bỏ tick toàn bộ các dòng đã load (O(n), 1 lần dataChanged)"""
+        if checked:
+            self.checked_ids.update(row[0] for row in self.rows)
+        else:
+            self.checked_ids.clear()
+        if self.rows:
+            self.dataChanged.emit(self.index(0, 0), self.index(len(self.rows) - 1, len(self.HEADERS) - 1))
+        self.checked_changed.emit()
+
+    def entry_at(self, row):
+        return self.rows[row]
+
+
 class HistoryWindow(QWidget):
     def __init__(self, history_manager):
         super().__init__()
@@ -14,28 +136,51 @@ class HistoryWindow(QWidget):
 
         layout = QVBoxLayout()
 
+        # Ô tìm kiếm (lọc khi đang gõ, có debounce nhỏ)
+        self.search_input = QLineEdit()
+        self.search_input.setPlaceholderText("Search history")
+        self.search_input.setClearButtonEnabled(True)
+        layout.addWidget(self.search_input)
+
+        self.search_timer = QTimer(self)
+        self.search_timer.setSingleShot(True)
+        self.search_timer.timeout.connect(self.apply_filter)
+        self.search_input.textChanged.connect(lambda _: self.search_timer.start(150))
+
         # Table
-        self.table = QTableWidget()
-        self.table.setColumnCount(4)
-        self.table.setHorizontalHeaderLabels(["Select", "Title", "URL", "Time"])
+        self.model = HistoryTableModel(history_manager, self)
+        self.table = QTableView()
+        self.table.setModel(self.model)
         self.table.setAlternatingRowColors(True)
         self.table.setCursor(QCursor(Qt.PointingHandCursor))
-        self.table.setWordWrap(True)
-        self.table.horizontalHeader().setSectionResizeMode(0, QHeaderView.ResizeToContents)
-        self.table.horizontalHeader().setSectionResizeMode(1, QHeaderView.Stretch)
-        self.table.horizontalHeader().setSectionResizeMode(2, QHeaderView.Stretch)
-        self.table.horizontalHeader().setSectionResizeMode(3, QHeaderView.ResizeToContents)
-        self.table.horizontalHeader().setHighlightSections(False)
+        self.table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.table.setWordWrap(False)
+        # Chiều cao dòng cố định để view không phải đo từng dòng
+        self.table.verticalHeader().setSectionResizeMode(QHeaderView.Fixed)
+        self.table.verticalHeader().setDefaultSectionSize(24)
+        self.table.verticalHeader().setVisible(False)
+        header = self.table.horizontalHeader()
+        header.setSectionResizeMode(0, QHeaderView.Fixed)
+        header.setSectionResizeMode(1, QHeaderView.Stretch)
+        header.setSectionResizeMode(2, QHeaderView.Stretch)
+        header.setSectionResizeMode(3, QHeaderView.Fixed)
+        header.resizeSection(0, 60)
+        header.resizeSection(3, 150)
+        header.setHighlightSections(False)
 
         # Hover style
         self.table.setStyleSheet("""
-            QTableWidget::item:selected { background-color: #80deea; color: black; }
+            QTableView::item:selected { background-color: #80deea; color: black; }
         """)
 
         layout.addWidget(self.table)
 
         # Buttons layout
         button_layout = QHBoxLayout()
+        self.chk_select_all = QCheckBox("Select All")
+        self.chk_select_all.toggled.connect(self.model.set_all_checked)
+        button_layout.addWidget(self.chk_select_all)
+
         self.btn_delete_selected = QPushButton("Delete Selected")
         self.btn_delete_selected.setEnabled(False)
         self.btn_delete_selected.clicked.connect(self.delete_selected_entries)
@@ -53,79 +198,49 @@ class HistoryWindow(QWidget):
         layout.addLayout(button_layout)
         self.setLayout(layout)
 
-        # Load history entries
-        self.load_history()
-
         # Double-click mở URL
-        self.table.cellDoubleClicked.connect(self.on_row_double_clicked)
+        self.table.doubleClicked.connect(self.on_row_double_clicked)
 
         # Theo dõi check/uncheck để enable/disable Delete button
-        self.table.itemChanged.connect(self.update_delete_button_state)
+        self.model.checked_changed.connect(self.update_delete_button_state)
+        self.model.modelReset.connect(self.update_clear_button_state)
+        self.model.rowsInserted.connect(self.update_clear_button_state)
+
+        # Load history entries
+        self.load_history()
 
     def load_history(self):
-        self.table.blockSignals(True)
-        entries = self.history_manager.get_all()  # id, title, url, timestamp
-        self.table.setRowCount(len(entries))
-
-        for row, (id_, title, url, timestamp) in enumerate(entries):
-            # Checkbox
-            checkbox_item = QTableWidgetItem()
-            checkbox_item.setCheckState(Qt.Unchecked)
-            checkbox_item.setFlags(Qt.ItemIsUserCheckable | Qt.ItemIsEnabled)
-            checkbox_item.setData(Qt.UserRole, id_)
-            self.table.setItem(row, 0, checkbox_item)
-
-            # Title
-            self.table.setItem(row, 1, QTableWidgetItem(title))
-            # URL
-            self.table.setItem(row, 2, QTableWidgetItem(url))
-            # Time
-            self.table.setItem(row, 3, QTableWidgetItem(timestamp.strftime("%d %b %Y, %H:%M")))
-
-            # Reset background
-            for col in range(1, 4):
-                self.table.item(row, col).setBackground(QColor("white"))
-
-        self.table.blockSignals(False)
-        self.update_delete_button_state(None)
-        
+        self.model.reload()
+
+    def apply_filter(self):
+        self.chk_select_all.blockSignals(True)
+        self.chk_select_all.setChecked(False)
+        self.chk_select_all.blockSignals(False)
+        self.model.set_filter(self.search_input.text())
+
+    def update_delete_button_state(self):
+        self.btn_delete_selected.setEnabled(bool(self.model.checked_ids))
+
+    def update_clear_button_state(self, *args):
         # Vô hiệu hóa nút Clear History nếu không còn row nào
-        self.btn_clear_history.setEnabled(self.table.rowCount() > 0)
-
-    def update_delete_button_state(self, item):
-        any_checked = False
-        for row in range(self.table.rowCount()):
-            checkbox_item = self.table.item(row, 0)
-            checked = checkbox_item.checkState() == Qt.Checked
-            if checked:
-                any_checked = True
-                bg_color = QColor("#ffe0b2")  # màu row tick
-            else:
-                bg_color = QColor("white")  # màu normal
-            for col in range(1, 4):
-                self.table.item(row, col).setBackground(bg_color)
-        self.btn_delete_selected.setEnabled(any_checked)
-
-    def on_row_double_clicked(self, row, column):
-        url_item = self.table.item(row, 2)
-        title_item = self.table.item(row, 1)
-        if url_item and hasattr(self, 'main_window'):
-            url_text = url_item.text()
-            title_text = title_item.text() if title_item else url_text
-            # Open in new tab
-            self.main_window.tab_manager.add_new_tab(QUrl(url_text))
-            # Add to history
-            self.history_manager.add_entry(title_text, url_text)
-            # Reload table
-            self.load_history()
+        self.btn_clear_history.setEnabled(self.model.rowCount() > 0)
+
+    def on_row_double_clicked(self, index):
+        if not index.isValid() or not hasattr(self, 'main_window'):
+            return
+        _, title, url, _ = self.model.entry_at(index.row())
+        title_text = title or url
+        # Open in new tab
+        self.main_window.tab_manager.add_new_tab(QUrl(url))
+        # Add to history
+        self.history_manager.add_entry(title_text, url)
+        # Reload table
+        self.load_history()
 
     def delete_selected_entries(self):
-        for row in range(self.table.rowCount()):
-            checkbox_item = self.table.item(row, 0)
-            if checkbox_item.checkState() == Qt.Checked:
-                entry_id = checkbox_item.data(Qt.UserRole)
-                if entry_id is not None:
-                    self.history_manager.delete_entry_by_id(entry_id)
+        if self.model.checked_ids:
+            self.history_manager.delete_entries(self.model.checked_ids)
+        self.chk_select_all.setChecked(False)
         self.load_history()
 
     def clear_history_confirm(self):
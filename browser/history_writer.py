@@ -0,0 +1,133 @@
+import queue
+import sqlite3
+import threading
+import time
+
+
+class HistoryWriter(threading.Thread):
+    """Thread ghi history nền: gom các lượt truy cập rồi commit theo lô (group commit)"""
+
+    _FLUSH = object()
+    _STOP = object()
+
+    MAX_ATTEMPTS = 5
+    RETRY_DELAY = 0.05  # giây, gấp đôi sau mỗi lần thử lại
+    FLUSH_TIMEOUT = 0.5  # giây; flush() được gọi từ GUI thread nên không chờ lâu hơn
+
+    def __init__(self, storage, record_batch, batch_size=64, flush_interval=0.5, on_error=None):
+        super().__init__(name="HistoryWriter", daemon=True)
+        self.storage = storage
+        self.record_batch = record_batch  # hàm (conn, batch) ghi 1 lô vào DB
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval  # giây
+        self.on_error = on_error  # callback(error, batch) khi 1 lô thử lại nhiều lần vẫn lỗi (gọi từ thread writer)
+        self.queue = queue.Queue()
+        self.failed = []  # các lượt truy cập chưa ghi được, để caller ghi lại sau
+        self.error = None
+        self.closed = False
+        self.retrying = False  # đang chờ để thử lại 1 lô (DB bị khóa...)
+        self.flush_condition = threading.Condition()
+        self.flush_requested = 0
+        self.flush_done = 0
+
+    def enqueue(self, visit):
+        """Đưa 1 lượt truy cập vào hàng đợi (không chặn GUI thread)"""
+        self.queue.put(visit)
+
+    def flush(self, timeout=None):
+        """
+        Chờ tới khi mọi lượt truy cập đã đưa vào hàng đợi được commit, tối đa timeout giây
+        (mặc định FLUSH_TIMEOUT). Writer đang thử lại sau lỗi thì không chờ.
+        Trả về True nếu đã commit xong.
+        """
+        if self.closed or not self.is_alive():
+            return True
+        if self.retrying:
+            return False
+        with self.flush_condition:
+            self.flush_requested += 1
+            target = self.flush_requested
+        self.queue.put(self._FLUSH)
+        with self.flush_condition:
+            return self.flush_condition.wait_for(
+                lambda: self.flush_done >= target or self.retrying,
+                self.FLUSH_TIMEOUT if timeout is None else timeout,
+            ) and self.flush_done >= target
+
+    def close(self):
+        """Commit phần còn lại rồi dừng thread (gọi khi thoát ứng dụng)"""
+        if self.closed:
+            return
+        self.closed = True
+        if self.is_alive():
+            self.queue.put(self._STOP)
+            self.join()
+
+    def run(self):
+        # connection riêng của writer (WAL + pragma do StorageEngine cấu hình)
+        conn = self.storage.connect()
+
+        batch = []
+        deadline = None
+        try:
+            while True:
+                timeout = None if not batch else max(0.0, deadline - time.monotonic())
+                try:
+                    item = self.queue.get(timeout=timeout)
+                except queue.Empty:
+                    # hết hạn thời gian chờ → commit lô hiện tại
+                    self._commit(conn, batch)
+                    batch = []
+                    continue
+
+                if item is self._FLUSH or item is self._STOP:
+                    self._commit(conn, batch)
+                    batch = []
+                    if item is self._STOP:
+                        break
+                    with self.flush_condition:
+                        self.flush_done += 1
+                        self.flush_condition.notify_all()
+                    continue
+
+                batch.append(item)
+                if len(batch) == 1:
+                    deadline = time.monotonic() + self.flush_interval
+                if len(batch) >= self.batch_size:
+                    self._commit(conn, batch)
+                    batch = []
+        finally:
+            conn.close()
+
+    def _commit(self, conn, batch):
+        """Commit 1 lô; lỗi (vd. DB đang bị khóa) thì rollback và thử lại với thời gian chờ tăng dần"""
+        if not batch:
+            return
+        delay = self.RETRY_DELAY
+        try:
+            for attempt in range(1, self.MAX_ATTEMPTS + 1):
+                try:
+                    with conn:  # lỗi giữa chừng → rollback cả lô
+                        self.record_batch(conn, batch)
+                    return
+                except sqlite3.Error as e:
+                    if attempt == self.MAX_ATTEMPTS:
+                        self._give_up(e, batch)
+                        return
+                    self._set_retrying(True)  # flush() đang chờ thì thôi chờ
+                    time.sleep(delay)
+                    delay *= 2
+        finally:
+            self._set_retrying(False)
+
+    def _set_retrying(self, retrying):
+        with self.flush_condition:
+            self.retrying = retrying
+            self.flush_condition.notify_all()
+
+    def _give_up(self, error, batch):
+        # báo qua on_error (HistoryManager → sự kiện "write_failed")
+        self.error = error
+        self.failed.extend(batch)
+        if self.on_error is not None:
+            self.on_error(error, list(batch))
@@ -1,3 +1,6 @@
+import json
+import os
+import shlex
 import socket
 import ssl
 import time
@@ -7,6 +10,12 @@ from PyQt5.QtCore import QObject, pyqtSignal, QUrl, QByteArray
 from PyQt5.QtWebEngineCore import QWebEngineUrlRequestInterceptor
 from PyQt5.QtWebEngineWidgets import QWebEngineProfile
 
+from browser.capture_log import CaptureLog, CaptureLogWriter, default_capture_path
+from browser.dns_resolver import DnsResolver
+from browser.request_query import MIME, STATUS, RequestIndex, RequestQuery
+from browser.request_stats import TrafficStats
+from browser.request_store import RequestStore
+
 
 class NetworkRequest:
     """Class đại diện cho một network request"""
@@ -26,6 +35,10 @@ class NetworkRequest:
         self.mime_type = None
         self.ip_address = None
         self.port = None
+        self.first_party_url = None  # trang (tab) đã tạo ra request
+        self.capture_seq = None  # seq trong CaptureLog nếu đã ghi ra đĩa
+        self.logged = False  # đã đưa vào hàng đợi ghi CaptureLog
+        self.ip_pending = False  # đang chờ DnsResolver: chưa ghi log để record có IP
         
     def finish(self, status_code=None, response_headers=None, response_size=0, error=None):
         """Hoàn thành request và tính toán thời gian"""
@@ -66,6 +79,43 @@ class NetworkRequest:
             self.error = f"DNS Resolution failed: {str(e)}"
         return None
     
+    def set_ip(self, ip, error=None):
+        """Gán kết quả resolve (từ DnsResolver)"""
+        self.ip_address = ip
+        if error:
+            self.error = f"DNS Resolution failed: {error}"
+    
+    def to_record(self):
+        """Các trường được ghi vào CaptureLog"""
+        return {
+            'request_id': self.request_id,
+            'url': self.url,
+            'method': self.method,
+            'headers': self.headers,
+            'post_data': self.post_data,
+            'status_code': self.status_code,
+            'response_headers': self.response_headers,
+            'response_size': self.response_size,
+            'start_time': self.start_time,
+            'end_time': self.end_time,
+            'duration': self.duration,
+            'error': self.error,
+            'mime_type': self.mime_type,
+            'ip_address': self.ip_address,
+            'first_party_url': self.first_party_url,
+        }
+    
+    @classmethod
+    def from_record(cls, record, capture_seq=None):
+        """Dựng lại request đọc từ CaptureLog"""
+        request = cls(record['request_id'], record['url'], record['method'], record['headers'], record['post_data'])
+        for name in ('status_code', 'response_headers', 'response_size', 'start_time', 'end_time',
+                     'duration', 'error', 'mime_type', 'ip_address', 'first_party_url'):
+            setattr(request, name, record[name])
+        request.capture_seq = capture_seq
+        request.logged = True
+        return request
+    
     def to_dict(self):
         """Chuyển đổi thành dictionary để hiển thị"""
         return {
@@ -116,6 +166,13 @@ class NetworkRequestInterceptor(QWebEngineUrlRequestInterceptor):
         except Exception:
             pass
         
+        # Trang tạo ra request (để thống kê theo từng trang / tab)
+        first_party_url = None
+        try:
+            first_party_url = info.firstPartyUrl().toString()
+        except Exception:
+            pass
+        
         # Capture POST data if available
         post_data = None
         try:
@@ -127,19 +184,22 @@ class NetworkRequestInterceptor(QWebEngineUrlRequestInterceptor):
             pass
         
         # Tạo NetworkRequest object
+        # id do RequestStore gán khi add_request
         request = NetworkRequest(
-            request_id=len(self.network_monitor.requests) + 1,
+            request_id=None,
             url=url,
             method=method,
             headers=headers,
             post_data=post_data
         )
+        request.first_party_url = first_party_url
         
-        # Resolve IP address (async)
-        request.resolve_ip()
-        
-        # Thêm vào danh sách
+        # Thêm vào danh sách (gán request_id) trước khi resolve IP
         self.network_monitor.add_request(request)
+        
+        # IP lấy từ cache nếu có, không thì resolve ở thread pool; cả 2 trường hợp báo qua request_updated
+        # (interceptRequest chạy trên IO thread của Chromium, không được chặn ở đây)
+        self.network_monitor.resolve_ip(request)
 
 
 class NetworkMonitor(QObject):
@@ -147,13 +207,35 @@ class NetworkMonitor(QObject):
     request_added = pyqtSignal(object)  # Signal khi có request mới
     request_updated = pyqtSignal(object)  # Signal khi request được cập nhật
     
-    def __init__(self, parent=None):
+    def __init__(self, parent=None, max_requests=1000):
         super().__init__(parent)
-        self.requests = []
-        self.request_map = {}  # Map URL -> NetworkRequest để update
+        # ring buffer giữ max_requests request gần nhất, tìm theo id / URL đều O(1)
+        self.requests = RequestStore(max_requests)
+        # index phụ (host, status, MIME, method, bucket size / thời gian) cho lọc nhanh
+        self.index = RequestIndex()
+        # số liệu cộng dồn (tổng / theo host / theo trang), cập nhật O(1) mỗi request
+        self.stats = TrafficStats()
         self.interceptor = NetworkRequestInterceptor(self)
         self.monitoring = False
-        self.max_requests = 1000  # Giới hạn số lượng requests
+        self.resolver = DnsResolver()
+        
+        # log trên đĩa (tùy chọn): request xong / bị đẩy khỏi buffer được ghi thêm vào
+        # ghi file ở thread riêng (capture_writer), không ở IO thread của Chromium / GUI thread
+        self.capture_log = None
+        self.capture_writer = None
+        self.settings_file = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data", "settings.json")
+        if self.load_capture_setting():
+            self.enable_capture_log()
+    
+    @property
+    def max_requests(self):
+        """Giới hạn số lượng requests"""
+        return self.requests.capacity
+    
+    @max_requests.setter
+    def max_requests(self, value):
+        for evicted in self.requests.resize(value):
+            self._forget(evicted)
     
     def setup_profile(self, profile: QWebEngineProfile):
         """Thiết lập interceptor cho profile"""
@@ -172,8 +254,8 @@ class NetworkMonitor(QObject):
         """Khi page load xong, lấy thông tin response"""
         url = page.url().toString()
         
-        # Tìm request tương ứng
-        request = self.request_map.get(url)
+        # Tìm request tương ứng (lần tải mới nhất của URL)
+        request = self.requests.latest_for_url(url)
         if request:
             # Update với thông tin response cơ bản
             status_code = 200 if ok else 500
@@ -185,65 +267,177 @@ class NetworkMonitor(QObject):
         if not self.monitoring:
             return
         
-        self.requests.append(request)
-        
-        # Lưu vào map để có thể update sau
-        self.request_map[request.url] = request
-        
-        # Giới hạn số lượng requests
-        if len(self.requests) > self.max_requests:
-            old_request = self.requests.pop(0)
-            if old_request.url in self.request_map:
-                del self.request_map[old_request.url]
+        # Gán id và lưu; đầy thì request cũ nhất bị đẩy ra
+        evicted = self.requests.append(request)
+        with self.index.lock:
+            self.stats.apply(self.index.add(request), 1)
+        if evicted is not None:
+            self._forget(evicted)
         
         # Emit signal
         self.request_added.emit(request)
     
+    def resolve_ip(self, request: NetworkRequest):
+        """
+        Gán IP cho request đã add_request: host có trong cache DNS thì gán ngay,
+        không thì resolve ở thread pool; emit request_updated khi có IP
+        """
+        host, _ = request.get_host_info()
+        if not host:
+            return
+
+        def on_resolved(ip, error):
+            request.set_ip(ip, error)
+            request.ip_pending = False
+            self.update_request(request)
+
+        request.ip_pending = True
+        cached = self.resolver.resolve(host, on_resolved)
+        if cached is not None:
+            on_resolved(*cached)
+
     def update_request(self, request: NetworkRequest):
         """Cập nhật thông tin request"""
+        # index và số liệu đổi cùng nhau dưới lock của index (request có thể bị đẩy ra từ thread khác)
+        with self.index.lock:
+            changed = self.index.update(request)
+            if changed is not None:
+                self.stats.update(*changed)
+            # xong và đã có IP (IP về sau khi request xong thì ghi lúc IP về)
+            if request.duration is not None and not request.ip_pending:
+                self._log(request)
         self.request_updated.emit(request)
     
+    def _forget(self, request):
+        """Request bị đẩy khỏi buffer: bỏ khỏi index và số liệu"""
+        with self.index.lock:
+            record = self.index.remove(request)
+            if record is not None:
+                self.stats.apply(record, -1)
+            self._log(request)  # chưa xong cũng ghi, nếu không sẽ mất hẳn
+    
+    def _log(self, request):
+        """Đưa request vào hàng đợi ghi đĩa (1 lần / request); gọi khi giữ index.lock, không làm I/O"""
+        if self.capture_writer is not None and not request.logged:
+            request.logged = True
+            self.capture_writer.write(request.to_record(), lambda seq: setattr(request, "capture_seq", seq))
+    
+    # ---------- log trên đĩa ----------
+    def enable_capture_log(self, directory=None):
+        """Bật ghi request ra đĩa (mở lại log cũ nếu có)"""
+        if self.capture_log is None:
+            capture_log = CaptureLog(directory or default_capture_path())
+            writer = CaptureLogWriter(capture_log)
+            writer.start()
+            with self.index.lock:
+                self.capture_log = capture_log
+                self.capture_writer = writer
+        self.save_capture_setting(True)
+        return self.capture_log
+    
+    def disable_capture_log(self):
+        """Tắt ghi ra đĩa (dữ liệu đã ghi vẫn giữ)"""
+        self._close_capture_log()
+        self.save_capture_setting(False)
+    
+    def flush_capture_log(self):
+        """Chờ thread ghi ghi xong hàng đợi và flush (vd. trước khi export)"""
+        writer = self.capture_writer
+        if writer is not None:
+            writer.flush()
+
+    def _close_capture_log(self):
+        # tách writer dưới lock, chờ nó ghi nốt ngoài lock để IO thread không bị chặn
+        with self.index.lock:
+            capture_log, writer = self.capture_log, self.capture_writer
+            self.capture_log = self.capture_writer = None
+        if writer is not None:
+            writer.close()
+        if capture_log is not None:
+            capture_log.close()
+    
+    def load_capture_setting(self):
+        """Đọc trạng thái bật/tắt log trên đĩa từ settings.json"""
+        try:
+            if os.path.exists(self.settings_file):
+                with open(self.settings_file, 'r', encoding='utf-8') as f:
+                    return bool(json.load(f).get("network_capture_log", False))
+        except Exception as e:
+            print(f"Lỗi khi load network capture setting: {e}")
+        return False
+    
+    def save_capture_setting(self, enabled):
+        """Lưu trạng thái bật/tắt log trên đĩa vào settings.json"""
+        try:
+            settings = {}
+            if os.path.exists(self.settings_file):
+                with open(self.settings_file, 'r', encoding='utf-8') as f:
+                    settings = json.load(f)
+            if settings.get("network_capture_log", False) == enabled:
+                return
+            settings["network_capture_log"] = enabled
+            with open(self.settings_file, 'w', encoding='utf-8') as f:
+                json.dump(settings, f, indent=2, ensure_ascii=False)
+        except Exception as e:
+            print(f"Lỗi khi lưu network capture setting: {e}")
+    
+    def close(self):
+        """Dừng thread pool resolve DNS, ghi nốt các request còn trong buffer rồi đóng log"""
+        self.resolver.close()
+        with self.index.lock:
+            for request in self.requests:
+                self._log(request)
+        self._close_capture_log()
+    
     def clear_requests(self):
         """Xóa tất cả requests"""
         self.requests.clear()
+        with self.index.lock:
+            self.index.clear()
+            self.stats.clear()
+    
+    def get_request(self, request_id):
+        """Request theo id (None nếu đã bị đẩy ra khỏi buffer)"""
+        return self.requests.get(request_id)
+    
+    def query(self, text):
+        """Các request khớp câu lọc (xem browser/request_query.py), cũ → mới"""
+        return self._requests_for_ids(self.index.evaluate(RequestQuery(text)))
+    
+    def _requests_for_ids(self, ids):
+        requests = (self.requests.get(request_id) for request_id in sorted(ids))
+        return [r for r in requests if r is not None]
     
     def get_requests_by_url(self, url_pattern):
         """Lọc requests theo URL pattern"""
-        return [r for r in self.requests if url_pattern.lower() in r.url.lower()]
+        return self.query("url:" + shlex.quote(url_pattern))
+    
+    def get_requests_by_host(self, host_pattern):
+        """Lọc requests theo hostname"""
+        return self.query("host:" + shlex.quote(host_pattern))
     
     def get_requests_by_status(self, status_code):
         """Lọc requests theo status code"""
-        return [r for r in self.requests if r.status_code == status_code]
+        return self._requests_for_ids(self.index.ids_for(STATUS, status_code or 0))
     
     def get_requests_by_type(self, mime_type):
         """Lọc requests theo MIME type"""
-        return [r for r in self.requests if mime_type.lower() in (r.mime_type or '').lower()]
+        return self.query("type:" + shlex.quote(mime_type))
     
-    def get_statistics(self):
-        """Lấy thống kê về network requests"""
-        if not self.requests:
-            return {}
-        
-        total_size = sum(r.response_size for r in self.requests if r.response_size)
-        total_time = sum(r.duration for r in self.requests if r.duration) or 0
-        
-        status_codes = {}
-        mime_types = {}
-        
-        for req in self.requests:
-            if req.status_code:
-                status_codes[req.status_code] = status_codes.get(req.status_code, 0) + 1
-            if req.mime_type:
-                mime_types[req.mime_type] = mime_types.get(req.mime_type, 0) + 1
-        
-        return {
-            'total_requests': len(self.requests),
-            'total_size': total_size,
-            'total_time': total_time,
-            'average_time': total_time / len([r for r in self.requests if r.duration]) if any(r.duration for r in self.requests) else 0,
-            'status_codes': status_codes,
-            'mime_types': mime_types
-        }
+    def status_codes(self):
+        """Các status code đang có (cho combo lọc)"""
+        return [code for code in self.index.keys(STATUS) if code]
+    
+    def mime_types(self):
+        """Các MIME type đang có (cho combo lọc)"""
+        return [mime for mime in self.index.keys(MIME) if mime]
+    
+    def get_statistics(self, host=None, page=None):
+        """
+        Lấy thống kê về network requests (tổng, hoặc của 1 host / 1 trang), gồm p50/p90/p99
+        thời gian tải. Đọc từ số liệu cộng dồn, không duyệt lại các request.
+        """
+        return self.stats.summary(host=host, page=page)
 
 
 class NetworkUtilities:
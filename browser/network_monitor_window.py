@@ -1,8 +1,15 @@
 from PyQt5.QtWidgets import *
 from PyQt5.QtCore import *
 from PyQt5.QtGui import *
+from browser.capture_log import CaptureLog, default_capture_path
 from browser.network_monitor import NetworkMonitor, NetworkRequest, NetworkUtilities
-import json
+from browser.request_export import capture_log_records, store_records
+from browser.request_export_worker import start_export
+from browser.request_query import TYPE_ALIASES, RequestQuery, url_host
+from browser.request_store import sync_window
+import os
+import re
+from collections import OrderedDict
 from datetime import datetime
 
 
@@ -140,6 +147,367 @@ class RequestDetailsDialog(QDialog):
         self.setLayout(layout)
 
 
+STATUS_COLORS = {2: QColor(0, 150, 0), 3: QColor(0, 100, 200), 4: QColor(200, 100, 0), 5: QColor(200, 0, 0)}
+METHOD_COLORS = {"GET": QColor(0, 100, 0), "POST": QColor(200, 100, 0)}
+SORT_ROLE = Qt.UserRole + 1
+
+
+def format_ms(value):
+    """Thời gian ms gọn cho thanh thống kê"""
+    return f"{value / 1000:.2f}s" if value >= 1000 else f"{value:.0f}ms"
+
+
+def status_color(status_code):
+    """Màu chữ cho cột Status theo nhóm mã"""
+    if not status_code or status_code < 200:
+        return None
+    return STATUS_COLORS[min(status_code // 100, 5)]
+
+
+def request_data(request, column, role):
+    """Giá trị của 1 ô (cột theo RequestTableModel.HEADERS) cho các model bảng request"""
+    if role == Qt.DisplayRole:
+        if column == 0:
+            return str(request.request_id)
+        if column == 1:
+            return request.method
+        if column == 2:
+            return request.url
+        if column == 3:
+            return str(request.status_code) if request.status_code else "Pending"
+        if column == 4:
+            return request.mime_type or "Unknown"
+        if column == 5:
+            return NetworkRequest.format_size(request.response_size)
+        if column == 6:
+            return f"{request.duration:.2f}ms" if request.duration else "Pending"
+    elif role == Qt.ForegroundRole:
+        if column == 1:
+            return METHOD_COLORS.get(request.method)
+        if column == 3:
+            return status_color(request.status_code)
+    elif role == SORT_ROLE:
+        # giá trị gốc để sort đúng kiểu số (không sort theo chuỗi "1.2 KB")
+        if column == 0:
+            return request.request_id
+        if column == 1:
+            return request.method
+        if column == 2:
+            return request.url
+        if column == 3:
+            return request.status_code or 0
+        if column == 4:
+            return request.mime_type or ""
+        if column == 5:
+            return request.response_size or 0
+        if column == 6:
+            return request.duration or 0.0
+    elif role == Qt.UserRole:
+        return request
+    return None
+
+
+class RequestTableModel(QAbstractTableModel):
+    """
+    Model cho bảng request, đọc thẳng từ RequestStore của NetworkMonitor:
+    dòng row ↔ request id first_id + row (id tăng dần, liên tục), model không chép dữ liệu.
+    - request mới / bị đẩy ra được gom lại và áp dụng mỗi frame (FRAME_MS):
+      1 lần beginRemoveRows ở đầu + 1 lần beginInsertRows ở cuối, chi phí mỗi request không đổi
+    - request cập nhật (status, IP...) chỉ emit dataChanged cho đúng dòng đó
+    """
+    HEADERS = ["ID", "Method", "URL", "Status", "Type", "Size", "Time"]
+    FRAME_MS = 16
+
+    flushed = pyqtSignal()  # sau mỗi lần áp dụng thay đổi (để cập nhật thống kê)
+
+    def __init__(self, network_monitor, parent=None):
+        super().__init__(parent)
+        self.network_monitor = network_monitor
+        self.store = network_monitor.requests
+        with self.store.lock:
+            self.first_id = self.store.first_id
+            self.next_id = self.store.next_id
+        self.dirty_ids = set()
+        self.frame_timer = QTimer(self)
+        self.frame_timer.setSingleShot(True)
+        self.frame_timer.timeout.connect(self.flush)
+
+    # ---------- Qt model API ----------
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else self.next_id - self.first_id
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.HEADERS)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return self.HEADERS[section]
+        return None
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        request = self.request_at(index.row())
+        if request is None:
+            return None  # đã bị đẩy khỏi store, dòng sẽ bị bỏ ở frame tới
+        return request_data(request, index.column(), role)
+
+    # ---------- cập nhật ----------
+    def request_at(self, row):
+        return self.store.get(self.first_id + row)
+
+    def on_request_added(self, request):
+        self.schedule_flush()
+
+    def on_request_updated(self, request):
+        if request.request_id is not None and self.first_id <= request.request_id < self.next_id:
+            self.dirty_ids.add(request.request_id)
+        self.schedule_flush()
+
+    def schedule_flush(self):
+        if not self.frame_timer.isActive():
+            self.frame_timer.start(self.FRAME_MS)
+
+    def flush(self):
+        """Đồng bộ số dòng với store: bỏ các dòng đầu đã bị đẩy ra, thêm các dòng mới ở cuối"""
+        with self.store.lock:
+            store_first, store_next = self.store.first_id, self.store.next_id
+
+        removed, first_id, next_id = sync_window(self.first_id, self.next_id, store_first, store_next)
+        if removed:
+            self.beginRemoveRows(QModelIndex(), 0, removed - 1)
+            self.first_id += removed
+            self.endRemoveRows()
+        self.first_id, self.next_id = first_id, next_id
+
+        added = store_next - self.next_id
+        if added > 0:
+            self.beginInsertRows(QModelIndex(), self.next_id - self.first_id, store_next - self.first_id - 1)
+            self.next_id = store_next
+            self.endInsertRows()
+
+        last_column = len(self.HEADERS) - 1
+        for request_id in self.dirty_ids:
+            if self.first_id <= request_id < self.next_id:
+                row = request_id - self.first_id
+                self.dataChanged.emit(self.index(row, 0), self.index(row, last_column))
+        self.dirty_ids.clear()
+        self.flushed.emit()
+
+    def reset(self):
+        """Load lại toàn bộ theo store (sau khi clear)"""
+        self.frame_timer.stop()
+        self.beginResetModel()
+        with self.store.lock:
+            self.first_id = self.store.first_id
+            self.next_id = self.store.next_id
+        self.dirty_ids.clear()
+        self.endResetModel()
+        self.flushed.emit()
+
+
+class RequestFilterProxyModel(QSortFilterProxyModel):
+    """
+    Lọc theo câu lọc (xem browser/request_query.py), sort theo SORT_ROLE.
+    Khi đổi câu lọc, tập id khớp được tính 1 lần bằng RequestIndex (giao các index) nên
+    filterAcceptsRow chỉ tra set; dòng thêm / cập nhật về sau thì kiểm tra trực tiếp request đó.
+    """
+
+    def __init__(self, request_index, parent=None):
+        super().__init__(parent)
+        self.request_index = request_index
+        self.query = None
+        self.matched = None  # chỉ có giá trị trong lúc invalidateFilter
+        self.setSortRole(SORT_ROLE)
+
+    def set_query(self, text):
+        query = RequestQuery(text)
+        self.query = query if query else None
+        self.matched = self.request_index.evaluate(query) if self.query else None
+        self.invalidateFilter()
+        self.matched = None
+
+    def filterAcceptsRow(self, source_row, source_parent):
+        if self.query is None:
+            return True
+        model = self.sourceModel()
+        request_id = model.first_id + source_row
+        if self.matched is not None:
+            return request_id in self.matched
+        request = model.store.get(request_id)
+        return request is not None and self.query.matches(request)
+
+
+class CaptureLogModel(QAbstractTableModel):
+    """
+    Model cho các request đã ghi ra đĩa (CaptureLog, có thể hàng triệu dòng):
+    dòng row ↔ seq first_seq + row, chỉ đọc từ đĩa các trang (PAGE_SIZE record) view đang vẽ,
+    giữ tối đa CACHE_PAGES trang trong RAM.
+    """
+    HEADERS = RequestTableModel.HEADERS
+    PAGE_SIZE = 256
+    CACHE_PAGES = 32
+    SYNC_MS = 1000
+
+    synced = pyqtSignal()
+
+    def __init__(self, capture_log, parent=None):
+        super().__init__(parent)
+        self.capture_log = capture_log
+        with capture_log.lock:
+            self.first_seq = capture_log.first_seq
+            self.next_seq = capture_log.next_seq
+        self.pages = OrderedDict()  # số trang -> (seq đầu, [NetworkRequest])
+        self.sync_timer = QTimer(self)
+        self.sync_timer.timeout.connect(self.sync)
+        self.sync_timer.start(self.SYNC_MS)
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else self.next_seq - self.first_seq
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.HEADERS)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return self.HEADERS[section]
+        return None
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        request = self.request_at(index.row())
+        if request is None:
+            return None
+        return request_data(request, index.column(), role)
+
+    def request_at(self, row):
+        seq = self.first_seq + row
+        number = seq // self.PAGE_SIZE
+        page = self.pages.get(number)
+        if page is None:
+            start = max(number * self.PAGE_SIZE, self.capture_log.first_seq)
+            records = self.capture_log.read_range(start, (number + 1) * self.PAGE_SIZE - start)
+            page = self.pages[number] = (
+                start, [NetworkRequest.from_record(record, start + i) for i, record in enumerate(records)]
+            )
+            if len(self.pages) > self.CACHE_PAGES:
+                self.pages.popitem(last=False)
+        else:
+            self.pages.move_to_end(number)
+        start, requests = page
+        position = seq - start
+        return requests[position] if 0 <= position < len(requests) else None
+
+    def sync(self):
+        """Đồng bộ số dòng với log: segment cũ bị xóa (bỏ dòng đầu), record mới (thêm dòng cuối)"""
+        with self.capture_log.lock:
+            log_first, log_next = self.capture_log.first_seq, self.capture_log.next_seq
+        if log_first == self.first_seq and log_next == self.next_seq:
+            return
+        if log_first >= self.next_seq or log_next < self.next_seq:
+            # log bị xóa hết / mở lại: load lại từ đầu
+            self.beginResetModel()
+            self.first_seq, self.next_seq = log_first, log_next
+            self.pages.clear()
+            self.endResetModel()
+        else:
+            removed = log_first - self.first_seq
+            if removed > 0:
+                self.beginRemoveRows(QModelIndex(), 0, removed - 1)
+                self.first_seq = log_first
+                self.endRemoveRows()
+            added = log_next - self.next_seq
+            if added > 0:
+                # trang cuối đang cache có thể thiếu các record mới
+                self.pages.pop((self.next_seq - 1) // self.PAGE_SIZE, None)
+                self.beginInsertRows(QModelIndex(), self.next_seq - self.first_seq, log_next - self.first_seq - 1)
+                self.next_seq = log_next
+                self.endInsertRows()
+        self.synced.emit()
+
+
+class CaptureLogWindow(QDialog):
+    """Xem các request đã ghi ra đĩa (kể cả của các phiên trước)"""
+
+    def __init__(self, capture_log, parent=None, owns_log=False):
+        super().__init__(parent)
+        self.capture_log = capture_log
+        self.owns_log = owns_log  # log mở riêng cho cửa sổ này (monitor không ghi) → đóng khi tắt
+        self.setWindowTitle("Saved Network Capture")
+        self.setMinimumSize(1000, 600)
+
+        layout = QVBoxLayout()
+        self.info_label = QLabel()
+        layout.addWidget(self.info_label)
+
+        self.model = CaptureLogModel(capture_log, self)
+        self.model.synced.connect(self.update_info)
+        self.table = QTableView()
+        self.table.setModel(self.model)
+        self.table.setAlternatingRowColors(True)
+        self.table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.table.setWordWrap(False)
+        self.table.verticalHeader().setSectionResizeMode(QHeaderView.Fixed)
+        self.table.verticalHeader().setDefaultSectionSize(22)
+        self.table.verticalHeader().setVisible(False)
+        header = self.table.horizontalHeader()
+        header.setSectionResizeMode(QHeaderView.Interactive)
+        header.setSectionResizeMode(2, QHeaderView.Stretch)
+        for column, width in ((0, 60), (1, 70), (3, 70), (4, 150), (5, 90), (6, 90)):
+            header.resizeSection(column, width)
+        self.table.doubleClicked.connect(self.show_request_details)
+        layout.addWidget(self.table)
+
+        button_layout = QHBoxLayout()
+        btn_clear = QPushButton("Delete Saved Capture")
+        btn_clear.clicked.connect(self.clear_log)
+        button_layout.addWidget(btn_clear)
+        button_layout.addStretch()
+        btn_close = QPushButton("Close")
+        btn_close.clicked.connect(self.accept)
+        button_layout.addWidget(btn_close)
+        layout.addLayout(button_layout)
+        self.setLayout(layout)
+
+        self.update_info()
+        self.table.scrollToBottom()
+
+    def update_info(self):
+        self.info_label.setText(
+            f"Saved requests: {self.model.rowCount()} | "
+            f"On disk: {NetworkRequest.format_size(self.capture_log.total_bytes())} | "
+            f"{self.capture_log.directory}"
+        )
+
+    def show_request_details(self, index):
+        request = self.model.request_at(index.row())
+        if request:
+            RequestDetailsDialog(request, self).exec_()
+
+    def clear_log(self):
+        reply = QMessageBox.question(
+            self, "Delete Saved Capture",
+            "Delete all requests saved on disk?",
+            QMessageBox.Yes | QMessageBox.No
+        )
+        if reply == QMessageBox.Yes:
+            self.capture_log.clear()
+            self.model.sync()
+            self.update_info()
+
+    def done(self, result):
+        self.model.sync_timer.stop()
+        if self.owns_log:
+            self.capture_log.close()
+        super().done(result)
+
+
+STATUS_CLASSES = [(2, "2xx Success"), (3, "3xx Redirect"), (4, "4xx Client Error"), (5, "5xx Server Error")]
+TYPE_CATEGORIES = ["html", "script", "css", "image", "font", "json", "media"]
+
+
 class NetworkMonitorWindow(QDialog):
     """Cửa sổ Network Monitor"""
     def __init__(self, network_monitor: NetworkMonitor, parent=None):
@@ -158,12 +526,18 @@ class NetworkMonitorWindow(QDialog):
         self.btn_clear = QPushButton("Clear")
         self.btn_export = QPushButton("Export")
         self.btn_test_connection = QPushButton("Test Connection")
+        # ghi request ra đĩa (giữ qua các lần khởi động lại)
+        self.chk_capture_log = QCheckBox("Save to Disk")
+        self.chk_capture_log.setChecked(self.network_monitor.capture_log is not None)
+        self.btn_saved_capture = QPushButton("Saved Capture...")
         
         toolbar.addWidget(self.btn_start)
         toolbar.addWidget(self.btn_stop)
         toolbar.addWidget(self.btn_clear)
         toolbar.addWidget(self.btn_export)
         toolbar.addWidget(self.btn_test_connection)
+        toolbar.addWidget(self.chk_capture_log)
+        toolbar.addWidget(self.btn_saved_capture)
         toolbar.addStretch()
         
         # Statistics label
@@ -177,53 +551,55 @@ class NetworkMonitorWindow(QDialog):
         filter_layout.addWidget(QLabel("Filter:"))
         
         self.filter_input = QLineEdit()
-        self.filter_input.setPlaceholderText("Filter by URL, status, or type...")
-        self.filter_input.textChanged.connect(self.apply_filter)
+        self.filter_input.setPlaceholderText("URL text or host:cdn status:>=400 size:>100k type:image time:>1s -method:GET")
+        self.filter_input.setClearButtonEnabled(True)
+        self.filter_timer = QTimer(self)
+        self.filter_timer.setSingleShot(True)
+        self.filter_timer.timeout.connect(self.apply_filter)
+        self.filter_input.textChanged.connect(lambda _: self.filter_timer.start(150))
         filter_layout.addWidget(self.filter_input)
         
-        # Filter by status
+        # Filter by status / type: các lựa chọn lấy từ những gì đã bắt được
         self.status_filter = QComboBox()
-        self.status_filter.addItem("All Status Codes")
-        self.status_filter.addItem("200 OK")
-        self.status_filter.addItem("404 Not Found")
-        self.status_filter.addItem("500 Server Error")
+        self.status_filter.setSizeAdjustPolicy(QComboBox.AdjustToContents)
         self.status_filter.currentIndexChanged.connect(self.apply_filter)
         filter_layout.addWidget(self.status_filter)
         
-        # Filter by type
         self.type_filter = QComboBox()
-        self.type_filter.addItem("All Types")
-        self.type_filter.addItem("text/html")
-        self.type_filter.addItem("application/json")
-        self.type_filter.addItem("image")
-        self.type_filter.addItem("javascript")
-        self.type_filter.addItem("css")
+        self.type_filter.setSizeAdjustPolicy(QComboBox.AdjustToContents)
         self.type_filter.currentIndexChanged.connect(self.apply_filter)
         filter_layout.addWidget(self.type_filter)
+        self.filter_options_version = None
         
         layout.addLayout(filter_layout)
         
-        # Table
-        self.table = QTableWidget()
-        self.table.setColumnCount(7)
-        self.table.setHorizontalHeaderLabels([
-            "ID", "Method", "URL", "Status", "Type", "Size", "Time"
-        ])
+        # Table (model/view: chỉ các dòng đang hiện mới được vẽ)
+        self.model = RequestTableModel(self.network_monitor, self)
+        self.proxy = RequestFilterProxyModel(self.network_monitor.index, self)
+        self.proxy.setSourceModel(self.model)
+        self.model.flushed.connect(self.update_statistics)
+        self.model.flushed.connect(self.refresh_filter_options)
+        self.table = QTableView()
+        self.table.setModel(self.proxy)
         self.table.setAlternatingRowColors(True)
         self.table.setSelectionBehavior(QAbstractItemView.SelectRows)
         self.table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        # mặc định giữ thứ tự bắt được (không sort), click header để sort
+        self.table.horizontalHeader().setSortIndicator(-1, Qt.AscendingOrder)
         self.table.setSortingEnabled(True)
+        self.table.setWordWrap(False)
         self.table.doubleClicked.connect(self.show_request_details)
+        # Chiều cao dòng cố định để view không phải đo từng dòng
+        self.table.verticalHeader().setSectionResizeMode(QHeaderView.Fixed)
+        self.table.verticalHeader().setDefaultSectionSize(22)
+        self.table.verticalHeader().setVisible(False)
         
-        # Resize columns
+        # Resize columns (ResizeToContents phải đo mọi dòng → dùng độ rộng cố định)
         header = self.table.horizontalHeader()
-        header.setSectionResizeMode(0, QHeaderView.ResizeToContents)
-        header.setSectionResizeMode(1, QHeaderView.ResizeToContents)
+        header.setSectionResizeMode(QHeaderView.Interactive)
         header.setSectionResizeMode(2, QHeaderView.Stretch)
-        header.setSectionResizeMode(3, QHeaderView.ResizeToContents)
-        header.setSectionResizeMode(4, QHeaderView.ResizeToContents)
-        header.setSectionResizeMode(5, QHeaderView.ResizeToContents)
-        header.setSectionResizeMode(6, QHeaderView.ResizeToContents)
+        for column, width in ((0, 60), (1, 70), (3, 70), (4, 150), (5, 90), (6, 90)):
+            header.resizeSection(column, width)
         
         layout.addWidget(self.table)
         
@@ -247,11 +623,14 @@ class NetworkMonitorWindow(QDialog):
         self.btn_clear.clicked.connect(self.clear_requests)
         self.btn_export.clicked.connect(self.export_requests)
         self.btn_test_connection.clicked.connect(self.test_connection_dialog)
+        self.chk_capture_log.toggled.connect(self.toggle_capture_log)
+        self.btn_saved_capture.clicked.connect(self.open_saved_capture)
         
         self.network_monitor.request_added.connect(self.add_request_to_table)
         self.network_monitor.request_updated.connect(self.update_request_in_table)
         
         # Load existing requests
+        self.refresh_filter_options()
         self.refresh_table()
     
     def start_monitoring(self):
@@ -266,6 +645,39 @@ class NetworkMonitorWindow(QDialog):
         self.btn_start.setEnabled(True)
         self.btn_stop.setEnabled(False)
     
+    def toggle_capture_log(self, enabled):
+        """Bật/tắt ghi request ra đĩa"""
+        try:
+            if enabled:
+                self.network_monitor.enable_capture_log()
+            else:
+                self.network_monitor.disable_capture_log()
+        except OSError as e:
+            QMessageBox.critical(self, "Save to Disk", f"Cannot open capture log: {e}")
+            self.chk_capture_log.blockSignals(True)
+            self.chk_capture_log.setChecked(False)
+            self.chk_capture_log.blockSignals(False)
+    
+    def open_saved_capture(self):
+        """Mở cửa sổ xem các request đã ghi ra đĩa"""
+        capture_log = self.network_monitor.capture_log
+        owns_log = False
+        if capture_log is None:
+            directory = default_capture_path()
+            if not os.path.isdir(directory):
+                QMessageBox.information(self, "Saved Capture", "No saved capture yet. Enable \"Save to Disk\" first.")
+                return
+            try:
+                # chỉ đọc: mở để xem không được cắt .seg / ghi lại .idx
+                capture_log = CaptureLog(directory, read_only=True)
+            except OSError as e:
+                QMessageBox.critical(self, "Saved Capture", f"Cannot open capture log: {e}")
+                return
+            owns_log = True
+        dialog = CaptureLogWindow(capture_log, self, owns_log=owns_log)
+        dialog.setStyleSheet(self.styleSheet())
+        dialog.exec_()
+    
     def clear_requests(self):
         """Xóa tất cả requests"""
         reply = QMessageBox.question(
@@ -278,171 +690,196 @@ class NetworkMonitorWindow(QDialog):
             self.refresh_table()
     
     def add_request_to_table(self, request: NetworkRequest):
-        """Thêm request vào table"""
-        self.refresh_table()
+        """Thêm request vào table (gom lại, hiện ở frame tới)"""
+        self.model.on_request_added(request)
     
     def update_request_in_table(self, request: NetworkRequest):
-        """Cập nhật request trong table"""
-        self.refresh_table()
+        """Cập nhật request trong table (chỉ dòng của request đó)"""
+        self.model.on_request_updated(request)
     
     def refresh_table(self):
         """Refresh toàn bộ table"""
-        self.table.setRowCount(0)
-        
-        requests = self.network_monitor.requests
-        for request in requests:
-            self.add_row(request)
-        
-        self.update_statistics()
-    
-    def add_row(self, request: NetworkRequest):
-        """Thêm một row vào table"""
-        row = self.table.rowCount()
-        self.table.insertRow(row)
-        
-        # ID
-        self.table.setItem(row, 0, QTableWidgetItem(str(request.request_id)))
-        
-        # Method
-        method_item = QTableWidgetItem(request.method)
-        if request.method == "GET":
-            method_item.setForeground(QColor(0, 100, 0))
-        elif request.method == "POST":
-            method_item.setForeground(QColor(200, 100, 0))
-        self.table.setItem(row, 1, method_item)
-        
-        # URL
-        self.table.setItem(row, 2, QTableWidgetItem(request.url))
-        
-        # Status
-        status_text = str(request.status_code) if request.status_code else "Pending"
-        status_item = QTableWidgetItem(status_text)
-        if request.status_code:
-            if 200 <= request.status_code < 300:
-                status_item.setForeground(QColor(0, 150, 0))
-            elif 300 <= request.status_code < 400:
-                status_item.setForeground(QColor(0, 100, 200))
-            elif 400 <= request.status_code < 500:
-                status_item.setForeground(QColor(200, 100, 0))
-            elif request.status_code >= 500:
-                status_item.setForeground(QColor(200, 0, 0))
-        self.table.setItem(row, 3, status_item)
-        
-        # Type
-        self.table.setItem(row, 4, QTableWidgetItem(request.mime_type or "Unknown"))
-        
-        # Size
-        self.table.setItem(row, 5, QTableWidgetItem(NetworkRequest.format_size(request.response_size)))
-        
-        # Time
-        time_text = f"{request.duration:.2f}ms" if request.duration else "Pending"
-        self.table.setItem(row, 6, QTableWidgetItem(time_text))
-        
-        # Store request object
-        self.table.item(row, 0).setData(Qt.UserRole, request)
+        self.model.reset()
     
     def apply_filter(self):
-        """Áp dụng filter"""
-        filter_text = self.filter_input.text().lower()
-        status_filter = self.status_filter.currentText()
-        type_filter = self.type_filter.currentText()
-        
-        self.table.setRowCount(0)
-        
-        for request in self.network_monitor.requests:
-            # Filter by text
-            if filter_text and filter_text not in request.url.lower():
-                continue
-            
-            # Filter by status
-            if status_filter != "All Status Codes":
-                expected_status = int(status_filter.split()[0])
-                if request.status_code != expected_status:
-                    continue
-            
-            # Filter by type
-            if type_filter != "All Types":
-                if type_filter.lower() not in (request.mime_type or "").lower():
-                    continue
-            
-            self.add_row(request)
-        
-        self.update_statistics()
+        """Áp dụng filter: ô nhập + 2 combo ghép thành 1 câu lọc"""
+        self.filter_timer.stop()
+        parts = [self.filter_input.text(), self.status_filter.currentData(), self.type_filter.currentData()]
+        self.proxy.set_query(" ".join(part for part in parts if part))
+    
+    def refresh_filter_options(self):
+        """Dựng lại 2 combo khi xuất hiện / mất status code hoặc MIME type"""
+        version = self.network_monitor.index.keys_version
+        if version == self.filter_options_version:
+            return
+        self.filter_options_version = version
+        
+        codes = self.network_monitor.status_codes()
+        status_options = [("All Status Codes", "")]
+        present = {code // 100 for code in codes}
+        status_options += [(label, f"status:{cls}xx") for cls, label in STATUS_CLASSES if cls in present]
+        status_options.append(("Pending", "status:pending"))
+        status_options += [(str(code), f"status:{code}") for code in codes]
+        
+        mimes = self.network_monitor.mime_types()
+        type_options = [("All Types", "")]
+        type_options += [
+            (category, f"type:{category}") for category in TYPE_CATEGORIES
+            if any(pattern in mime for pattern in TYPE_ALIASES[category] for mime in mimes)
+        ]
+        type_options += [(mime, f"type:{mime}") for mime in mimes if " " not in mime]
+        
+        self.set_combo_options(self.status_filter, status_options)
+        self.set_combo_options(self.type_filter, type_options)
+    
+    def set_combo_options(self, combo, options):
+        """Đổi danh sách lựa chọn nhưng giữ lựa chọn hiện tại (không kích hoạt lọc lại)"""
+        current = (combo.currentText(), combo.currentData()) if combo.count() else None
+        if current and current[1] and current not in options:
+            options.append(current)  # giá trị đang lọc không còn trong dữ liệu: vẫn giữ
+        combo.blockSignals(True)
+        combo.clear()
+        for label, query in options:
+            combo.addItem(label, query)
+        if current:
+            combo.setCurrentIndex(max(combo.findData(current[1]), 0))
+        combo.blockSignals(False)
     
     def update_statistics(self):
-        """Cập nhật statistics"""
+        """Cập nhật statistics (đọc số liệu cộng dồn, không duyệt request)"""
         stats = self.network_monitor.get_statistics()
         total = stats.get('total_requests', 0)
         total_size = stats.get('total_size', 0)
-        self.stats_label.setText(
-            f"Requests: {total} | "
-            f"Total Size: {NetworkRequest.format_size(total_size)}"
-        )
+        text = f"Requests: {total} | Total Size: {NetworkRequest.format_size(total_size)}"
+        if stats.get('p50') is not None:
+            text += f" | p50 {format_ms(stats['p50'])} p90 {format_ms(stats['p90'])} p99 {format_ms(stats['p99'])}"
+        self.stats_label.setText(text)
+    
+    def show_group_statistics(self, title, stats):
+        """Hộp thoại thống kê của 1 host / 1 trang"""
+        if not stats:
+            QMessageBox.information(self, title, "No requests")
+            return
+        lines = [
+            f"Requests: {stats['total_requests']} ({stats['finished_requests']} finished)",
+            f"Total Size: {NetworkRequest.format_size(stats['total_size'])}",
+            f"Average Time: {format_ms(stats['average_time'])}",
+        ]
+        if stats['p50'] is not None:
+            lines.append(f"p50 / p90 / p99: {format_ms(stats['p50'])} / {format_ms(stats['p90'])} / {format_ms(stats['p99'])}")
+        if stats['status_codes']:
+            lines.append("Status: " + ", ".join(f"{code}×{n}" for code, n in sorted(stats['status_codes'].items())))
+        if stats['mime_types']:
+            top = sorted(stats['mime_types'].items(), key=lambda item: item[1], reverse=True)[:8]
+            lines.append("Types: " + ", ".join(f"{mime}×{n}" for mime, n in top))
+        QMessageBox.information(self, title, "\n".join(lines))
+    
+    def request_at(self, index):
+        """Request của 1 dòng trong view (index của proxy)"""
+        if not index.isValid():
+            return None
+        return self.model.request_at(self.proxy.mapToSource(index).row())
     
     def show_request_details(self, index):
         """Hiển thị chi tiết request"""
-        row = index.row()
-        item = self.table.item(row, 0)
-        if item:
-            request = item.data(Qt.UserRole)
-            if request:
-                dialog = RequestDetailsDialog(request, self)
-                dialog.exec_()
+        request = self.request_at(index)
+        if request:
+            dialog = RequestDetailsDialog(request, self)
+            dialog.exec_()
     
     def show_context_menu(self, position):
         """Hiển thị context menu"""
-        item = self.table.itemAt(position)
-        if not item:
+        index = self.table.indexAt(position)
+        request = self.request_at(index)
+        if not request:
             return
         
         menu = QMenu(self)
         
         action_details = QAction("View Details", self)
-        action_details.triggered.connect(lambda: self.show_request_details(self.table.indexAt(position)))
+        action_details.triggered.connect(lambda: self.show_request_details(index))
         menu.addAction(action_details)
         
         action_copy_url = QAction("Copy URL", self)
-        action_copy_url.triggered.connect(lambda: self.copy_url(item))
+        action_copy_url.triggered.connect(lambda: self.copy_url(request))
         menu.addAction(action_copy_url)
         
+        host = url_host(request.url)
+        if host:
+            action_host_stats = QAction(f"Statistics for {host}", self)
+            action_host_stats.triggered.connect(
+                lambda: self.show_group_statistics(host, self.network_monitor.get_statistics(host=host))
+            )
+            menu.addAction(action_host_stats)
+        page = url_host(request.first_party_url)
+        if page:
+            action_page_stats = QAction(f"Statistics for page {page}", self)
+            action_page_stats.triggered.connect(
+                lambda: self.show_group_statistics(f"Page {page}", self.network_monitor.get_statistics(page=page))
+            )
+            menu.addAction(action_page_stats)
+        
         menu.exec_(self.table.viewport().mapToGlobal(position))
     
-    def copy_url(self, item):
+    def copy_url(self, request):
         """Copy URL to clipboard"""
-        request = item.data(Qt.UserRole)
-        if request:
-            clipboard = QApplication.clipboard()
-            clipboard.setText(request.url)
+        clipboard = QApplication.clipboard()
+        clipboard.setText(request.url)
     
     def export_requests(self):
-        """Export requests to JSON"""
-        file_path, _ = QFileDialog.getSaveFileName(
-            self, "Export Requests", "", "JSON Files (*.json)"
+        """Export requests ra HAR / NDJSON / JSON (có thể nén gzip), ghi dần ở thread riêng"""
+        records, total = store_records(self.network_monitor.requests), len(self.network_monitor.requests)
+        capture_log = self.network_monitor.capture_log
+        if capture_log is not None and len(capture_log):
+            # đang ghi ra đĩa: cho chọn export toàn bộ log (kể cả các phiên trước)
+            saved = f"Saved capture on disk ({len(capture_log)} requests)"
+            choice, ok = QInputDialog.getItem(
+                self, "Export Requests", "Export:",
+                [f"Current requests ({total})", saved], 0, False
+            )
+            if not ok:
+                return
+            if choice == saved:
+                self.network_monitor.flush_capture_log()  # ghi nốt hàng đợi của thread ghi
+                records, total = capture_log_records(capture_log), len(capture_log)
+        
+        file_path, selected_filter = QFileDialog.getSaveFileName(
+            self, "Export Requests", "requests.har",
+            "HAR 1.2 (*.har);;HAR 1.2 gzip (*.har.gz);;NDJSON (*.ndjson);;NDJSON gzip (*.ndjson.gz);;"
+            "JSON (*.json);;JSON gzip (*.json.gz)"
         )
-        if file_path:
-            try:
-                data = []
-                for request in self.network_monitor.requests:
-                    data.append({
-                        'id': request.request_id,
-                        'url': request.url,
-                        'method': request.method,
-                        'status_code': request.status_code,
-                        'headers': request.headers,
-                        'response_headers': request.response_headers,
-                        'size': request.response_size,
-                        'duration': request.duration,
-                        'mime_type': request.mime_type,
-                        'ip_address': request.ip_address,
-                        'error': request.error
-                    })
-                
-                with open(file_path, 'w', encoding='utf-8') as f:
-                    json.dump(data, f, indent=2, ensure_ascii=False)
-                
-                QMessageBox.information(self, "Export", "Requests exported successfully!")
-            except Exception as e:
-                QMessageBox.critical(self, "Export Error", f"Failed to export: {str(e)}")
+        if not file_path:
+            return
+        # định dạng lấy theo đuôi file: thêm đuôi của filter đã chọn nếu user không gõ
+        match = re.search(r"\*(\.[\w.]+)", selected_filter)
+        if match and not file_path.lower().endswith(match.group(1)):
+            file_path += match.group(1)
+        
+        self.export_thread, self.export_worker = start_export(records, total, file_path, self)
+        self.export_progress = QProgressDialog("Exporting requests...", "Cancel", 0, 100, self)
+        self.export_progress.setWindowTitle("Export Requests")
+        self.export_progress.setMinimumDuration(300)
+        self.export_progress.canceled.connect(self.export_worker.cancel, Qt.DirectConnection)
+        self.export_worker.progress.connect(self.on_export_progress)
+        self.export_worker.finished.connect(self.on_export_finished)
+        self.export_worker.failed.connect(self.on_export_failed)
+        self.btn_export.setEnabled(False)
+        self.export_thread.start()
+    
+    def on_export_progress(self, written, percent):
+        self.export_progress.setLabelText(f"Exported {written} requests")
+        self.export_progress.setValue(percent)
+    
+    def on_export_finished(self, written, completed):
+        self.export_progress.reset()
+        self.btn_export.setEnabled(True)
+        if completed:
+            QMessageBox.information(self, "Export", f"Exported {written} requests successfully!")
+    
+    def on_export_failed(self, message):
+        self.export_progress.reset()
+        self.btn_export.setEnabled(True)
+        QMessageBox.critical(self, "Export Error", f"Failed to export: {message}")
     
     def test_connection_dialog(self):
         """Dialog để test connection"""
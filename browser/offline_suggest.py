@@ -0,0 +1,334 @@
+"""
+File gợi ý offline (thay cho suggestqueries.google.com trên máy không có mạng).
+
+Định dạng (little-endian):
+- header: magic, version, block_size, top_k, scan_limit, số entry, số block, số "prefix nặng",
+  offset bảng block và offset bảng prefix nặng
+- các query đã chuẩn hóa, sắp xếp tăng dần, nén front-coding theo block block_size entry:
+  mỗi entry = varint(số ký tự chung với entry trước) + varint(độ dài phần còn lại) + bytes + varint(điểm);
+  entry đầu block luôn đầy đủ nên tìm nhị phân được trên các block
+- prefix nặng: prefix có hơn scan_limit query được lưu sẵn top_k id entry theo điểm,
+  prefix nhẹ thì quét thẳng tối đa scan_limit entry
+
+File được mmap chỉ đọc: mở gần như tức thì và các cửa sổ dùng chung page cache của hệ điều hành.
+
+Tạo file:  python -m browser.offline_suggest build corpus.txt data/suggestions.sug
+(mỗi dòng corpus: "query" hoặc "query<TAB>số lần", query trùng được cộng dồn)
+"""
+import argparse
+import heapq
+import mmap
+import os
+import struct
+import sys
+from collections import OrderedDict
+
+from browser.suggest_cache import normalize_query
+
+MAGIC = b"MBSUGGST"
+VERSION = 1
+HEADER = struct.Struct("<8sIIIIQQQQQ")
+OFFSET = struct.Struct("<Q")
+DEFAULT_BLOCK_SIZE = 16
+DEFAULT_TOP_K = 10
+DEFAULT_SCAN_LIMIT = 256
+
+
+def default_offline_path():
+    """data/suggestions.sug cùng cấp với thư mục browser"""
+    project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    return os.path.join(project_root, "data", "suggestions.sug")
+
+
+def _write_varint(out, value):
+    while value >= 0x80:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def _read_varint(buf, pos):
+    result = shift = 0
+    while True:
+        byte = buf[pos]
+        pos += 1
+        result |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return result, pos
+        shift += 7
+
+
+def _common_prefix(a, b):
+    n = min(len(a), len(b))
+    i = 0
+    while i < n and a[i] == b[i]:
+        i += 1
+    return i
+
+
+# ---------- build ----------
+def read_corpus(path):
+    """Đọc corpus text, trả về {query chuẩn hóa: tổng điểm}"""
+    counts = {}
+    with open(path, "r", encoding="utf-8", errors="replace") as f:
+        for line in f:
+            query, _, count = line.rstrip("\n").partition("\t")
+            query = normalize_query(query)
+            if not query:
+                continue
+            try:
+                value = int(count) if count else 1
+            except ValueError:
+                value = 1
+            counts[query] = counts.get(query, 0) + max(value, 0)
+    return counts
+
+
+def _heavy_prefixes(keys, scores, top_k, scan_limit):
+    """Các prefix có hơn scan_limit query, kèm top_k id entry điểm cao nhất"""
+    heavy = []
+    ranges = [("", 0, len(keys))]
+    depth = 0
+    while ranges:
+        next_ranges = []
+        for _, lo, hi in ranges:
+            i = lo
+            while i < hi:
+                key = keys[i]
+                if len(key) <= depth:
+                    i += 1
+                    continue
+                prefix = key[:depth + 1]
+                j = i + 1
+                while j < hi and keys[j].startswith(prefix):
+                    j += 1
+                if j - i > scan_limit:
+                    top = heapq.nlargest(top_k, range(i, j), key=scores.__getitem__)
+                    heavy.append((prefix, top))
+                    next_ranges.append((prefix, i, j))
+                i = j
+        ranges = next_ranges
+        depth += 1
+    heavy.sort()
+    return heavy
+
+
+def build(counts, out_path, block_size=DEFAULT_BLOCK_SIZE, top_k=DEFAULT_TOP_K,
+          scan_limit=DEFAULT_SCAN_LIMIT):
+    """Ghi file gợi ý từ {query: điểm}"""
+    keys = sorted(counts)  # so sánh theo code point = thứ tự byte UTF-8
+    scores = [counts[key] for key in keys]
+
+    data = bytearray()
+    block_offsets = []
+    previous = b""
+    for index, key in enumerate(keys):
+        encoded = key.encode("utf-8")
+        if index % block_size == 0:
+            block_offsets.append(len(data))
+            shared = 0
+        else:
+            shared = _common_prefix(previous, encoded)
+        _write_varint(data, shared)
+        _write_varint(data, len(encoded) - shared)
+        data += encoded[shared:]
+        _write_varint(data, scores[index])
+        previous = encoded
+
+    heavy_data = bytearray()
+    heavy_offsets = []
+    for prefix, top in _heavy_prefixes(keys, scores, top_k, scan_limit):
+        heavy_offsets.append(len(heavy_data))
+        encoded = prefix.encode("utf-8")
+        _write_varint(heavy_data, len(encoded))
+        heavy_data += encoded
+        _write_varint(heavy_data, len(top))
+        for entry_id in top:
+            _write_varint(heavy_data, entry_id)
+
+    data_offset = HEADER.size
+    heavy_data_offset = data_offset + len(data)
+    block_index_offset = heavy_data_offset + len(heavy_data)
+    heavy_index_offset = block_index_offset + OFFSET.size * len(block_offsets)
+
+    tmp_path = out_path + ".tmp"
+    os.makedirs(os.path.dirname(os.path.abspath(out_path)), exist_ok=True)
+    with open(tmp_path, "wb") as f:
+        f.write(HEADER.pack(
+            MAGIC, VERSION, block_size, top_k, scan_limit,
+            len(keys), len(block_offsets), len(heavy_offsets), block_index_offset, heavy_index_offset,
+        ))
+        f.write(data)
+        f.write(heavy_data)
+        for offset in block_offsets:
+            f.write(OFFSET.pack(data_offset + offset))
+        for offset in heavy_offsets:
+            f.write(OFFSET.pack(heavy_data_offset + offset))
+    os.replace(tmp_path, out_path)
+    return len(keys)
+
+
+# ---------- đọc ----------
+class OfflineSuggestFile:
+    """Đọc file gợi ý qua mmap chỉ đọc; query(prefix) trả top gợi ý theo điểm"""
+    BLOCK_CACHE_SIZE = 64
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as f:
+            if os.fstat(f.fileno()).st_size < HEADER.size:
+                raise ValueError(f"not a suggestion file: {path}")
+            self.buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        (magic, version, self.block_size, self.top_k, self.scan_limit, self.entry_count,
+         self.block_count, self.heavy_count, self.block_index_offset,
+         self.heavy_index_offset) = HEADER.unpack_from(self.buffer, 0)
+        if magic != MAGIC or version != VERSION:
+            self.buffer.close()
+            raise ValueError(f"not a suggestion file: {path}")
+        try:
+            self._validate()
+        except ValueError:
+            self.buffer.close()
+            raise
+        self.blocks = OrderedDict()  # block -> [(key bytes, score)] đã giải nén (LRU nhỏ)
+
+    def _validate(self):
+        """Kiểm tra header và mọi offset nằm trong file (file hỏng / cắt cụt thì ValueError ngay khi mở)"""
+        size = len(self.buffer)
+        if not self.block_size or self.block_count != -(-self.entry_count // self.block_size):
+            raise ValueError(f"corrupt suggestion file (block count): {self.path}")
+        if (self.block_index_offset < HEADER.size
+                or self.heavy_index_offset != self.block_index_offset + self.block_count * OFFSET.size
+                or self.heavy_index_offset + self.heavy_count * OFFSET.size != size):
+            raise ValueError(f"corrupt suggestion file (section offsets): {self.path}")
+        for table, count in ((self.block_index_offset, self.block_count),
+                             (self.heavy_index_offset, self.heavy_count)):
+            if count:
+                offsets = struct.unpack_from(f"<{count}Q", self.buffer, table)
+                if min(offsets) < HEADER.size or max(offsets) >= self.block_index_offset:
+                    raise ValueError(f"corrupt suggestion file (entry offsets): {self.path}")
+
+    def close(self):
+        self.buffer.close()
+
+    def _block_offset(self, block):
+        return OFFSET.unpack_from(self.buffer, self.block_index_offset + block * OFFSET.size)[0]
+
+    def _first_key(self, block):
+        pos = self._block_offset(block)
+        _, pos = _read_varint(self.buffer, pos)  # shared = 0
+        length, pos = _read_varint(self.buffer, pos)
+        return self.buffer[pos:pos + length]
+
+    def _block(self, block):
+        entries = self.blocks.get(block)
+        if entries is not None:
+            self.blocks.move_to_end(block)
+            return entries
+        entries = []
+        pos = self._block_offset(block)
+        count = min(self.block_size, self.entry_count - block * self.block_size)
+        previous = b""
+        for _ in range(count):
+            shared, pos = _read_varint(self.buffer, pos)
+            length, pos = _read_varint(self.buffer, pos)
+            key = previous[:shared] + self.buffer[pos:pos + length]
+            pos += length
+            score, pos = _read_varint(self.buffer, pos)
+            entries.append((key, score))
+            previous = key
+        self.blocks[block] = entries
+        if len(self.blocks) > self.BLOCK_CACHE_SIZE:
+            self.blocks.popitem(last=False)
+        return entries
+
+    def _entry(self, entry_id):
+        return self._block(entry_id // self.block_size)[entry_id % self.block_size]
+
+    def _heavy(self, prefix):
+        """top id entry lưu sẵn cho prefix (None nếu prefix không "nặng")"""
+        lo, hi = 0, self.heavy_count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            pos = OFFSET.unpack_from(self.buffer, self.heavy_index_offset + mid * OFFSET.size)[0]
+            length, pos = _read_varint(self.buffer, pos)
+            key = self.buffer[pos:pos + length]
+            if key < prefix:
+                lo = mid + 1
+            elif key > prefix:
+                hi = mid
+            else:
+                pos += length
+                count, pos = _read_varint(self.buffer, pos)
+                ids = []
+                for _ in range(count):
+                    entry_id, pos = _read_varint(self.buffer, pos)
+                    ids.append(entry_id)
+                return ids
+        return None
+
+    def _scan(self, prefix):
+        """Quét các entry bắt đầu bằng prefix (prefix nhẹ nên tối đa scan_limit entry)"""
+        # block cuối cùng có entry đầu < prefix
+        lo, hi = 0, self.block_count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._first_key(mid) < prefix:
+                lo = mid + 1
+            else:
+                hi = mid
+        block = max(lo - 1, 0)
+        matches = []
+        while block < self.block_count:
+            for key, score in self._block(block):
+                if key.startswith(prefix):
+                    matches.append((score, key))
+                elif key > prefix:
+                    return matches
+            block += 1
+        return matches
+
+    def query(self, text, limit=10):
+        prefix = normalize_query(text)
+        if not prefix or not self.entry_count:
+            return []
+        if text[-1:].isspace():
+            prefix += " "  # "igi " chỉ khớp từ "igi" trọn vẹn, không khớp "igiuyze"
+        prefix = prefix.encode("utf-8")
+        ids = self._heavy(prefix)
+        if ids is not None:
+            matches = [(score, key) for key, score in map(self._entry, ids)]
+        else:
+            matches = self._scan(prefix)
+        best = heapq.nlargest(limit, matches)
+        return [key.decode("utf-8") for _, key in best]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m browser.offline_suggest",
+                                     description="Offline suggestion file tools")
+    commands = parser.add_subparsers(dest="command", required=True)
+    build_cmd = commands.add_parser("build", help="build a suggestion file from a text corpus")
+    build_cmd.add_argument("corpus", help="UTF-8 text, one 'query' or 'query<TAB>count' per line")
+    build_cmd.add_argument("output", nargs="?", default=default_offline_path())
+    build_cmd.add_argument("--block-size", type=int, default=DEFAULT_BLOCK_SIZE)
+    build_cmd.add_argument("--top-k", type=int, default=DEFAULT_TOP_K)
+    build_cmd.add_argument("--scan-limit", type=int, default=DEFAULT_SCAN_LIMIT)
+    query_cmd = commands.add_parser("query", help="print suggestions for a prefix")
+    query_cmd.add_argument("prefix")
+    query_cmd.add_argument("path", nargs="?", default=default_offline_path())
+    args = parser.parse_args(argv)
+
+    if args.command == "build":
+        count = build(read_corpus(args.corpus), args.output, args.block_size, args.top_k, args.scan_limit)
+        print(f"{count} queries -> {args.output} ({os.path.getsize(args.output)} bytes)")
+    else:
+        suggestions = OfflineSuggestFile(args.path)
+        for suggestion in suggestions.query(args.prefix):
+            print(suggestion)
+        suggestions.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
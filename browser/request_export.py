@@ -0,0 +1,194 @@
+"""
+Export request bắt được ra HAR 1.2 / NDJSON / JSON, ghi dần từng record (RAM không tăng theo số request),
+tùy chọn nén gzip (đuôi .gz). Không phụ thuộc Qt; worker + QThread ở request_export_worker.py.
+"""
+import gzip
+import http.client
+import json
+import os
+import urllib.parse
+from datetime import datetime, timezone
+
+FORMATS = ("har", "ndjson", "json")
+PROGRESS_EVERY = 500
+CREATOR = {"name": "MiniBrowser Network Monitor", "version": "1.0"}
+
+
+def detect_format(path):
+    """Định dạng + có nén không, theo đuôi file (x.har.gz -> ("har", True))"""
+    name = path.lower()
+    compress = name.endswith(".gz")
+    if compress:
+        name = name[:-3]
+    extension = os.path.splitext(name)[1].lstrip(".")
+    return (extension if extension in FORMATS else "json"), compress
+
+
+# ---------- nguồn record ----------
+def store_records(store):
+    """
+    Record (dict) của các request trong RequestStore, cũ → mới, không chép cả buffer.
+    Mỗi record được dựng dưới store.lock và chép headers, để thread export không dùng chung dict với GUI.
+    """
+    with store.lock:
+        first_id, next_id = store.first_id, store.next_id
+    for request_id in range(first_id, next_id):
+        with store.lock:
+            request = store.get(request_id)
+            if request is None:
+                continue
+            record = request.to_record()
+            record["headers"] = dict(record["headers"] or {})
+            record["response_headers"] = dict(record["response_headers"] or {})
+        yield record
+
+
+def capture_log_records(capture_log, page_size=1000):
+    """Record trong CaptureLog, đọc từng trang"""
+    with capture_log.lock:
+        seq, end = capture_log.first_seq, capture_log.next_seq
+    while seq < end:
+        records = capture_log.read_range(seq, min(page_size, end - seq))
+        if not records:
+            # record hỏng trên đĩa: bỏ qua, đọc tiếp phần sau
+            seq = max(seq + 1, capture_log.next_readable(seq + 1))
+            continue
+        yield from records
+        seq += len(records)
+
+
+# ---------- chuyển đổi ----------
+def _iso_time(timestamp):
+    if timestamp is None:
+        return datetime.now(timezone.utc).isoformat()
+    return datetime.fromtimestamp(timestamp, timezone.utc).isoformat()
+
+
+def _name_values(mapping):
+    return [{"name": str(name), "value": str(value)} for name, value in (mapping or {}).items()]
+
+
+def har_entry(record):
+    """1 entry HAR 1.2 từ record; request chưa xong có status 0 và thời gian 0"""
+    url = record["url"]
+    try:
+        query = urllib.parse.parse_qsl(urllib.parse.urlsplit(url).query, keep_blank_values=True)
+    except ValueError:
+        query = []
+    status = record.get("status_code") or 0
+    duration = max(record.get("duration") or 0, 0)
+    size = record.get("response_size") or 0
+    response_headers = record.get("response_headers") or {}
+    request = {
+        "method": record.get("method") or "GET",
+        "url": url,
+        "httpVersion": "HTTP/1.1",
+        "cookies": [],
+        "headers": _name_values(record.get("headers")),
+        "queryString": [{"name": name, "value": value} for name, value in query],
+        "headersSize": -1,
+        "bodySize": len((record.get("post_data") or "").encode("utf-8")) if record.get("post_data") else 0,
+    }
+    if record.get("post_data"):
+        content_type = (record.get("headers") or {}).get("Content-Type", "application/x-www-form-urlencoded")
+        request["postData"] = {"mimeType": content_type, "text": record["post_data"]}
+    entry = {
+        "startedDateTime": _iso_time(record.get("start_time")),
+        "time": duration,
+        "request": request,
+        "response": {
+            "status": status,
+            "statusText": http.client.responses.get(status, ""),
+            "httpVersion": "HTTP/1.1",
+            "cookies": [],
+            "headers": _name_values(response_headers),
+            "content": {"size": size, "mimeType": record.get("mime_type") or ""},
+            "redirectURL": response_headers.get("Location", ""),
+            "headersSize": -1,
+            "bodySize": size if status else -1,
+        },
+        "cache": {},
+        "timings": {"send": 0, "wait": duration, "receive": 0},
+    }
+    if record.get("ip_address"):
+        entry["serverIPAddress"] = record["ip_address"]
+    if record.get("error"):
+        entry["comment"] = record["error"]
+    return entry
+
+
+def json_entry(record):
+    """Cùng các trường với file export JSON cũ (thêm thời điểm bắt đầu và trang)"""
+    return {
+        'id': record.get('request_id'),
+        'url': record['url'],
+        'method': record.get('method'),
+        'status_code': record.get('status_code'),
+        'headers': record.get('headers') or {},
+        'response_headers': record.get('response_headers') or {},
+        'size': record.get('response_size'),
+        'duration': record.get('duration'),
+        'mime_type': record.get('mime_type'),
+        'ip_address': record.get('ip_address'),
+        'error': record.get('error'),
+        'start_time': record.get('start_time'),
+        'first_party_url': record.get('first_party_url'),
+    }
+
+
+# ---------- ghi ----------
+def export_records(records, path, fmt=None, compress=None, total=0, progress=None, is_cancelled=None):
+    """
+    Ghi records ra path (file tạm rồi os.replace, hủy giữa chừng thì không để lại file dở).
+    progress(written, total) gọi mỗi PROGRESS_EVERY record. Trả về (số record đã ghi, đã xong hay bị hủy).
+    """
+    detected_format, detected_compress = detect_format(path)
+    fmt = fmt or detected_format
+    compress = detected_compress if compress is None else compress
+    if fmt not in FORMATS:
+        raise ValueError(f"unknown export format: {fmt}")
+
+    tmp_path = path + ".tmp"
+    opener = gzip.open if compress else open
+    written = 0
+    completed = False
+    try:
+        with opener(tmp_path, "wt", encoding="utf-8", newline="\n") as out:
+            if fmt == "har":
+                out.write('{"log": {"version": "1.2", "creator": ')
+                out.write(json.dumps(CREATOR))
+                out.write(', "pages": [], "entries": [\n')
+            elif fmt == "json":
+                out.write("[\n")
+
+            for record in records:
+                if written % PROGRESS_EVERY == 0:
+                    if is_cancelled and is_cancelled():
+                        break
+                    if progress and written:
+                        progress(written, total)
+                if fmt == "ndjson":
+                    out.write(json.dumps(json_entry(record), ensure_ascii=False))
+                    out.write("\n")
+                else:
+                    if written:
+                        out.write(",\n")
+                    entry = har_entry(record) if fmt == "har" else json_entry(record)
+                    out.write(json.dumps(entry, ensure_ascii=False))
+                written += 1
+            else:
+                completed = True
+
+            if completed:
+                if fmt == "har":
+                    out.write("\n]}}\n")
+                elif fmt == "json":
+                    out.write("\n]\n")
+        if completed:
+            os.replace(tmp_path, path)
+            if progress:
+                progress(written, total)
+    finally:
+        if not completed and os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    return written, completed
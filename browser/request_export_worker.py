@@ -0,0 +1,48 @@
+from PyQt5.QtCore import QObject, QThread, pyqtSignal
+
+from browser.request_export import export_records
+
+
+class RequestExportWorker(QObject):
+    """Chạy export trong QThread riêng; GUI chỉ nhận signal tiến độ / kết quả"""
+    progress = pyqtSignal(int, int)  # đã ghi, percent
+    finished = pyqtSignal(int, bool)  # số request đã ghi, đã xong (False = bị hủy)
+    failed = pyqtSignal(str)
+
+    def __init__(self, records, total, path):
+        super().__init__()
+        self.records = records  # generator, chỉ được duyệt ở thread export
+        self.total = total
+        self.path = path
+        self.cancelled = False
+
+    def cancel(self):
+        self.cancelled = True
+
+    def run(self):
+        try:
+            written, completed = export_records(
+                self.records, self.path, total=self.total,
+                progress=self.report, is_cancelled=lambda: self.cancelled,
+            )
+        except Exception as e:
+            # mọi lỗi (kể cả từ generator record) đều phải báo, nếu không progress / nút export bị kẹt
+            self.failed.emit(str(e) or type(e).__name__)
+            return
+        self.finished.emit(written, completed)
+
+    def report(self, written, total):
+        self.progress.emit(written, min(100, written * 100 // max(total, 1)))
+
+
+def start_export(records, total, path, parent=None):
+    """Tạo worker + QThread, trả về (thread, worker); caller nối signal rồi gọi thread.start()"""
+    thread = QThread(parent)
+    worker = RequestExportWorker(records, total, path)
+    worker.moveToThread(thread)
+    thread.started.connect(worker.run)
+    worker.finished.connect(thread.quit)
+    worker.failed.connect(thread.quit)
+    thread.finished.connect(worker.deleteLater)
+    thread.finished.connect(thread.deleteLater)
+    return thread, worker
@@ -0,0 +1,348 @@
+"""
+Index phụ và ngôn ngữ lọc cho các request bắt được (không phụ thuộc Qt).
+
+Cú pháp: các điều kiện cách nhau bởi khoảng trắng, tất cả phải đúng (AND), "-" ở đầu để phủ định:
+    host:cdn status:>=400 size:>100k type:image -method:OPTIONS time:>1s google
+- host:<chuỗi con>            method:<GET|POST...>      url:<chuỗi con> (hoặc chữ không có field)
+- page:<chuỗi con>            host của trang (first-party) đã tạo ra request
+- status:<mã>|4xx|pending|<op><mã>
+- type:<chuỗi con của MIME>|image|script|css|font|json|html|media|unknown
+- size:<op><số>[b|k|kb|m|mb|g|gb]   time:<op><số>[ms|s]   (op: > >= < <= =, bỏ trống là =)
+Giá trị có khoảng trắng đặt trong "...".
+"""
+import re
+import shlex
+import threading
+import urllib.parse
+
+# vị trí các trường trong record của 1 request
+URL, HOST, STATUS, MIME, METHOD, SIZE, DURATION, PAGE = range(8)
+FIELDS = {
+    "url": URL, "host": HOST, "domain": HOST, "status": STATUS, "type": MIME, "mime": MIME,
+    "method": METHOD, "size": SIZE, "time": DURATION, "duration": DURATION, "page": PAGE,
+}
+# các trường có index key -> set id (size / time index theo bucket log2)
+INDEXED = (HOST, STATUS, MIME, METHOD, SIZE, DURATION, PAGE)
+BUCKETED = (SIZE, DURATION)
+
+TYPE_ALIASES = {
+    "image": ("image/",), "img": ("image/",),
+    "script": ("javascript", "ecmascript"), "js": ("javascript", "ecmascript"),
+    "css": ("css",), "style": ("css",),
+    "font": ("font",),
+    "json": ("json",), "xhr": ("json", "xml"),
+    "html": ("html",), "doc": ("html",), "document": ("html",),
+    "media": ("video/", "audio/"),
+}
+SIZE_UNITS = {"": 1, "b": 1, "k": 1024, "kb": 1024, "m": 1024 ** 2, "mb": 1024 ** 2, "g": 1024 ** 3, "gb": 1024 ** 3}
+TIME_UNITS = {"": 1, "ms": 1, "s": 1000}
+COMPARISON = re.compile(r"^(>=|<=|>|<|=)?\s*(\d+(?:\.\d+)?)\s*([a-z]*)$")
+OPERATORS = {
+    ">": lambda a, b: a > b, ">=": lambda a, b: a >= b,
+    "<": lambda a, b: a < b, "<=": lambda a, b: a <= b,
+    "=": lambda a, b: a == b,
+}
+
+
+def url_host(url):
+    """hostname viết thường ("" nếu không có)"""
+    if not url:
+        return ""
+    try:
+        return (urllib.parse.urlsplit(url).hostname or "").lower()
+    except ValueError:
+        return ""
+
+
+def request_record(request):
+    """Các giá trị được index của 1 request"""
+    return (
+        request.url.lower(),
+        url_host(request.url),
+        request.status_code or 0,  # 0 = chưa có response
+        (request.mime_type or "").lower(),
+        (request.method or "").upper(),
+        request.response_size or 0,
+        request.duration,
+        url_host(request.first_party_url),
+    )
+
+
+def bucket(value):
+    """Bucket log2 cho size / duration: bucket b chứa [2^(b-1), 2^b), None = chưa xong"""
+    if value is None:
+        return None
+    return int(value).bit_length()
+
+
+def bucket_bounds(key):
+    if key == 0:
+        return 0, 1  # duration < 1ms cũng rơi vào bucket 0
+    return 2 ** (key - 1), 2 ** key
+
+
+class Term:
+    """1 điều kiện field:value; test(value) kiểm tra trên giá trị của trường"""
+
+    def __init__(self, field, test, negate=False, operator=None, operand=None):
+        self.field = field
+        self.test = test
+        self.negate = negate
+        # size / time: toán tử so sánh, dùng để nhận / bỏ cả bucket; chuỗi con: "in"
+        self.operator = operator
+        self.operand = operand
+
+    def matches(self, record):
+        value = record[self.field]
+        return (value is not None and self.test(value)) != self.negate
+
+    def bucket_state(self, key):
+        """True: cả bucket khớp, False: không phần tử nào khớp, None: phải xét từng request"""
+        lo, hi = bucket_bounds(key)  # [lo, hi)
+        if self.operator == "=":
+            return None if lo <= self.operand < hi else False
+        at_lo, near_hi = self.test(lo), self.test(hi - 1e-9)
+        if at_lo and near_hi:
+            return True
+        if not at_lo and not near_hi:
+            return False
+        return None
+
+
+class RequestQuery:
+    """Câu lọc đã parse: các Term nối bằng AND"""
+
+    def __init__(self, text=""):
+        self.text = text
+        self.terms = parse_terms(text)
+
+    def __bool__(self):
+        return bool(self.terms)
+
+    def matches(self, request):
+        record = request_record(request)
+        return all(term.matches(record) for term in self.terms)
+
+
+def _comparison_term(field, value, negate, units):
+    match = COMPARISON.match(value)
+    if not match or match.group(3) not in units:
+        return None
+    operator = match.group(1) or "="
+    operand = float(match.group(2)) * units[match.group(3)]
+    compare = OPERATORS[operator]
+    return Term(field, lambda v: compare(v, operand), negate, operator, operand)
+
+
+def _status_term(value, negate):
+    value = value.lower()
+    if value in ("pending", "0"):
+        return Term(STATUS, lambda v: v == 0, negate)
+    if re.fullmatch(r"[1-5]xx", value):
+        low = int(value[0]) * 100
+        return Term(STATUS, lambda v: low <= v < low + 100, negate)
+    match = COMPARISON.match(value)
+    if not match or match.group(3):
+        return None
+    compare, operand = OPERATORS[match.group(1) or "="], int(float(match.group(2)))
+    return Term(STATUS, lambda v: v != 0 and compare(v, operand), negate)
+
+
+def _type_term(value, negate):
+    value = value.lower()
+    if value == "unknown":
+        return Term(MIME, lambda v: v == "", negate)
+    patterns = TYPE_ALIASES.get(value, (value,))
+    return Term(MIME, lambda v: any(p in v for p in patterns), negate)
+
+
+def _substring_term(field, value, negate):
+    value = value.lower()
+    return Term(field, lambda v: value in v, negate, "in", value)
+
+
+def parse_terms(text):
+    """Parse câu lọc; token không hợp lệ được coi là chuỗi con của URL"""
+    try:
+        tokens = shlex.split(text)
+    except ValueError:
+        tokens = text.split()  # thiếu dấu " đóng
+    terms = []
+    for token in tokens:
+        negate = token.startswith("-") and len(token) > 1
+        body = token[1:] if negate else token
+        name, sep, value = body.partition(":")
+        field = FIELDS.get(name.lower()) if sep else None
+        if field is not None and not value:
+            continue  # "status:" đang gõ dở: chưa lọc gì
+        term = None
+        if field is not None and value:
+            if field == STATUS:
+                term = _status_term(value, negate)
+            elif field == MIME:
+                term = _type_term(value, negate)
+            elif field == SIZE:
+                term = _comparison_term(SIZE, value.lower(), negate, SIZE_UNITS)
+            elif field == DURATION:
+                term = _comparison_term(DURATION, value.lower(), negate, TIME_UNITS)
+            elif field == METHOD:
+                method = value.upper()
+                term = Term(METHOD, lambda v: v == method, negate)
+            else:
+                term = _substring_term(field, value, negate)
+        if term is None:
+            if negate and not sep:
+                term = _substring_term(URL, body, True)
+            else:
+                term = _substring_term(URL, token, False)
+        terms.append(term)
+    return terms
+
+
+class RequestIndex:
+    """
+    Index phụ trên các request đang giữ: mỗi trường (host, status, MIME, method, bucket size,
+    bucket duration) là dict key -> set id. Câu lọc được trả lời bằng cách hợp các set của những
+    key khớp (số key khác nhau ít hơn nhiều so với số request) rồi giao các điều kiện với nhau,
+    bắt đầu từ set nhỏ nhất; chỉ điều kiện URL và bucket ở biên mới phải xét từng request.
+    """
+
+    def __init__(self):
+        self.records = {}  # id -> record
+        self.indexes = {field: {} for field in INDEXED}
+        self.keys_version = 0  # tăng khi xuất hiện status / MIME mới (để cập nhật combo lọc)
+        self.lock = threading.RLock()
+
+    def _keys(self, record):
+        for field in INDEXED:
+            value = record[field]
+            yield field, bucket(value) if field in BUCKETED else value
+
+    def _link(self, request_id, record):
+        for field, key in self._keys(record):
+            ids = self.indexes[field].get(key)
+            if ids is None:
+                ids = self.indexes[field][key] = set()
+                if field in (STATUS, MIME):
+                    self.keys_version += 1
+            ids.add(request_id)
+
+    def _unlink(self, request_id, record):
+        for field, key in self._keys(record):
+            index = self.indexes[field]
+            ids = index.get(key)
+            if ids is not None:
+                ids.discard(request_id)
+                if not ids:
+                    del index[key]
+                    if field in (STATUS, MIME):
+                        self.keys_version += 1
+
+    def add(self, request):
+        """Index request mới; trả về record của nó"""
+        with self.lock:
+            record = request_record(request)
+            self.records[request.request_id] = record
+            self._link(request.request_id, record)
+            return record
+
+    def update(self, request):
+        """
+        Request vừa có response / IP: chuyển sang các key mới.
+        Trả về (record cũ, record mới), None nếu request không còn hoặc không đổi gì.
+        """
+        with self.lock:
+            old = self.records.get(request.request_id)
+            if old is None:
+                return None
+            record = request_record(request)
+            if record == old:
+                return None
+            self._unlink(request.request_id, old)
+            self.records[request.request_id] = record
+            self._link(request.request_id, record)
+            return old, record
+
+    def remove(self, request):
+        """Bỏ request khỏi index; trả về record của nó (None nếu không có)"""
+        with self.lock:
+            record = self.records.pop(request.request_id, None)
+            if record is not None:
+                self._unlink(request.request_id, record)
+            return record
+
+    def clear(self):
+        with self.lock:
+            self.records = {}
+            self.indexes = {field: {} for field in INDEXED}
+            self.keys_version += 1
+
+    def keys(self, field):
+        with self.lock:
+            return sorted(key for key in self.indexes[field] if key is not None)
+
+    def ids_for(self, field, key):
+        with self.lock:
+            return set(self.indexes[field].get(key, ()))
+
+    def _estimate(self, term):
+        """Số id khớp term tính từ kích thước các set (không cần hợp set)"""
+        index = self.indexes[term.field]
+        if term.field in BUCKETED:
+            return sum(len(ids) for key, ids in index.items()
+                       if key is not None and term.bucket_state(key) is not False)
+        return sum(len(ids) for key, ids in index.items() if term.test(key))
+
+    def _filter(self, ids, term):
+        """Lọc ids bằng giá trị trong record (rẻ hơn hợp set khi ids đã nhỏ)"""
+        records = self.records
+        if term.operator == "in" and not term.negate:
+            needle, field = term.operand, term.field
+            return {i for i in ids if needle in records[i][field]}
+        return {i for i in ids if term.matches(records[i])}
+
+    def _term_ids(self, term):
+        """Các id khớp term (chưa tính phủ định)"""
+        index = self.indexes[term.field]
+        ids = set()
+        if term.field in BUCKETED:
+            for key, bucket_ids in index.items():
+                if key is None:
+                    continue
+                state = term.bucket_state(key)
+                if state is True:
+                    ids |= bucket_ids
+                elif state is None:
+                    ids.update(i for i in bucket_ids if term.test(self.records[i][term.field]))
+        else:
+            for key, key_ids in index.items():
+                if term.test(key):
+                    ids |= key_ids
+        return ids
+
+    def evaluate(self, query):
+        """Set id các request khớp câu lọc"""
+        with self.lock:
+            indexed = sorted(
+                ((self._estimate(t), t) for t in query.terms if t.field != URL and not t.negate),
+                key=lambda item: item[0],
+            )
+            if indexed:
+                result = self._term_ids(indexed[0][1])
+                for estimate, term in indexed[1:]:
+                    if not result:
+                        break
+                    if estimate > 4 * len(result):
+                        result = self._filter(result, term)  # term ít chọn lọc: xét trực tiếp
+                    else:
+                        result &= self._term_ids(term)
+            else:
+                result = set(self.records)
+            for term in query.terms:
+                if not result:
+                    break
+                if term.field == URL:
+                    result = self._filter(result, term)
+                elif term.negate:
+                    result -= self._term_ids(term)
+            return result
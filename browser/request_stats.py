@@ -0,0 +1,176 @@
+import math
+import threading
+
+from browser.request_query import DURATION, HOST, MIME, PAGE, SIZE, STATUS
+
+
+class LatencyHistogram:
+    """
+    Histogram thời gian (ms) theo bucket log: mỗi khoảng [2^e, 2^(e+1)) chia SUB_BUCKETS phần đều nhau,
+    sai số tương đối của percentile ≤ 1/SUB_BUCKETS. Khác t-digest, bỏ 1 giá trị ra được (request bị
+    đẩy khỏi buffer) và gộp 2 histogram chỉ là cộng từng bucket.
+    """
+    SUB_BUCKETS = 16
+    MAX_EXPONENT = 24  # 2^24 ms ≈ 4.6 giờ, lâu hơn thì dồn vào bucket cuối
+    SIZE = 1 + MAX_EXPONENT * SUB_BUCKETS
+
+    def __init__(self):
+        self.counts = [0] * self.SIZE
+        self.total = 0
+
+    @classmethod
+    def bucket(cls, value):
+        if value < 1:
+            return 0
+        mantissa, exponent = math.frexp(value)  # value = mantissa * 2^exponent, mantissa ∈ [0.5, 1)
+        index = 1 + (exponent - 1) * cls.SUB_BUCKETS + int((mantissa * 2 - 1) * cls.SUB_BUCKETS)
+        return min(index, cls.SIZE - 1)
+
+    @classmethod
+    def bucket_value(cls, index):
+        """Giá trị đại diện (giữa bucket)"""
+        if index == 0:
+            return 0.5
+        exponent, sub = divmod(index - 1, cls.SUB_BUCKETS)
+        return 2 ** exponent * (1 + (sub + 0.5) / cls.SUB_BUCKETS)
+
+    def record(self, value, count=1):
+        """Thêm (count > 0) hoặc bỏ (count < 0) giá trị"""
+        self.counts[self.bucket(value)] += count
+        self.total += count
+
+    def merge(self, other):
+        for index, count in enumerate(other.counts):
+            if count:
+                self.counts[index] += count
+        self.total += other.total
+
+    def percentile(self, p):
+        """Giá trị ở percentile p (0-100), None nếu chưa có dữ liệu"""
+        if self.total <= 0:
+            return None
+        target = max(1, math.ceil(self.total * p / 100))
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= target:
+                return self.bucket_value(index)
+        return self.bucket_value(self.SIZE - 1)
+
+
+class RequestStats:
+    """Số liệu cộng dồn của 1 nhóm request; mỗi lần thêm / bỏ 1 request là O(1)"""
+
+    def __init__(self):
+        self.count = 0
+        self.finished = 0
+        self.total_size = 0
+        self.total_time = 0.0
+        self.status_codes = {}
+        self.mime_types = {}
+        self.latency = LatencyHistogram()
+
+    def apply(self, record, sign):
+        """Cộng (sign = 1) hoặc trừ (sign = -1) phần đóng góp của 1 record"""
+        self.count += sign
+        self.total_size += sign * record[SIZE]
+        _bump(self.status_codes, record[STATUS], sign)
+        _bump(self.mime_types, record[MIME], sign)
+        duration = record[DURATION]
+        if duration is not None:
+            self.finished += sign
+            self.total_time += sign * duration
+            self.latency.record(duration, sign)
+
+    def merge(self, other):
+        self.count += other.count
+        self.finished += other.finished
+        self.total_size += other.total_size
+        self.total_time += other.total_time
+        for key, value in other.status_codes.items():
+            _bump(self.status_codes, key, value)
+        for key, value in other.mime_types.items():
+            _bump(self.mime_types, key, value)
+        self.latency.merge(other.latency)
+
+    def to_dict(self):
+        """Cùng dạng với NetworkMonitor.get_statistics (status 0 = pending, MIME "" = unknown bị bỏ)"""
+        if self.count <= 0:
+            return {}
+        total_time = max(self.total_time, 0.0)  # cộng trừ float lâu ngày có thể lệch âm 1 chút
+        return {
+            'total_requests': self.count,
+            'finished_requests': self.finished,
+            'total_size': self.total_size,
+            'total_time': total_time,
+            'average_time': total_time / self.finished if self.finished else 0,
+            'p50': self.latency.percentile(50),
+            'p90': self.latency.percentile(90),
+            'p99': self.latency.percentile(99),
+            'status_codes': {code: n for code, n in self.status_codes.items() if code},
+            'mime_types': {mime: n for mime, n in self.mime_types.items() if mime},
+        }
+
+
+def _bump(counts, key, delta):
+    value = counts.get(key, 0) + delta
+    if value:
+        counts[key] = value
+    else:
+        counts.pop(key, None)
+
+
+class TrafficStats:
+    """
+    Số liệu cho toàn bộ request đang giữ, theo từng host và theo từng trang (first-party).
+    NetworkMonitor gọi apply khi thêm / cập nhật / đẩy ra request (từ nhiều thread nên có lock).
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.clear()
+
+    def clear(self):
+        with self.lock:
+            self.total = RequestStats()
+            self.hosts = {}  # host -> RequestStats
+            self.pages = {}  # host của trang -> RequestStats
+
+    def apply(self, record, sign):
+        with self.lock:
+            self.total.apply(record, sign)
+            _apply_group(self.hosts, record[HOST], record, sign)
+            _apply_group(self.pages, record[PAGE], record, sign)
+
+    def update(self, old, new):
+        with self.lock:
+            for record, sign in ((old, -1), (new, 1)):
+                self.total.apply(record, sign)
+                _apply_group(self.hosts, record[HOST], record, sign)
+                _apply_group(self.pages, record[PAGE], record, sign)
+
+    def summary(self, host=None, page=None):
+        """Thống kê tổng, hoặc của 1 host / 1 trang"""
+        with self.lock:
+            if host is not None:
+                stats = self.hosts.get(host)
+            elif page is not None:
+                stats = self.pages.get(page)
+            else:
+                stats = self.total
+            return stats.to_dict() if stats is not None else {}
+
+    def top_hosts(self, limit=10):
+        """Các host nhiều request nhất: [(host, số request)]"""
+        with self.lock:
+            ranked = sorted(self.hosts.items(), key=lambda item: item[1].count, reverse=True)
+            return [(host, stats.count) for host, stats in ranked[:limit]]
+
+
+def _apply_group(groups, key, record, sign):
+    stats = groups.get(key)
+    if stats is None:
+        stats = groups[key] = RequestStats()
+    stats.apply(record, sign)
+    if stats.count <= 0:
+        del groups[key]
@@ -0,0 +1,121 @@
+import threading
+from collections import deque
+
+
+class RequestStore:
+    """
+    Lưu các NetworkRequest gần nhất trong ring buffer dung lượng cố định (không phụ thuộc Qt).
+    - id tăng dần, không bao giờ dùng lại → id → slot tính trực tiếp: (id - 1) % capacity
+    - thêm / bỏ request cũ nhất đều O(1), dung lượng lớn không làm chậm
+    - URL → các id (cũ → mới) để tìm request theo URL kể cả khi 1 URL được tải nhiều lần
+    Interceptor thêm request từ IO thread còn GUI đọc từ main thread nên các thao tác đều giữ lock.
+    """
+
+    def __init__(self, capacity=1000):
+        if capacity < 1:
+            raise ValueError("capacity must be positive")
+        self.capacity = capacity
+        self.slots = [None] * capacity
+        self.first_id = 1  # id cũ nhất còn giữ
+        self.next_id = 1   # id cho request tiếp theo
+        self.url_ids = {}  # url -> deque id tăng dần
+        self.lock = threading.RLock()
+
+    def __len__(self):
+        return self.next_id - self.first_id
+
+    def __iter__(self):
+        """Duyệt từ cũ tới mới trên 1 bản chụp (request mới thêm trong lúc duyệt không ảnh hưởng)"""
+        return iter(self.snapshot())
+
+    def __contains__(self, request_id):
+        return self.first_id <= request_id < self.next_id
+
+    def snapshot(self):
+        with self.lock:
+            start = (self.first_id - 1) % self.capacity
+            count = len(self)
+            end = start + count
+            if end <= self.capacity:
+                return self.slots[start:end]
+            return self.slots[start:] + self.slots[:end - self.capacity]
+
+    def append(self, request):
+        """Gán id cho request và lưu lại; trả về request cũ nhất bị đẩy ra (None nếu chưa đầy)"""
+        with self.lock:
+            evicted = None
+            if len(self) == self.capacity:
+                evicted = self._pop_oldest()
+            request.request_id = self.next_id
+            self.slots[(self.next_id - 1) % self.capacity] = request
+            self.next_id += 1
+            ids = self.url_ids.get(request.url)
+            if ids is None:
+                ids = self.url_ids[request.url] = deque()
+            ids.append(request.request_id)
+            return evicted
+
+    def _pop_oldest(self):
+        slot = (self.first_id - 1) % self.capacity
+        request = self.slots[slot]
+        self.slots[slot] = None
+        ids = self.url_ids.get(request.url)
+        if ids:
+            ids.popleft()  # id cũ nhất của URL này chính là request đang bỏ
+            if not ids:
+                del self.url_ids[request.url]
+        self.first_id += 1
+        return request
+
+    def get(self, request_id):
+        """Request theo id (None nếu đã bị đẩy ra hoặc chưa có)"""
+        with self.lock:
+            if request_id not in self:
+                return None
+            return self.slots[(request_id - 1) % self.capacity]
+
+    def ids_for_url(self, url):
+        with self.lock:
+            return list(self.url_ids.get(url, ()))
+
+    def latest_for_url(self, url):
+        """Request mới nhất của URL"""
+        with self.lock:
+            ids = self.url_ids.get(url)
+            return self.get(ids[-1]) if ids else None
+
+    def clear(self):
+        """Xóa hết; id vẫn tăng tiếp để không trùng với request cũ còn được tham chiếu"""
+        with self.lock:
+            self.slots = [None] * self.capacity
+            self.first_id = self.next_id
+            self.url_ids = {}
+
+    def resize(self, capacity):
+        """Đổi dung lượng, giữ lại các request mới nhất; trả về list request bị bỏ"""
+        if capacity < 1:
+            raise ValueError("capacity must be positive")
+        with self.lock:
+            evicted = []
+            while len(self) > capacity:
+                evicted.append(self._pop_oldest())
+            requests = self.snapshot()
+            self.capacity = capacity
+            self.slots = [None] * capacity
+            for request in requests:
+                self.slots[(request.request_id - 1) % capacity] = request
+            return evicted
+
+
+def sync_window(first_id, next_id, store_first, store_next):
+    """
+    So các id [first_id, next_id) mà view đang hiện với store hiện tại [store_first, store_next).
+    Trả về (removed, first_id, next_id): số dòng đầu phải bỏ và các id còn hiện sau khi bỏ;
+    các id [next_id, store_next) là dòng mới phải thêm vào cuối.
+    """
+    removed = max(0, min(store_first, next_id) - first_id)
+    first_id += removed
+    if store_first > first_id:
+        # store đã bỏ cả những request view chưa kịp hiện (clear / đẩy ra nhiều hơn 1 frame)
+        first_id = next_id = store_first
+    return removed, first_id, next_id
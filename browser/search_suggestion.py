@@ -1,69 +1,148 @@
 from PyQt5.QtWidgets import QCompleter
 from PyQt5.QtCore import *
 from browser.google_suggest import *
+from browser.history_manager import normalize_url
+from browser.suggest_index import SuggestIndex
+from browser.suggest_providers import (
+    DatabaseProvider, FuzzyProvider, LocalIndexProvider, OpenTabsProvider, QueryLogProvider, RemoteSuggestProvider,
+)
+
+
+def dedupe_key(text):
+    """Key để gộp trùng: "https://www.a.com/" và "a.com" là 1 (từ khóa tìm kiếm không phân biệt hoa thường)"""
+    return normalize_url(text).lower()
+
+
 class SearchSuggestionManager:
+    """
+    Gộp gợi ý từ nhiều nguồn (provider) cho thanh địa chỉ:
+    - mỗi lần gõ hỏi mọi provider cùng lúc; mỗi provider tra cứu ở worker thread riêng
+      (BackgroundProvider) và trả về qua signal, GUI thread chỉ gộp kết quả
+      (riêng gợi ý từ server có trong cache thì trả ngay)
+    - điểm = weight của provider * RANK_DECAY^thứ hạng, trùng nhau (theo dedupe_key) giữ điểm cao nhất
+    - tới DEADLINE_MS thì hiện những gì đã có, kết quả về sau được gộp thêm vào
+    """
+    DEADLINE_MS = 50
+    RANK_DECAY = 0.9
+    MAX_SUGGESTIONS = 15
+
     def __init__(self, address_bar, history_manager, bookmark_manager):
         self.address_bar = address_bar
         self.history_manager = history_manager
         self.bookmark_manager = bookmark_manager
 
-        self.google_provider = GoogleSuggestProvider()
-        self.google_provider.suggestions_ready.connect(self.on_google_suggestions)
-
-        self.pending_keyword = ""
-        self.timer = QTimer()
-        self.timer.setSingleShot(True)
-        self.timer.timeout.connect(self.fetch_google)
-
-
+        # index prefix trong RAM cho history + bookmark, tự cập nhật qua listener của 2 manager;
+        # nạp ở thread nền để mở cửa sổ không phải chờ dựng trie
+        self.suggest_index = SuggestIndex()
+        self.suggest_index.load_in_background(history_manager, bookmark_manager)
+
+        # file gợi ý offline (data/suggestions.sug) nếu có, không thì Google
+        self.google_provider = create_suggest_provider()
+        self.query_log = QueryLogProvider(history_manager.storage)
+        self.providers = []
+        self.add_provider(LocalIndexProvider(self.suggest_index))
+        self.add_provider(FuzzyProvider(self.suggest_index))
+        self.add_provider(DatabaseProvider(history_manager, bookmark_manager))
+        self.add_provider(self.query_log)
+        self.add_provider(RemoteSuggestProvider(self.google_provider))
+
+        self.request_id = 0
+        self.results = {}       # dedupe_key -> (score, text)
+        self.pending = set()    # provider chưa trả lời request hiện tại
+        self.shown = False      # đã qua deadline → kết quả mới hiện luôn
+        self.deadline = QTimer()
+        self.deadline.setSingleShot(True)
+        self.deadline.timeout.connect(self.on_deadline)
 
         self.model = QStringListModel()
         self.completer = QCompleter(self.model)
         self.completer.setCaseSensitivity(Qt.CaseInsensitive)
         self.completer.setFilterMode(Qt.MatchContains)
+        # danh sách đã được các provider lọc / xếp hạng (kể cả gợi ý sai chính tả như
+        # "githbu" → github.com), completer không lọc lại theo chuỗi con
+        self.completer.setCompletionMode(QCompleter.UnfilteredPopupCompletion)
 
         self.address_bar.setCompleter(self.completer)
 
         # lắng nghe khi user gõ
         self.address_bar.textEdited.connect(self.update_suggestions)
+        # lưu từ khóa (không phải URL) vào query log khi Enter
+        self.address_bar.returnPressed.connect(self.record_query)
+
+    def add_provider(self, provider):
+        self.providers.append(provider)
+        provider.results_ready.connect(
+            lambda request_id, results, provider=provider: self.on_provider_results(provider, request_id, results)
+        )
+
+    def add_tabs_provider(self, list_tabs):
+        """Thêm nguồn gợi ý từ các tab đang mở (gọi sau khi đã có TabManager)"""
+        self.add_provider(OpenTabsProvider(list_tabs))
 
     def update_suggestions(self, text):
+        self.request_id += 1
+        self.results = {}
+        self.shown = False
         if not text or len(text) < 2:
+            self.deadline.stop()
+            self.pending = set()
+            for provider in self.providers:
+                provider.cancel()
             self.model.setStringList([])
             return
 
-        suggestions = []
-
-        # 1️⃣ Offline suggestions
-        for title, url in self.bookmark_manager.search(text):
-            suggestions.append(url)
-
-        for title, url in self.history_manager.search(text):
-            if url not in suggestions:
-                suggestions.append(url)
-
-        # show offline immediately
+        self.pending = set()
+        for provider in self.providers:
+            results = provider.query(self.request_id, text)
+            if results is None:
+                self.pending.add(provider)
+            else:
+                self.merge(provider, results)
+
+        if self.pending:
+            self.deadline.start(self.DEADLINE_MS)
+        else:
+            self.on_deadline()
+
+    def merge(self, provider, results):
+        for rank, text in enumerate(results):
+            score = provider.weight * self.RANK_DECAY ** rank
+            key = dedupe_key(text)
+            current = self.results.get(key)
+            if current is None or score > current[0]:
+                self.results[key] = (score, text)
+
+    def on_provider_results(self, provider, request_id, results):
+        if request_id != self.request_id:
+            return  # kết quả cho lần gõ trước
+        self.pending.discard(provider)
+        self.merge(provider, results)
+        if self.shown:
+            self.show_results()
+        elif not self.pending:
+            self.deadline.stop()
+            self.on_deadline()
+
+    def on_deadline(self):
+        self.shown = True
+        self.show_results()
+
+    def show_results(self):
+        ranked = sorted(self.results.values(), key=lambda item: item[0], reverse=True)
+        suggestions = [text for _, text in ranked[:self.MAX_SUGGESTIONS]]
         self.model.setStringList(suggestions)
 
-        # 2️⃣ Schedule Google suggest (debounce)
-        self.pending_keyword = text
-        self.timer.start(300)  # 300ms
-    
-    def fetch_google(self):
-        self.google_provider.fetch(self.pending_keyword)
-
-    def on_google_suggestions(self, google_list):
-        current = self.model.stringList()
-
-        for s in google_list:
-            if s not in current:
-                current.append(s)
-
-        self.model.setStringList(current)
-
         # ⭐ BẮT BUỘC: show popup
-        if current:
+        if suggestions and self.address_bar.hasFocus():
             self.completer.complete()
 
+    def record_query(self):
+        text = self.address_bar.text().strip()
+        # chỉ lưu từ khóa tìm kiếm, URL đã có trong history
+        if text and "." not in text and not text.startswith(("http://", "https://")):
+            self.query_log.record(text)
 
-
+    def close(self):
+        """Dừng các provider (worker phải dừng trước khi đóng storage) và lưu cache gợi ý"""
+        for provider in self.providers:
+            provider.close()
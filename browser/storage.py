@@ -0,0 +1,178 @@
+import os
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+
+def default_db_path():
+    """data/MiniBrowser.db cùng cấp với thư mục browser"""
+    project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    return os.path.join(project_root, "data", "MiniBrowser.db")
+
+
+class StorageEngine:
+    """
+    Lớp lưu trữ dùng chung cho HistoryManager / BookmarkManager:
+    - 1 connection ghi (thuộc GUI thread) + pool connection chỉ đọc cho thread nền
+    - WAL và các pragma đã tinh chỉnh cho mọi connection
+    - migration có version cho từng thành phần (bảng schema_versions)
+    """
+    # pragma áp dụng cho mọi connection
+    PRAGMAS = (
+        "PRAGMA synchronous = NORMAL",      # an toàn khi dùng WAL, bớt fsync mỗi commit
+        "PRAGMA cache_size = -16000",       # ~16MB page cache
+        "PRAGMA mmap_size = 268435456",     # đọc qua mmap tới 256MB
+        "PRAGMA temp_store = MEMORY",
+        "PRAGMA busy_timeout = 5000",
+    )
+    STATEMENT_CACHE_SIZE = 256  # số prepared statement sqlite3 giữ lại mỗi connection
+    READER_POOL_SIZE = 4
+
+    _instances = {}
+    _instances_lock = threading.Lock()
+
+    @classmethod
+    def get(cls, db_path=None):
+        """Lấy engine dùng chung cho 1 file DB (mỗi file chỉ có 1 engine)"""
+        db_path = os.path.abspath(db_path or default_db_path())
+        with cls._instances_lock:
+            engine = cls._instances.get(db_path)
+            if engine is None or engine.closed:
+                engine = cls(db_path)
+                cls._instances[db_path] = engine
+            return engine
+
+    def __init__(self, db_path=None):
+        self.db_path = os.path.abspath(db_path or default_db_path())
+        os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+        self.owner_thread = threading.get_ident()
+        self.closed = False
+
+        self.conn = sqlite3.connect(self.db_path, cached_statements=self.STATEMENT_CACHE_SIZE)
+        self.enable_incremental_vacuum()  # trước WAL: file mới chưa có header thì không cần VACUUM
+        self.conn.execute("PRAGMA journal_mode = WAL")
+        self._apply_pragmas(self.conn)
+        self.conn.execute("""
+        CREATE TABLE IF NOT EXISTS schema_versions (
+            component TEXT PRIMARY KEY,
+            version INTEGER NOT NULL
+        )
+        """)
+        self.conn.commit()
+
+        self._readers = queue.LifoQueue()
+        self._reader_count = 0
+        self._reader_lock = threading.Lock()
+
+    def _apply_pragmas(self, conn):
+        for pragma in self.PRAGMAS:
+            conn.execute(pragma)
+
+    def enable_incremental_vacuum(self):
+        """
+        Bật auto_vacuum=INCREMENTAL. DB mới có hiệu lực ngay; DB cũ cần VACUUM 1 lần,
+        việc này để lúc thoát (close → convert_auto_vacuum), không chặn lúc khởi động
+        """
+        if self.conn.execute("PRAGMA auto_vacuum").fetchone()[0] != 2:  # 2 = INCREMENTAL
+            self.conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+        self.needs_vacuum = self.conn.execute("PRAGMA auto_vacuum").fetchone()[0] != 2
+
+    def convert_auto_vacuum(self, conn):
+        """
+        VACUUM 1 lần để DB cũ chuyển sang INCREMENTAL. VACUUM giữ khóa ghi suốt lúc chạy nên chỉ gọi
+        khi không còn ai ghi (close, sau khi các writer nền đã dừng)
+        """
+        if not self.needs_vacuum:
+            return False
+        conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+        conn.execute("VACUUM")
+        self.needs_vacuum = False
+        return True
+
+    def incremental_vacuum(self, pages=None, conn=None):
+        """Trả lại tối đa `pages` trang trống (None = tất cả); conn: connection của thread gọi"""
+        conn = conn or self.conn
+        if pages is None:
+            conn.execute("PRAGMA incremental_vacuum").fetchall()
+        else:
+            conn.execute(f"PRAGMA incremental_vacuum({int(pages)})").fetchall()
+
+    # ---------- migrations ----------
+    def migrate(self, component, steps):
+        """
+        Chạy các bước migration chưa áp dụng của 1 thành phần.
+        steps[i] là hàm nhận connection, đưa schema từ version i lên i + 1;
+        mỗi bước phải idempotent (có thể bị chạy lại nếu app tắt giữa chừng).
+        """
+        row = self.conn.execute(
+            "SELECT version FROM schema_versions WHERE component = ?", (component,)
+        ).fetchone()
+        version = row[0] if row else 0
+        for index in range(version, len(steps)):
+            steps[index](self.conn)
+            self.conn.execute(
+                "INSERT INTO schema_versions (component, version) VALUES (?, ?) "
+                "ON CONFLICT(component) DO UPDATE SET version = excluded.version",
+                (component, index + 1),
+            )
+            self.conn.commit()
+        return len(steps)
+
+    # ---------- connections ----------
+    def connect(self):
+        """Mở 1 connection ghi mới cho thread nền (thread đó tự đóng)"""
+        conn = sqlite3.connect(self.db_path, cached_statements=self.STATEMENT_CACHE_SIZE)
+        self._apply_pragmas(conn)
+        return conn
+
+    def _open_reader(self):
+        conn = sqlite3.connect(
+            f"file:{self.db_path}?mode=ro", uri=True,
+            check_same_thread=False,  # đi qua pool nên có thể đổi thread giữa các lần dùng
+            cached_statements=self.STATEMENT_CACHE_SIZE,
+        )
+        self._apply_pragmas(conn)
+        return conn
+
+    @contextmanager
+    def reader(self):
+        """Mượn 1 connection chỉ đọc từ pool (chờ nếu pool đã dùng hết)"""
+        try:
+            conn = self._readers.get_nowait()
+        except queue.Empty:
+            with self._reader_lock:
+                can_open = self._reader_count < self.READER_POOL_SIZE
+                if can_open:
+                    self._reader_count += 1
+            conn = self._open_reader() if can_open else self._readers.get()
+        try:
+            yield conn
+        finally:
+            if conn.in_transaction:
+                conn.rollback()
+            self._readers.put(conn)
+
+    @contextmanager
+    def read(self):
+        """Connection để đọc: connection chính nếu đang ở GUI thread, ngược lại lấy từ pool"""
+        if threading.get_ident() == self.owner_thread:
+            yield self.conn
+        else:
+            with self.reader() as conn:
+                yield conn
+
+    def close(self):
+        if self.closed:
+            return
+        self.closed = True
+        while True:
+            try:
+                self._readers.get_nowait().close()
+            except queue.Empty:
+                break
+        try:
+            self.convert_auto_vacuum(self.conn)
+        except sqlite3.Error as e:
+            print("StorageEngine: VACUUM failed:", e)  # thử lại lần thoát sau
+        self.conn.close()
@@ -0,0 +1,134 @@
+import json
+import os
+import time
+import urllib.parse
+from collections import OrderedDict
+
+
+def normalize_query(query):
+    """Key của cache: chữ thường, bỏ khoảng trắng thừa"""
+    return " ".join(query.lower().split())
+
+
+def suggest_url(endpoint, keyword):
+    """URL hỏi server gợi ý cho keyword (endpoint có thể đã có sẵn query string)"""
+    separator = "&" if "?" in endpoint else "?"
+    return endpoint + separator + urllib.parse.urlencode({"q": keyword})
+
+
+def parse_response(data):
+    """
+    Body server trả về dạng ["query", ["gợi ý 1", ...], ...] → (query, [gợi ý...]).
+    None nếu body sai dạng (không được đưa vào cache).
+    """
+    try:
+        json_data = json.loads(data)
+    except (UnicodeDecodeError, ValueError):
+        return None
+    if not isinstance(json_data, list) or len(json_data) < 2:
+        return None
+    query, suggestions = json_data[0], json_data[1]
+    if not isinstance(query, str):
+        return None
+    if not isinstance(suggestions, list) or not all(isinstance(s, str) for s in suggestions):
+        return None
+    return query, suggestions
+
+
+def _parse_entry(item):
+    """[key, saved_at, [gợi ý...]] đọc từ file; None nếu sai dạng (file bị sửa tay / phiên bản khác)"""
+    if not isinstance(item, list) or len(item) != 3:
+        return None
+    key, saved_at, suggestions = item
+    if not isinstance(key, str) or isinstance(saved_at, bool) or not isinstance(saved_at, (int, float)):
+        return None
+    if not isinstance(suggestions, list) or not all(isinstance(s, str) for s in suggestions):
+        return None
+    return normalize_query(key), float(saved_at), suggestions
+
+
+class SuggestCache:
+    """
+    Cache LRU có TTL cho danh sách gợi ý từ server (key = query đã chuẩn hóa).
+    Có thể lưu ra file JSON để dùng lại sau khi mở lại trình duyệt.
+    """
+
+    def __init__(self, max_entries=500, ttl=6 * 60 * 60, path=None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.path = path
+        self.entries = OrderedDict()  # query -> (saved_at, suggestions), cũ nhất trước
+        self.dirty = False
+        if path:
+            self.load()
+
+    def _fresh(self, saved_at):
+        # time.time() (không phải monotonic) để còn đúng sau khi khởi động lại
+        return time.time() - saved_at < self.ttl
+
+    def get(self, query):
+        """Danh sách gợi ý còn hạn cho đúng query, None nếu chưa có / hết hạn"""
+        key = normalize_query(query)
+        item = self.entries.get(key)
+        if item is None:
+            return None
+        if not self._fresh(item[0]):
+            del self.entries[key]
+            self.dirty = True
+            return None
+        self.entries.move_to_end(key)
+        return item[1]
+
+    def get_prefix(self, query, min_length=2):
+        """
+        Gợi ý của prefix dài nhất đã cache, lọc lại theo query đầy đủ.
+        Dùng tạm trong lúc chờ request mới; None nếu không có prefix nào.
+        """
+        key = normalize_query(query)
+        for end in range(len(key) - 1, min_length - 1, -1):
+            suggestions = self.get(key[:end])
+            if suggestions is not None:
+                return [s for s in suggestions if normalize_query(s).startswith(key)]
+        return None
+
+    def put(self, query, suggestions):
+        key = normalize_query(query)
+        self.entries[key] = (time.time(), list(suggestions))
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+        self.dirty = True
+
+    def clear(self):
+        self.entries.clear()
+        self.dirty = True
+
+    # ---------- lưu file ----------
+    def load(self):
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                items = json.load(f)
+        except (OSError, ValueError):
+            return  # file hỏng thì bỏ qua, cache sẽ được ghi lại
+        if not isinstance(items, list):
+            return
+        for item in items[-self.max_entries:]:
+            entry = _parse_entry(item)
+            if entry is not None and self._fresh(entry[1]):
+                key, saved_at, suggestions = entry
+                self.entries[key] = (saved_at, suggestions)
+
+    def save(self):
+        """Ghi cache ra file (chỉ khi có thay đổi), ghi file tạm rồi thay thế"""
+        if not self.path or not self.dirty:
+            return
+        items = [[key, saved_at, suggestions]
+                 for key, (saved_at, suggestions) in self.entries.items() if self._fresh(saved_at)]
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(items, f, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
+        self.dirty = False
@@ -0,0 +1,35 @@
+import time
+
+
+class AdaptiveDebounce:
+    """
+    Thời gian chờ trước khi hỏi server, tự chỉnh theo nhịp gõ và độ trễ server:
+    chờ lâu hơn khoảng cách giữa 2 phím một chút (để không gửi request giữa chừng từ),
+    cộng thêm 1 phần độ trễ server (server chậm thì request gửi sớm cũng dễ bị bỏ).
+    """
+    MIN_MS = 80
+    MAX_MS = 500
+    DEFAULT_MS = 300
+    SMOOTHING = 0.3
+    PAUSE_MS = 1500  # khoảng nghỉ dài hơn mức này không tính vào nhịp gõ
+
+    def __init__(self):
+        self.cadence_ms = None  # EWMA khoảng cách giữa 2 lần gõ
+        self.last_keystroke = None
+
+    def record_keystroke(self):
+        now = time.monotonic()
+        if self.last_keystroke is not None:
+            interval = (now - self.last_keystroke) * 1000
+            if interval < self.PAUSE_MS:
+                if self.cadence_ms is None:
+                    self.cadence_ms = interval
+                else:
+                    self.cadence_ms += self.SMOOTHING * (interval - self.cadence_ms)
+        self.last_keystroke = now
+
+    def interval_ms(self, latency_ms=None):
+        if self.cadence_ms is None:
+            return self.DEFAULT_MS
+        delay = self.cadence_ms * 1.3 + 0.25 * (latency_ms or 0)
+        return int(min(self.MAX_MS, max(self.MIN_MS, delay)))
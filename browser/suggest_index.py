@@ -0,0 +1,406 @@
+import heapq
+import re
+import sqlite3
+import threading
+import unicodedata
+from datetime import datetime, timezone
+
+from browser.fuzzy_index import FUZZY_PENALTY, TrigramIndex
+from browser.history_manager import TIMESTAMP_FORMAT, frecency_add, visit_score
+
+MAX_KEY_LENGTH = 64      # chỉ index tối đa 64 ký tự đầu của mỗi key
+MAX_TITLE_WORDS = 8
+BOOKMARK_BONUS = 3.0     # cộng vào điểm (dạng log) của URL đã bookmark ≈ x20 lượt truy cập
+
+_SCHEME_RE = re.compile(r"^[a-z][a-z0-9+.-]*://")
+_WORD_RE = re.compile(r"[^\W_]+")
+
+
+def fold(text):
+    """Chữ thường + bỏ dấu ("Việt Nam" -> "viet nam") để gõ không dấu vẫn khớp"""
+    text = unicodedata.normalize("NFKD", text.lower()).replace("đ", "d")
+    return "".join(ch for ch in text if not unicodedata.combining(ch))
+
+
+def strip_url(url):
+    """Bỏ scheme và "www." để "git" khớp với "https://www.github.com" """
+    url = _SCHEME_RE.sub("", fold(url))
+    return url[4:] if url.startswith("www.") else url
+
+
+def index_keys(url, title):
+    """Các key của 1 URL: URL rút gọn, hostname và các từ trong title"""
+    stripped = strip_url(url)
+    keys = {stripped[:MAX_KEY_LENGTH], stripped.split("/", 1)[0][:MAX_KEY_LENGTH]}
+    for word in _WORD_RE.findall(fold(title or ""))[:MAX_TITLE_WORDS]:
+        if len(word) >= 2:
+            keys.add(word[:MAX_KEY_LENGTH])
+    keys.discard("")
+    return tuple(keys)
+
+
+class _Node:
+    __slots__ = ("children", "urls", "top")
+
+    def __init__(self):
+        self.children = {}
+        self.urls = None  # set URL có key kết thúc đúng tại nút này
+        self.top = None   # [(score, url)] giảm dần của cả nhánh; None = cần tính lại
+
+
+class _Entry:
+    __slots__ = ("url", "title", "frecency", "bookmarked", "keys", "score")
+
+    def __init__(self, url):
+        self.url = url
+        self.title = ""
+        self.frecency = None
+        self.bookmarked = False
+        self.keys = ()
+        self.score = None
+
+
+class SuggestIndex:
+    """
+    Prefix index trong RAM cho gợi ý ở thanh địa chỉ (thay cho 2 query LIKE mỗi phím gõ).
+    - trie theo ký tự; mỗi nút cache top-K của cả nhánh nên trả lời 1 prefix chỉ là đi
+      xuống len(prefix) nút rồi đọc list có sẵn
+    - thêm / tăng điểm cập nhật cache dọc đường đi; xóa / giảm điểm chỉ đánh dấu nút
+      cần tính lại (tính lười khi có query, từ top-K của các nút con)
+    - giới hạn bộ nhớ theo số nút; vượt ngưỡng thì bỏ các URL điểm thấp nhất
+    - kèm TrigramIndex trên hostname / từ trong title để gợi ý cả khi gõ sai ("githbu")
+    - nạp từ DB ở thread nền (load_in_background), xong thì tính sẵn top-K của mọi nút
+    Provider tra cứu ở worker thread còn listener cập nhật ở GUI thread nên các method public giữ lock.
+    """
+
+    def __init__(self, max_nodes=300_000, top_k=10):
+        self.max_nodes = max_nodes
+        self.top_k = top_k
+        self.root = _Node()
+        self.node_count = 1
+        self.entries = {}     # url -> _Entry
+        self.fuzzy = TrigramIndex()
+        self._cold = []       # heap (score, url) để chọn URL bị loại, có thể chứa bản cũ
+        self._pending_events = None  # đang nạp: thay đổi từ listener được giữ lại tới khi nạp xong
+        self._events_lock = threading.Lock()  # riêng cho _pending_events: GUI không phải chờ lock khi đang nạp
+        self.lock = threading.RLock()
+
+    # ---------- nạp / theo dõi ----------
+    def load(self, history_manager=None, bookmark_manager=None):
+        """Nạp từ DB (bookmark trước, rồi history theo frecency giảm dần) và đăng ký nhận thay đổi"""
+        self._begin_load(history_manager, bookmark_manager)
+        self._load_rows(history_manager, bookmark_manager)
+
+    def load_in_background(self, history_manager=None, bookmark_manager=None):
+        """
+        Như load nhưng đọc DB và dựng trie ở thread riêng (đọc qua connection pool), GUI không phải chờ.
+        Trong lúc nạp complete() trả về kết quả của phần đã nạp.
+        """
+        self._begin_load(history_manager, bookmark_manager)
+        thread = threading.Thread(
+            target=self._load_rows, args=(history_manager, bookmark_manager),
+            name="SuggestIndexLoader", daemon=True,
+        )
+        thread.start()
+        return thread
+
+    def _begin_load(self, history_manager, bookmark_manager):
+        # đăng ký listener ở thread gọi, sự kiện tới trước khi nạp xong được áp dụng sau
+        with self._events_lock:
+            self._pending_events = []
+        if bookmark_manager is not None:
+            bookmark_manager.add_listener(self.on_bookmark_event)
+        if history_manager is not None:
+            history_manager.add_listener(self.on_history_event)
+
+    def _load_rows(self, history_manager, bookmark_manager):
+        try:
+            if bookmark_manager is not None:
+                with bookmark_manager.storage.read() as conn:
+                    for title, url in conn.execute("SELECT title, url FROM bookmarks ORDER BY id DESC"):
+                        self.add(url, title, bookmarked=True, maintain_top=False)
+            if history_manager is not None:
+                with history_manager.storage.read() as conn:
+                    for title, url, frecency in conn.execute(
+                        "SELECT title, url, frecency FROM urls ORDER BY frecency DESC"
+                    ):
+                        if self.node_count >= self.max_nodes:
+                            break  # phần còn lại là URL ít dùng nhất
+                        self.add(url, title, frecency=frecency, maintain_top=False)
+        except sqlite3.Error as e:
+            print("SuggestIndex: load failed:", e)
+        finally:
+            with self.lock:
+                self._evict()
+                # tính top-K từ dưới lên 1 lần: query không bao giờ phải tính lười sau khi nạp
+                self._compute_top(self.root)
+            self._apply_pending_events()
+
+    def _apply_pending_events(self):
+        while True:
+            with self._events_lock:
+                events, self._pending_events = self._pending_events, ([] if self._pending_events else None)
+            if not events:
+                return
+            with self.lock:
+                for handler, event, args in events:
+                    handler(event, *args, deferred=True)
+
+    def _defer(self, handler, event, args):
+        """Đang nạp thì giữ sự kiện lại, trả về True nếu đã giữ"""
+        with self._events_lock:
+            if self._pending_events is None:
+                return False
+            self._pending_events.append((handler, event, args))
+            return True
+
+    def on_history_event(self, event, *args, deferred=False):
+        if not deferred and self._defer(self.on_history_event, event, args):
+            return
+        with self.lock:
+            if event == "visit":
+                title, url, timestamp, typed = args
+                entry = self.entries.get(url)
+                frecency = frecency_add(entry.frecency if entry else None, timestamp, typed)
+                self.add(url, title or (entry.title if entry else ""), frecency=frecency)
+            elif event == "url_changed":
+                url, title, frecency = args  # frecency None = URL không còn trong history
+                self.add(url, title, frecency=frecency)
+            elif event == "cleared":
+                for entry in list(self.entries.values()):
+                    self.add(entry.url, entry.title, frecency=None)
+
+    def on_bookmark_event(self, event, *args, deferred=False):
+        if not deferred and self._defer(self.on_bookmark_event, event, args):
+            return
+        with self.lock:
+            if event == "added":
+                title, url = args
+                self.add(url, title, bookmarked=True)
+            elif event == "removed":
+                (url,) = args
+                if url in self.entries:
+                    self.add(url, self.entries[url].title, bookmarked=False)
+            elif event == "updated":
+                old_url, title, url = args
+                if old_url != url and old_url in self.entries:
+                    self.add(old_url, self.entries[old_url].title, bookmarked=False)
+                self.add(url, title, bookmarked=True)
+            elif event == "cleared":
+                for entry in list(self.entries.values()):
+                    if entry.bookmarked:
+                        self.add(entry.url, entry.title, bookmarked=False)
+
+    # ---------- cập nhật ----------
+    @staticmethod
+    def _score(entry):
+        if entry.frecency is None and not entry.bookmarked:
+            return None
+        score = entry.frecency
+        if score is None:
+            # bookmark chưa từng mở: coi như 1 lượt truy cập lúc nạp
+            score = visit_score(datetime.now(timezone.utc).strftime(TIMESTAMP_FORMAT))
+        return score + BOOKMARK_BONUS if entry.bookmarked else score
+
+    def add(self, url, title, frecency=..., bookmarked=None, maintain_top=True):
+        """Thêm / cập nhật 1 URL (frecency=None để bỏ phần history, bookmarked=False để bỏ sao)"""
+        with self.lock:
+            entry = self.entries.get(url)
+            if entry is None:
+                entry = _Entry(url)
+            if frecency is not ...:
+                entry.frecency = frecency
+            if bookmarked is not None:
+                entry.bookmarked = bookmarked
+            old_keys = entry.keys
+            entry.title = title or entry.title
+            entry.score = self._score(entry)
+            if entry.score is None:
+                self.remove(url)
+                return
+
+            new_keys = index_keys(url, entry.title)
+            for key in old_keys:
+                if key not in new_keys:
+                    self._remove_key(key, url)
+            for key in new_keys:
+                self._insert_key(key, url, entry.score, maintain_top)
+            entry.keys = new_keys
+            self.entries[url] = entry
+            heapq.heappush(self._cold, (entry.score, url))
+            if self.node_count > self.max_nodes:
+                self._evict()
+
+    def remove(self, url):
+        with self.lock:
+            entry = self.entries.pop(url, None)
+            if entry is None:
+                return
+            for key in entry.keys:
+                self._remove_key(key, url)
+
+    def clear(self):
+        with self.lock:
+            self.root = _Node()
+            self.node_count = 1
+            self.entries.clear()
+            self.fuzzy.clear()
+            self._cold = []
+
+    def _insert_key(self, key, url, score, maintain_top):
+        if self._is_term(key):
+            self.fuzzy.add(key, url)
+        node = self.root
+        self._update_top(node, url, score, maintain_top)
+        for ch in key:
+            child = node.children.get(ch)
+            if child is None:
+                child = node.children[ch] = _Node()
+                child.top = [] if maintain_top else None
+                self.node_count += 1
+            node = child
+            self._update_top(node, url, score, maintain_top)
+        if node.urls is None:
+            node.urls = set()
+        node.urls.add(url)
+
+    def _update_top(self, node, url, score, maintain_top):
+        if node.top is None:
+            return
+        if not maintain_top:
+            node.top = None
+            return
+        top = list(node.top)  # list top có thể dùng chung giữa các nút (xem _compute_top): không sửa tại chỗ
+        for i, (old_score, top_url) in enumerate(top):
+            if top_url == url:
+                if score < old_score and len(top) >= self.top_k and (i == len(top) - 1 or score < top[-1][0]):
+                    # giảm điểm xuống cuối cache: URL khác ngoài cache có thể phải vào thay
+                    node.top = None
+                    return
+                del top[i]
+                break
+        if len(top) < self.top_k or score > top[-1][0]:
+            # chèn giữ thứ tự giảm dần (K nhỏ nên chèn tuyến tính là đủ)
+            i = 0
+            while i < len(top) and top[i][0] >= score:
+                i += 1
+            top.insert(i, (score, url))
+            del top[self.top_k:]
+        node.top = top
+
+    @staticmethod
+    def _is_term(key):
+        # hostname và từ trong title; key URL đầy đủ (có path) chỉ tìm theo prefix
+        return "/" not in key
+
+    def _remove_key(self, key, url):
+        if self._is_term(key):
+            self.fuzzy.remove(key, url)
+        path = [self.root]
+        node = self.root
+        for ch in key:
+            node = node.children.get(ch)
+            if node is None:
+                return
+            path.append(node)
+        if node.urls:
+            node.urls.discard(url)
+            if not node.urls:
+                node.urls = None
+        for n in path:
+            if n.top is not None and any(top_url == url for _, top_url in n.top):
+                n.top = None
+        # bỏ các nút rỗng từ dưới lên
+        for depth in range(len(key), 0, -1):
+            n = path[depth]
+            if n.children or n.urls:
+                break
+            del path[depth - 1].children[key[depth - 1]]
+            self.node_count -= 1
+
+    def _compute_top(self, node):
+        if node.top is not None:
+            return node.top
+        if not node.urls and len(node.children) == 1:
+            # nút giữa 1 chuỗi (phần lớn trie với key URL dài): dùng chung list top của nút con
+            (child,) = node.children.values()
+            node.top = self._compute_top(child)
+            return node.top
+        best = {}
+        for url in node.urls or ():
+            best[url] = self.entries[url].score
+        for child in node.children.values():
+            for score, url in self._compute_top(child):
+                best[url] = score
+        node.top = heapq.nlargest(self.top_k, ((score, url) for url, score in best.items()))
+        return node.top
+
+    def _evict(self):
+        """Bỏ URL điểm thấp nhất tới khi số nút còn ~90% ngân sách"""
+        target = int(self.max_nodes * 0.9)
+        if len(self._cold) > 2 * len(self.entries) + 1024:
+            self._cold = [(e.score, e.url) for e in self.entries.values()]
+            heapq.heapify(self._cold)
+        while self.node_count > target and self._cold:
+            score, url = heapq.heappop(self._cold)
+            entry = self.entries.get(url)
+            if entry is not None and entry.score == score:
+                self.remove(url)
+
+    # ---------- truy vấn ----------
+    def _find(self, prefix):
+        node = self.root
+        for ch in prefix[:MAX_KEY_LENGTH]:
+            node = node.children.get(ch)
+            if node is None:
+                return None
+        return node
+
+    @staticmethod
+    def _matches(entry, word):
+        if len(word) > MAX_KEY_LENGTH:
+            # key chỉ index 64 ký tự đầu → so với cả URL
+            return strip_url(entry.url).startswith(word)
+        return any(key.startswith(word) for key in entry.keys)
+
+    def complete(self, text, limit=5):
+        """Top `limit` (title, url) cho chuỗi người dùng đang gõ, điểm cao trước"""
+        with self.lock:
+            words = strip_url(text.strip()).split()
+            if not words:
+                return []
+            # nhiều từ: ứng viên là hợp top-K của từng từ, giữ lại URL khớp đủ mọi từ
+            candidates = {}
+            for word in words:
+                node = self._find(word)
+                if node is None:
+                    return []
+                for score, url in self._compute_top(node):
+                    candidates[url] = score
+            results = []
+            for url, _ in sorted(candidates.items(), key=lambda item: item[1], reverse=True):
+                entry = self.entries[url]
+                if all(self._matches(entry, word) for word in words):
+                    results.append((entry.title, url))
+                    if len(results) >= limit:
+                        break
+            return results
+
+    def fuzzy_complete(self, text, limit=5):
+        """Gợi ý chịu lỗi gõ theo từ dài nhất trong chuỗi đang gõ, điểm = frecency - phạt mỗi lỗi"""
+        with self.lock:
+            words = strip_url(text.strip()).split()
+            if not words:
+                return []
+            word = max(words, key=len)
+            scored = {}
+            for distance, term_id in self.fuzzy.search(word):
+                for url in self.fuzzy.term_urls[term_id]:
+                    entry = self.entries.get(url)
+                    if entry is None:
+                        continue
+                    score = entry.score - FUZZY_PENALTY * distance
+                    if score > scored.get(url, float("-inf")):
+                        scored[url] = score
+            best = heapq.nlargest(limit, scored.items(), key=lambda item: item[1])
+            return [(self.entries[url].title, url) for url, _ in best]
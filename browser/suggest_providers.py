@@ -0,0 +1,293 @@
+import heapq
+import math
+import sqlite3
+import time
+from datetime import datetime, timezone
+
+from PyQt5.QtCore import QObject, QTimer, pyqtSignal
+
+from browser.history_manager import TIMESTAMP_FORMAT, frecency_add
+from browser.history_writer import HistoryWriter
+from browser.suggest_cache import normalize_query
+from browser.suggest_debounce import AdaptiveDebounce
+from browser.suggest_index import SuggestIndex, fold
+from browser.suggest_worker import OfflineSuggestWorker, SuggestWorker
+
+
+class SuggestionProvider(QObject):
+    """
+    1 nguồn gợi ý cho thanh địa chỉ.
+    query() trả về list gợi ý (tốt nhất trước) nếu có ngay, hoặc None rồi emit
+    results_ready(request_id, list) khi có kết quả. weight dùng khi gộp các nguồn.
+    """
+    results_ready = pyqtSignal(int, list)
+    name = "provider"
+    weight = 1.0
+
+    def query(self, request_id, text):
+        return []
+
+    def cancel(self):
+        """Bỏ việc đang làm cho query cũ (user đã gõ tiếp / xóa hết)"""
+
+    def close(self):
+        pass
+
+
+class BackgroundProvider(SuggestionProvider):
+    """
+    Provider tra cứu ở worker thread riêng (SuggestWorker, chỉ giữ query mới nhất):
+    mỗi provider 1 thread nên các nguồn chạy song song và GUI thread không phải chờ nguồn nào.
+    Lớp con cài search(text) — được gọi ở worker thread, chỉ đọc dữ liệu thread-safe.
+    """
+
+    def __init__(self, worker=None):
+        super().__init__()
+        self.worker = worker if worker is not None else SuggestWorker(self.search)
+        self.worker.results_ready.connect(self.on_worker_results)
+        self.worker.start()  # chờ query đầu tiên, lớp con khởi tạo tiếp sau đó vẫn an toàn
+        self.request_id = None
+        self.text = None
+
+    def search(self, text):
+        return []
+
+    def query(self, request_id, text):
+        self.request_id, self.text = request_id, text
+        self.worker.submit(text)
+        return None
+
+    def on_worker_results(self, text, results):
+        if text == self.text:
+            self.results_ready.emit(self.request_id, results)
+
+    def cancel(self):
+        self.text = None
+
+    def close(self):
+        self.worker.stop()
+
+
+class LocalIndexProvider(BackgroundProvider):
+    """Bookmark + history từ SuggestIndex trong RAM"""
+    name = "local"
+    weight = 1.0
+
+    def __init__(self, suggest_index, limit=10):
+        super().__init__()
+        self.suggest_index = suggest_index
+        self.limit = limit
+
+    def search(self, text):
+        return [url for _, url in self.suggest_index.complete(text, self.limit)]
+
+
+class FuzzyProvider(BackgroundProvider):
+    """Bookmark + history khớp gần đúng (trigram + khoảng cách Damerau), cho trường hợp gõ sai"""
+    name = "fuzzy"
+    weight = 0.6
+
+    def __init__(self, suggest_index, limit=5):
+        super().__init__()
+        self.suggest_index = suggest_index
+        self.limit = limit
+
+    def search(self, text):
+        return [url for _, url in self.suggest_index.fuzzy_complete(text, self.limit)]
+
+
+class DatabaseProvider(BackgroundProvider):
+    """Bookmark + history tìm bằng SQLite (FTS), bắt được URL nằm ngoài index RAM"""
+    name = "database"
+    weight = 0.7
+
+    def __init__(self, history_manager, bookmark_manager, limit=10):
+        super().__init__(OfflineSuggestWorker(history_manager, bookmark_manager, limit))
+
+    def on_worker_results(self, text, results):
+        super().on_worker_results(text, [url for _, url in results])
+
+
+class OpenTabsProvider(BackgroundProvider):
+    """Các tab đang mở (tiêu đề hoặc URL chứa chuỗi đang gõ)"""
+    name = "tabs"
+    weight = 0.9
+
+    def __init__(self, list_tabs, limit=5):
+        super().__init__()
+        self.list_tabs = list_tabs  # callable -> [(title, url)], phải gọi ở GUI thread
+        self.limit = limit
+        self.tabs = []
+
+    def query(self, request_id, text):
+        # chỉ chụp danh sách tab ở GUI thread (đọc widget), so khớp để worker làm
+        self.tabs = list(self.list_tabs())
+        return super().query(request_id, text)
+
+    def search(self, text):
+        needle = fold(text.strip())
+        results = []
+        for title, url in self.tabs:
+            if needle in fold(url) or needle in fold(title):
+                results.append(url)
+                if len(results) >= self.limit:
+                    break
+        return results
+
+
+class RemoteSuggestProvider(SuggestionProvider):
+    """Gợi ý từ server (GoogleSuggestProvider): cache trả ngay, còn lại gửi sau debounce thích ứng"""
+    name = "remote"
+    weight = 0.5
+
+    def __init__(self, google_provider):
+        super().__init__()
+        self.google_provider = google_provider
+        self.google_provider.suggestions_ready.connect(self.on_suggestions)
+        self.debounce = AdaptiveDebounce()
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.timeout.connect(self.fetch)
+        self.request_id = None
+        self.text = None
+
+    def query(self, request_id, text):
+        self.debounce.record_keystroke()
+        self.request_id, self.text = request_id, text
+        cached = self.google_provider.cached(text)
+        if cached is not None:
+            self.timer.stop()
+            return cached
+        self.timer.start(self.debounce.interval_ms(self.google_provider.latency_ms))
+        return None
+
+    def fetch(self):
+        if self.text:
+            self.google_provider.fetch(self.text)
+
+    def on_suggestions(self, keyword, suggestions):
+        # kết quả cho từ user đã gõ qua: bỏ
+        if self.text and normalize_query(keyword) == normalize_query(self.text):
+            self.results_ready.emit(self.request_id, suggestions)
+
+    def cancel(self):
+        self.debounce.record_keystroke()
+        self.text = None
+        self.timer.stop()
+        self.google_provider.cancel()
+
+    def close(self):
+        self.google_provider.save_cache()
+
+
+class QueryLogProvider(BackgroundProvider):
+    """
+    Các từ khóa tìm kiếm user từng gõ ở thanh địa chỉ (lưu trong bảng query_log).
+    Trong RAM là 1 SuggestIndex riêng (key = từ khóa) xếp theo frecency như history,
+    giữ tối đa MAX_QUERIES từ khóa. Ghi DB qua HistoryWriter riêng (không ghi ở GUI thread);
+    từ khóa bị bỏ khỏi RAM cũng bị xóa khỏi DB nên 2 bên luôn cùng 1 tập (frecency cao nhất).
+    """
+    name = "query_log"
+    weight = 0.8
+    MAX_QUERIES = 2000
+
+    def __init__(self, storage, limit=5):
+        super().__init__()
+        self.storage = storage
+        self.limit = limit
+        storage.migrate("query_log", [self.create_table, self.add_frecency_column])
+        self.index = SuggestIndex(max_nodes=200_000)
+        for query, frecency in storage.conn.execute(
+            "SELECT query, frecency FROM query_log ORDER BY frecency DESC LIMIT ?", (self.MAX_QUERIES,)
+        ):
+            self.index.add(query, query, frecency=frecency, maintain_top=False)
+        self.writer = HistoryWriter(storage, write_query_log)
+        self.writer.start()
+
+    def create_table(self, conn):
+        conn.execute("""
+        CREATE TABLE IF NOT EXISTS query_log (
+            query TEXT PRIMARY KEY,
+            count INTEGER NOT NULL DEFAULT 1,
+            last_used REAL NOT NULL
+        )
+        """)
+
+    def add_frecency_column(self, conn):
+        """Lưu frecency (giống điểm trong RAM) để nạp lại và cắt bảng theo cùng tiêu chí"""
+        columns = [row[1] for row in conn.execute("PRAGMA table_info(query_log)")]
+        if "frecency" not in columns:
+            conn.execute("ALTER TABLE query_log ADD COLUMN frecency REAL NOT NULL DEFAULT 0")
+        rows = conn.execute("SELECT query, count, last_used FROM query_log").fetchall()
+        # chỉ có số lần + lần dùng cuối: coi như count lượt cùng lúc last_used
+        conn.executemany("UPDATE query_log SET frecency = ? WHERE query = ?", [
+            (frecency_add(None, _timestamp(last_used)) + math.log(max(count, 1)), query)
+            for query, count, last_used in rows
+        ])
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_query_log_frecency ON query_log(frecency DESC)")
+        # trước đây bảng được cắt theo last_used: cắt lại theo frecency như trong RAM
+        conn.execute(
+            "DELETE FROM query_log WHERE query NOT IN "
+            "(SELECT query FROM query_log ORDER BY frecency DESC LIMIT ?)",
+            (self.MAX_QUERIES,),
+        )
+
+    def record(self, text):
+        """Gọi ở GUI thread: cập nhật index RAM ngay, phần ghi DB đưa cho writer"""
+        query = normalize_query(text)
+        if not query:
+            return
+        now = time.time()
+        with self.index.lock:
+            entry = self.index.entries.get(query)
+            frecency = frecency_add(entry.frecency if entry else None, _timestamp(now))
+            self.index.add(query, query, frecency=frecency)
+        self.writer.enqueue((query, now, frecency))
+        if len(self.index.entries) > self.MAX_QUERIES * 1.1:
+            self.prune()
+
+    def prune(self):
+        """Bỏ các từ khóa điểm thấp nhất cho về MAX_QUERIES, ở cả RAM và DB"""
+        with self.index.lock:
+            extra = len(self.index.entries) - self.MAX_QUERIES
+            removed = [entry.url for entry in heapq.nsmallest(extra, self.index.entries.values(),
+                                                              key=lambda e: e.score)]
+            for query in removed:
+                self.index.remove(query)
+        for query in removed:
+            self.writer.enqueue((query, None, None))
+
+    def search(self, text):
+        prefix = normalize_query(text)
+        results = self.index.complete(prefix, self.limit + 1)
+        return [query for _, query in results if query != prefix][:self.limit]
+
+    def close(self):
+        super().close()
+        self.writer.close()
+        failed, self.writer.failed = self.writer.failed, []
+        if failed:
+            # lần thử cuối trên connection chính, như HistoryManager.close
+            try:
+                with self.storage.conn:
+                    write_query_log(self.storage.conn, failed)
+            except sqlite3.Error as e:
+                print(f"QueryLogProvider: {len(failed)} queries could not be saved:", e)
+
+
+def write_query_log(conn, batch):
+    """Ghi 1 lô (query, last_used, frecency) theo thứ tự; last_used None = xóa query"""
+    for query, last_used, frecency in batch:
+        if last_used is None:
+            conn.execute("DELETE FROM query_log WHERE query = ?", (query,))
+        else:
+            conn.execute(
+                "INSERT INTO query_log (query, count, last_used, frecency) VALUES (?, 1, ?, ?) "
+                "ON CONFLICT(query) DO UPDATE SET count = count + 1, "
+                "last_used = excluded.last_used, frecency = excluded.frecency",
+                (query, last_used, frecency),
+            )
+
+
+def _timestamp(seconds):
+    return datetime.fromtimestamp(seconds, timezone.utc).strftime(TIMESTAMP_FORMAT)
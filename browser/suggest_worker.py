@@ -0,0 +1,74 @@
+import threading
+
+from PyQt5.QtCore import QThread, pyqtSignal
+
+
+class SuggestWorker(QThread):
+    """
+    Chạy search(query) của 1 nguồn gợi ý ở thread riêng.
+    - chỉ giữ query mới nhất đang chờ: gõ nhanh thì các query ở giữa bị bỏ qua
+    - kết quả gửi về GUI thread qua signal (queued connection)
+    """
+    results_ready = pyqtSignal(str, list)  # query, kết quả
+
+    def __init__(self, search=None, parent=None):
+        super().__init__(parent)
+        self.search_function = search
+        self.condition = threading.Condition()
+        self.pending = None
+        self.stopping = False
+
+    def submit(self, query):
+        """Gọi từ GUI thread; ghi đè query đang chờ nếu worker chưa kịp xử lý"""
+        with self.condition:
+            self.pending = query
+            self.condition.notify()
+
+    def stop(self):
+        with self.condition:
+            self.stopping = True
+            self.pending = None
+            self.condition.notify()
+        self.wait()
+
+    def run(self):
+        while True:
+            with self.condition:
+                while self.pending is None and not self.stopping:
+                    self.condition.wait()
+                if self.stopping:
+                    return
+                query, self.pending = self.pending, None
+            try:
+                results = self.search(query)
+            except Exception as e:
+                # vd. sqlite3.Error: trả kết quả rỗng, worker vẫn chạy tiếp cho query sau
+                print(f"{type(self).__name__}: search failed: {e}")
+                results = []
+            self.results_ready.emit(query, results)
+
+    def search(self, query):
+        return self.search_function(query)
+
+
+class OfflineSuggestWorker(SuggestWorker):
+    """
+    Tìm gợi ý offline trong SQLite (FTS history + bookmark) ở thread riêng.
+    Đọc qua StorageEngine.read() → connection chỉ đọc trong pool, không dùng connection của GUI.
+    Kết quả: [(title, url)]
+    """
+
+    def __init__(self, history_manager, bookmark_manager, limit=10, parent=None):
+        super().__init__(parent=parent)
+        self.history_manager = history_manager
+        self.bookmark_manager = bookmark_manager
+        self.limit = limit
+
+    def search(self, query):
+        results = list(self.bookmark_manager.search(query, self.limit))
+        seen = {url for _, url in results}
+        for title, url in self.history_manager.search(query, self.limit):
+            if url not in seen:
+                seen.add(url)
+                results.append((title, url))
+        return results
@@ -2,6 +2,7 @@ from PyQt5.QtCore import *
 from PyQt5.QtWebEngineWidgets import *
 from PyQt5.QtWidgets import *
 from PyQt5.QtGui import *
+from browser.history_manager import normalize_url
 
 class TabManager(QObject):
     tab_changed = pyqtSignal()
@@ -169,7 +170,15 @@ class TabManager(QObject):
 
         # tránh lưu URL rỗng hoặc about:blank
         if url and url not in ("", "about:blank"):
-            self.history_manager.add_entry(title, url)
+            # typed visit chỉ khi trang vừa tải đúng là URL người dùng gõ (dùng 1 lần)
+            typed_url = self.controller.last_typed_url
+            typed = (
+                browser is self.controller.browser and typed_url is not None
+                and normalize_url(typed_url) == normalize_url(url)
+            )
+            if typed:
+                self.controller.last_typed_url = None
+            self.history_manager.add_entry(title, url, typed=typed)
             # print để kiểm tra
             print("Saved history:", title, url)
     
@@ -178,6 +187,10 @@ class TabManager(QObject):
             return self.browsers[self.tab_bar.currentIndex()]
         return None
 
+    def open_tabs(self):
+        """(title, url) của các tab đang mở"""
+        return [(browser.title(), browser.url().toString()) for browser in self.browsers]
+
     def _attach_dark_mode_handler(self, page: QWebEnginePage):
         """Gắn sự kiện để ép dark mode mỗi khi trang load"""
         if not page:
@@ -9,6 +9,7 @@ from browser.bookmark_manager import *
 from browser.bookmark_window import *
 from browser.downloader import *
 from browser.search_suggestion import *
+from browser.storage import StorageEngine
 from browser.theme_manager import ThemeManager
 from browser.settings_window import SettingsWindow
 from browser.network_monitor import NetworkMonitor
@@ -105,8 +106,16 @@ class MiniBrowser(QMainWindow):
             btn_next=btn_next
         )
 
-        self.history_manager = HistoryManager()
-        self.bookmark_manager = BookmarkManager()
+        # 1 storage engine dùng chung cho history + bookmark
+        self.storage = StorageEngine.get()
+        self.history_manager = HistoryManager(storage=self.storage)
+        self.bookmark_manager = BookmarkManager(storage=self.storage)
+
+        # Dọn history định kỳ (archive visits cũ + incremental vacuum), không chạy ngay lúc khởi động
+        self.history_maintenance_timer = QTimer(self)
+        self.history_maintenance_timer.timeout.connect(self.history_manager.run_maintenance)
+        self.history_maintenance_timer.start(60 * 60 * 1000)  # mỗi giờ
+        QTimer.singleShot(30 * 1000, self.history_manager.run_maintenance)
         self.search_suggestion_manager = SearchSuggestionManager(
             self.address_bar,
             self.history_manager,
@@ -138,6 +147,8 @@ class MiniBrowser(QMainWindow):
             self.history_manager,
             self.web_profile
         )
+        # gợi ý ở thanh địa chỉ gồm cả các tab đang mở
+        self.search_suggestion_manager.add_tabs_provider(self.tab_manager.open_tabs)
         # Đảm bảo tất cả tab hiện tại áp dụng trạng thái dark mode web
         self.on_force_web_dark_mode_changed(self.theme_manager.force_web_dark_mode)
 
@@ -199,6 +210,14 @@ class MiniBrowser(QMainWindow):
         # Khi tab mới được chọn hoặc URL thay đổi, update nút bookmark
         self.tab_manager.tab_changed.connect(self.update_bookmark_button)
 
+    def closeEvent(self, event):
+        """Flush các lượt truy cập còn trong hàng đợi trước khi thoát"""
+        self.search_suggestion_manager.close()
+        self.network_monitor.close()
+        self.history_manager.close()
+        self.storage.close()
+        super().closeEvent(event)
+
     #  hàm để mở ra cái history_window
     def open_history_window(self):
         self.history_window = HistoryWindow(self.history_manager)
@@ -263,7 +282,7 @@ class MiniBrowser(QMainWindow):
         title = current_view.title() or url
 
         # Thêm vào database nếu chưa có
-        if not self.bookmark_manager.get_by_url(url):
+        if not self.bookmark_manager.is_bookmarked(url):
             self.bookmark_manager.add_bookmark(title, url)
             QMessageBox.information(self, "Bookmark Added", f"Saved:\n{title}")
 
@@ -277,7 +296,7 @@ class MiniBrowser(QMainWindow):
             return
 
         url = current_view.url().toString()
-        exists = self.bookmark_manager.get_by_url(url)
+        exists = self.bookmark_manager.is_bookmarked(url)
 
         if exists:
             self.btn_bookmark.setText("★")
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# chạy pytest từ bất kỳ đâu vẫn import được package browser
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
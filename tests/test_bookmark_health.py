@@ -0,0 +1,184 @@
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from browser.bookmark_health import BookmarkHealthChecker
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive như server thật
+
+    def log_message(self, *args):
+        pass
+
+    def _reply(self, status, headers=(), body=b""):
+        self.send_response(status)
+        for name, value in headers:
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if self.command != "HEAD":
+            self.wfile.write(body)
+
+    def do_HEAD(self):
+        self.server.methods.append(("HEAD", self.path))
+        if self.path == "/no-head":
+            self._reply(405)
+        else:
+            self.route()
+
+    def do_GET(self):
+        self.server.methods.append(("GET", self.path))
+        self.route()
+
+    def route(self):
+        if self.path in ("/ok", "/no-head"):
+            self._reply(200, body=b"ok")
+        elif self.path == "/missing":
+            self._reply(404)
+        elif self.path == "/moved":
+            self._reply(301, [("Location", "/ok")])
+        elif self.path == "/loop":
+            self._reply(302, [("Location", "/loop")])
+        elif self.path.startswith("/slow"):
+            time.sleep(self.server.delay)
+            self._reply(200)
+        else:
+            self._reply(500)
+
+
+@pytest.fixture
+def server():
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    httpd.daemon_threads = True
+    httpd.methods = []
+    httpd.delay = 0
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    httpd.base = f"http://127.0.0.1:{httpd.server_address[1]}"
+    yield httpd
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def test_ok_and_missing(server):
+    checker = BookmarkHealthChecker()
+    assert checker.check(server.base + "/ok").status == 200
+    result = checker.check(server.base + "/missing")
+    assert result.status == 404
+    assert result.error is None
+
+
+def test_head_falls_back_to_get(server):
+    result = BookmarkHealthChecker().check(server.base + "/no-head")
+    assert result.status == 200
+    assert server.methods == [("HEAD", "/no-head"), ("GET", "/no-head")]
+
+
+def test_redirect_is_followed(server):
+    result = BookmarkHealthChecker().check(server.base + "/moved")
+    assert result.status == 200
+    assert result.final_url == server.base + "/ok"
+
+
+def test_redirect_loop_is_reported(server):
+    result = BookmarkHealthChecker(max_redirects=3).check(server.base + "/loop")
+    assert result.status == 302
+    assert result.error == "too many redirects"
+
+
+def test_timeout(server):
+    server.delay = 1.0
+    result = BookmarkHealthChecker(timeout=0.2).check(server.base + "/slow")
+    assert result.status is None
+    assert result.error
+
+
+def test_unsupported_url():
+    result = BookmarkHealthChecker().check("ftp://example.com/file")
+    assert result.status is None
+    assert result.error == "unsupported URL"
+
+
+def test_check_all_does_not_block_other_hosts(server):
+    # cùng server nhưng 2 "host" khác nhau: 127.0.0.1 (chậm, nhiều bookmark) và localhost (nhanh)
+    server.delay = 0.3
+    port = server.server_address[1]
+    slow = [(i, "", f"http://127.0.0.1:{port}/slow{i}") for i in range(8)]
+    fast = [(100, "", f"http://localhost:{port}/ok")]
+    finished = {}
+    start = time.monotonic()
+
+    checker = BookmarkHealthChecker(max_workers=4, per_host=2)
+    checker.check_all(slow + fast, lambda i, result: finished.setdefault(i, (time.monotonic() - start, result)))
+
+    assert len(finished) == 9
+    assert finished[100][1].status == 200
+    # host nhanh xong trước cả lượt đầu của host chậm
+    assert finished[100][0] < min(t for i, (t, _) in finished.items() if i != 100)
+
+
+def test_check_all_respects_per_host_limit(server):
+    server.delay = 0.05
+    port = server.server_address[1]
+    active = []
+    peak = []
+    lock = threading.Lock()
+    checker = BookmarkHealthChecker(max_workers=8, per_host=2)
+    original = checker.check
+
+    def counting_check(url):
+        with lock:
+            active.append(url)
+            peak.append(len(active))
+        try:
+            return original(url)
+        finally:
+            with lock:
+                active.remove(url)
+
+    checker.check = counting_check
+    bookmarks = [(i, "", f"http://127.0.0.1:{port}/slow{i}") for i in range(10)]
+    results = {}
+    checker.check_all(bookmarks, results.__setitem__)
+    assert len(results) == 10
+    assert max(peak) <= 2
+
+
+def test_check_all_cancel(server):
+    port = server.server_address[1]
+    bookmarks = [(i, "", f"http://127.0.0.1:{port}/ok") for i in range(20)]
+    results = []
+    BookmarkHealthChecker().check_all(bookmarks, lambda i, r: results.append(i), is_cancelled=lambda: len(results) >= 3)
+    assert len(results) == 3
+
+
+def test_check_all_closes_keep_alive_connections(server):
+    port = server.server_address[1]
+    checker = BookmarkHealthChecker(max_workers=4)
+    opened = []
+    original = checker._connection
+
+    def tracking_connection(scheme, netloc):
+        conn = original(scheme, netloc)
+        opened.append(conn)
+        return conn
+
+    checker._connection = tracking_connection
+    checker.check_all([(i, "", f"http://127.0.0.1:{port}/ok") for i in range(6)], lambda i, r: None)
+    assert opened
+    assert all(conn.sock is None for conn in opened)
+    assert checker._thread_connections == []
+
+
+def test_check_all_stops_when_on_result_raises(server):
+    port = server.server_address[1]
+    bookmarks = [(i, "", f"http://127.0.0.1:{port}/ok") for i in range(20)]
+
+    def on_result(i, result):
+        raise RuntimeError("db locked")
+
+    with pytest.raises(RuntimeError):
+        BookmarkHealthChecker().check_all(bookmarks, on_result)
@@ -0,0 +1,151 @@
+import hashlib
+import os
+
+import pytest
+
+from browser.capture_log import CaptureLog, CaptureLogWriter
+
+
+def record(i):
+    return {
+        "request_id": i + 1, "url": f"http://example.com/{i}", "method": "GET",
+        "headers": {"Accept": "*/*"}, "status_code": 200, "duration": 1.5,
+    }
+
+
+def fill(directory, count, **kwargs):
+    log = CaptureLog(str(directory), segment_bytes=2000, **kwargs)
+    for i in range(count):
+        assert log.append(record(i)) == i
+    return log
+
+
+def segment_files(directory):
+    return sorted(name for name in os.listdir(directory) if name.endswith(".seg"))
+
+
+def snapshot(directory):
+    return {name: hashlib.md5((directory / name).read_bytes()).hexdigest() for name in os.listdir(directory)}
+
+
+def test_append_and_read_across_segments(tmp_path):
+    log = fill(tmp_path, 100)
+    assert len(log.segments) > 1
+    assert len(log) == 100
+    records = log.read_range(0, 200)
+    assert [r["request_id"] for r in records] == list(range(1, 101))
+    assert records[5]["headers"] == {"Accept": "*/*"}
+    assert log.read(42)["url"] == "http://example.com/42"
+    assert log.read(100) is None
+    log.close()
+
+
+def test_reopen_continues_sequence(tmp_path):
+    fill(tmp_path, 30).close()
+    log = CaptureLog(str(tmp_path), segment_bytes=2000)
+    assert log.append(record(30)) == 30
+    assert [r["request_id"] for r in log.read_range(28, 5)] == [29, 30, 31]
+    log.close()
+
+
+def test_retention_drops_oldest_segments(tmp_path):
+    log = fill(tmp_path, 200, max_bytes=5000)
+    assert log.total_bytes() <= 5000 + 2000
+    assert log.first_seq > 0
+    assert log.next_seq == 200
+    assert log.read(0) is None
+    assert log.read_range(log.first_seq, 1)[0]["request_id"] == log.first_seq + 1
+    log.close()
+
+
+def test_clear_keeps_sequence(tmp_path):
+    log = fill(tmp_path, 50)
+    log.clear()
+    assert len(log) == 0
+    assert log.append(record(0)) == 50
+    log.close()
+
+
+def test_recovery_truncates_torn_tail(tmp_path):
+    fill(tmp_path, 20).close()
+    last = tmp_path / segment_files(tmp_path)[-1]
+    with open(last, "ab") as f:
+        f.write(b"\x50\x00\x00\x00torn")
+    log = CaptureLog(str(tmp_path), segment_bytes=2000)
+    assert len(log) == 20
+    assert log.append(record(20)) == 20
+    assert log.read(20)["request_id"] == 21
+    log.close()
+
+
+def test_read_only_never_modifies_files(tmp_path):
+    fill(tmp_path, 60).close()
+    segments = segment_files(tmp_path)
+    with open(tmp_path / segments[-1], "ab") as f:
+        f.write(b"\x50\x00\x00\x00torn")
+    os.remove(tmp_path / (segments[0][:-4] + ".idx"))
+    before = snapshot(tmp_path)
+
+    log = CaptureLog(str(tmp_path), read_only=True)
+    assert len(log) == 60
+    assert [r["request_id"] for r in log.read_range(0, 100)] == list(range(1, 61))
+    with pytest.raises(ValueError):
+        log.append(record(0))
+    log.close()
+    assert snapshot(tmp_path) == before
+
+
+def test_read_only_missing_directory(tmp_path):
+    with pytest.raises(OSError):
+        CaptureLog(str(tmp_path / "missing"), read_only=True)
+    assert not (tmp_path / "missing").exists()
+
+
+@pytest.mark.parametrize("read_only", [True, False])
+def test_truncated_sealed_segment_does_not_raise(tmp_path, read_only):
+    fill(tmp_path, 60).close()
+    segments = segment_files(tmp_path)
+    first = tmp_path / segments[0]
+    with open(first, "r+b") as f:
+        f.truncate(first.stat().st_size // 2)
+
+    log = CaptureLog(str(tmp_path), read_only=read_only)
+    second_seq = int(segments[1][:-4])
+    head = log.read_range(0, 100)
+    assert 0 < len(head) < second_seq
+    assert [r["request_id"] for r in head] == list(range(1, len(head) + 1))
+    assert log.next_readable(len(head)) == second_seq
+    assert log.read(second_seq)["request_id"] == second_seq + 1
+    log.close()
+
+
+def test_corrupt_record_in_sealed_segment_stops_read(tmp_path):
+    fill(tmp_path, 60).close()
+    first = tmp_path / segment_files(tmp_path)[0]
+    data = bytearray(first.read_bytes())
+    data[len(data) // 2] ^= 0xFF  # sai CRC ở giữa segment
+    first.write_bytes(bytes(data))
+
+    log = CaptureLog(str(tmp_path), read_only=True)
+    records = log.read_range(0, 100)
+    assert 0 < len(records) < 60
+    assert [r["request_id"] for r in records] == list(range(1, len(records) + 1))
+    log.close()
+
+
+def test_writer_thread_assigns_seqs_and_flushes(tmp_path):
+    log = CaptureLog(str(tmp_path), segment_bytes=2000, max_bytes=None)
+    writer = CaptureLogWriter(log, flush_interval=0.05)
+    writer.start()
+    seqs = {}
+    for i in range(100):
+        writer.write(record(i), lambda seq, i=i: seqs.__setitem__(i, seq))
+    writer.flush()
+    assert seqs == {i: i for i in range(100)}
+    writer.close()
+    writer.write(record(100))  # sau close: bỏ qua, không lỗi
+    log.close()
+
+    reopened = CaptureLog(str(tmp_path), read_only=True)
+    assert len(reopened) == 100
+    reopened.close()
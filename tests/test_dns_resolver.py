@@ -0,0 +1,111 @@
+import socket
+import threading
+import time
+
+import pytest
+
+from browser.dns_resolver import DnsResolver
+
+
+@pytest.fixture
+def lookups(monkeypatch):
+    """Thay gethostbyname: ghi lại host được hỏi, chặn tới khi release được set"""
+    calls = []
+    release = threading.Event()
+    release.set()
+
+    def fake_gethostbyname(host):
+        calls.append(host)
+        release.wait(5)
+        if host.endswith(".invalid"):
+            raise socket.gaierror("Name or service not known")
+        return "10.0.0.%d" % len(calls)
+
+    monkeypatch.setattr("browser.dns_resolver.socket.gethostbyname", fake_gethostbyname)
+    fake_gethostbyname.calls = calls
+    fake_gethostbyname.release = release
+    return fake_gethostbyname
+
+
+def wait_for(results, count):
+    deadline = time.monotonic() + 5
+    while len(results) < count and time.monotonic() < deadline:
+        time.sleep(0.005)
+    return results
+
+
+def test_first_lookup_is_async_then_cached(lookups):
+    resolver = DnsResolver()
+    results = []
+    assert resolver.resolve("example.com", lambda ip, error: results.append((ip, error))) is None
+    assert wait_for(results, 1) == [("10.0.0.1", None)]
+    assert resolver.resolve("example.com", results.append) == ("10.0.0.1", None)
+    assert lookups.calls == ["example.com"]
+    resolver.close()
+
+
+def test_concurrent_requests_share_one_lookup(lookups):
+    lookups.release.clear()
+    resolver = DnsResolver()
+    results = []
+    for i in range(5):
+        assert resolver.resolve("example.com", lambda ip, error, i=i: results.append(i)) is None
+    lookups.release.set()
+    assert sorted(wait_for(results, 5)) == [0, 1, 2, 3, 4]
+    assert lookups.calls == ["example.com"]
+    resolver.close()
+
+
+def test_errors_cached_with_shorter_ttl(lookups):
+    resolver = DnsResolver(ttl=60, negative_ttl=0.05)
+    results = []
+    resolver.resolve("missing.invalid", lambda ip, error: results.append((ip, error)))
+    assert wait_for(results, 1) == [(None, "Name or service not known")]
+    assert resolver.resolve("missing.invalid", results.append) == (None, "Name or service not known")
+    time.sleep(0.1)
+    assert resolver.resolve("missing.invalid", lambda ip, error: results.append((ip, error))) is None
+    wait_for(results, 2)
+    assert lookups.calls == ["missing.invalid", "missing.invalid"]
+    resolver.close()
+
+
+def test_failing_callback_does_not_block_others(lookups):
+    lookups.release.clear()
+    resolver = DnsResolver()
+    results = []
+
+    def broken(ip, error):
+        raise RuntimeError("boom")
+
+    resolver.resolve("example.com", broken)
+    resolver.resolve("example.com", lambda ip, error: results.append(ip))
+    lookups.release.set()
+    assert wait_for(results, 1) == ["10.0.0.1"]
+    resolver.close()
+
+
+def test_cache_evicts_least_recently_used(lookups):
+    resolver = DnsResolver(max_entries=2)
+    results = []
+    for count, host in enumerate(("a.example", "b.example"), 1):
+        resolver.resolve(host, lambda ip, error: results.append(ip))
+        wait_for(results, count)
+    resolver.resolve("a.example", None)  # dùng lại a → b là cũ nhất
+    resolver.resolve("c.example", lambda ip, error: results.append(ip))
+    wait_for(results, 3)
+    assert resolver.resolve("a.example", None) is not None
+    assert resolver.resolve("b.example", lambda ip, error: None) is None
+    resolver.close()
+
+
+def test_close_drops_pending_callbacks(lookups):
+    lookups.release.clear()
+    resolver = DnsResolver()
+    results = []
+    resolver.resolve("example.com", lambda ip, error: results.append(ip))
+    resolver.close()
+    lookups.release.set()
+    time.sleep(0.05)
+    assert results == []
+    assert resolver.resolve("other.example", results.append) is None
+    assert "other.example" not in lookups.calls
@@ -0,0 +1,109 @@
+import pytest
+
+from browser.fuzzy_index import MAX_TERM_LENGTH, TrigramIndex, max_edits, prefix_distance, query_trigrams, term_trigrams
+
+
+@pytest.fixture
+def index():
+    index = TrigramIndex(budget_ms=1000)
+    for term, url in [
+        ("github.com", "https://github.com/"),
+        ("gitlab.com", "https://gitlab.com/"),
+        ("python", "https://docs.python.org/"),
+        ("wikipedia", "https://wikipedia.org/"),
+    ]:
+        index.add(term, url)
+    return index
+
+
+def terms(index, query):
+    return [(distance, index.terms[term_id]) for distance, term_id in index.search(query)]
+
+
+@pytest.mark.parametrize("length, edits", [(1, 0), (2, 0), (3, 1), (7, 1), (8, 2), (20, 2)])
+def test_max_edits(length, edits):
+    assert max_edits(length) == edits
+
+
+@pytest.mark.parametrize("query, term, distance", [
+    ("github", "github.com", 0),
+    ("githbu", "github.com", 1),   # đảo 2 ký tự liền nhau = 1 lỗi
+    ("gthub", "github.com", 1),    # thiếu 1 ký tự
+    ("giithub", "github.com", 1),  # thừa 1 ký tự
+    ("gitxub", "github.com", 1),   # sai 1 ký tự
+    ("gxtxub", "github.com", 2),
+])
+def test_prefix_distance(query, term, distance):
+    assert prefix_distance(query, term, 2) == distance
+
+
+def test_prefix_distance_stops_at_limit():
+    assert prefix_distance("zzzzzz", "github.com", 1) == 2
+
+
+def test_trigrams_mark_word_start_only_for_query():
+    assert query_trigrams("git") == {"$gi", "git"}
+    assert term_trigrams("git") == {"$gi", "git", "it$"}
+
+
+def test_search_finds_typos(index):
+    assert terms(index, "githbu") == [(1, "github.com")]
+    assert terms(index, "pyhton") == [(1, "python")]
+    assert terms(index, "wikipeida") == [(1, "wikipedia")]
+
+
+def test_search_orders_by_distance(index):
+    index.add("gitlub", "https://gitlub.example/")
+    assert terms(index, "gitlub") == [(0, "gitlub"), (1, "github.com"), (1, "gitlab.com")]
+
+
+def test_short_query_is_not_fuzzy(index):
+    assert index.search("gi") == []
+
+
+def test_remove_hides_term_until_re_added(index):
+    index.remove("python", "https://docs.python.org/")
+    assert index.dead_terms == 1
+    assert terms(index, "pyhton") == []
+    index.add("python", "https://python.org/")
+    assert index.dead_terms == 0
+    assert terms(index, "pyhton") == [(1, "python")]
+
+
+def test_term_kept_while_any_url_uses_it(index):
+    index.add("python", "https://python.org/")
+    index.remove("python", "https://docs.python.org/")
+    assert index.term_urls[index.term_ids["python"]] == {"https://python.org/"}
+    assert terms(index, "pyhton") == [(1, "python")]
+
+
+def test_compact_drops_dead_terms(index):
+    index.remove("gitlab.com", "https://gitlab.com/")
+    index.compact()
+    assert index.dead_terms == 0
+    assert "gitlab.com" not in index.term_ids
+    assert terms(index, "githbu") == [(1, "github.com")]
+
+
+def test_many_dead_terms_trigger_compact():
+    index = TrigramIndex()
+    for i in range(2000):
+        index.add(f"term{i:05d}", "https://site.example/")
+    for i in range(1001):
+        index.remove(f"term{i:05d}", "https://site.example/")
+    assert index.dead_terms == 0
+    assert len(index.terms) == 999
+
+
+def test_long_terms_are_truncated():
+    index = TrigramIndex(budget_ms=1000)
+    long_term = "a" * 10 + "b" * 100
+    index.add(long_term, "https://long.example/")
+    assert len(index.terms[0]) == MAX_TERM_LENGTH
+    index.remove(long_term, "https://long.example/")
+    assert index.dead_terms == 1
+
+
+def test_zero_budget_returns_without_error(index):
+    index.budget_ms = 0
+    assert index.search("githbu") in ([], [(1, index.term_ids["github.com"])])
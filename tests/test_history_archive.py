@@ -0,0 +1,130 @@
+import sqlite3
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from browser.history_manager import TIMESTAMP_FORMAT, HistoryManager, record_visits, url_host
+from browser.storage import StorageEngine
+
+
+def days_ago(days, minutes=0):
+    dt = datetime.now(timezone.utc) - timedelta(days=days, minutes=minutes)
+    return dt.strftime(TIMESTAMP_FORMAT)
+
+
+@pytest.fixture
+def history(tmp_path):
+    storage = StorageEngine(str(tmp_path / "test.db"))
+    history = HistoryManager(storage=storage, async_writes=False, retention_days=90,
+                             archive_dir=str(tmp_path / "archive"))
+    yield history
+    history.close()
+    storage.close()
+
+
+def add_visits(history, visits):
+    """visits: [(title, url, timestamp)]"""
+    with history.conn:
+        record_visits(history.conn, [(title, url, url_host(url), ts, False) for title, url, ts in visits])
+
+
+def maintain(history):
+    history.run_maintenance()
+    history.maintenance_thread.join(timeout=30)
+
+
+def all_pages(history, limit=7, **filters):
+    rows, before = [], None
+    while True:
+        page = history.get_page(limit, before=before, **filters)
+        rows.extend(page)
+        if len(page) < limit:
+            return rows
+        before = (page[-1][3], page[-1][0])
+
+
+def test_old_visits_move_to_archive(history):
+    add_visits(history, [(f"Old {i}", f"https://old.example/{i}", days_ago(200 + i)) for i in range(10)])
+    add_visits(history, [(f"New {i}", f"https://new.example/{i}", days_ago(i)) for i in range(5)])
+    maintain(history)
+
+    hot = history.conn.execute("SELECT COUNT(*) FROM visits").fetchone()[0]
+    assert hot == 5
+    assert history.archive.months()
+    # urls giữ nguyên: site cũ vẫn tìm được cho gợi ý
+    assert history.conn.execute("SELECT COUNT(*) FROM urls WHERE host = 'old.example'").fetchone()[0] == 10
+
+
+def test_paging_crosses_hot_archive_boundary(history):
+    add_visits(history, [(f"Page {i}", f"https://site.example/{i}", days_ago(i * 20)) for i in range(20)])
+    maintain(history)
+
+    rows = all_pages(history)
+    timestamps = [row[3] for row in rows]
+    assert len(rows) == 20
+    assert len({row[0] for row in rows}) == 20
+    assert timestamps == sorted(timestamps, reverse=True)
+
+
+def test_keyword_and_host_filters_apply_to_archive(history):
+    add_visits(history, [
+        ("Python docs", "https://docs.python.org/old", days_ago(300)),
+        ("Other", "https://other.example/", days_ago(300, 1)),
+        ("Python news", "https://news.example/python", days_ago(1)),
+    ])
+    maintain(history)
+    assert [row[2] for row in all_pages(history, keyword="python")] == [
+        "https://news.example/python", "https://docs.python.org/old",
+    ]
+    assert [row[2] for row in all_pages(history, host="docs.python.org")] == ["https://docs.python.org/old"]
+
+
+def test_interrupted_move_is_not_shown_twice(history):
+    add_visits(history, [(f"Page {i}", f"https://site.example/{i}", days_ago(100 + i)) for i in range(3)])
+    # giả lập bị ngắt sau khi file archive đã commit nhưng DB chính chưa xóa
+    rows = history.conn.execute("""
+    SELECT v.id, u.url, u.title, u.host, v.timestamp, v.typed FROM visits v JOIN urls u ON u.id = v.url_id
+    """).fetchall()
+    schema = history.archive.attach(rows[0][4][:7])
+    with history.conn:
+        history.conn.executemany(f"INSERT INTO {schema}.visits VALUES (?, ?, ?, ?, ?, ?)", rows[:1])
+    assert len(all_pages(history)) == 3
+
+    maintain(history)
+    assert history.conn.execute("SELECT COUNT(*) FROM visits").fetchone()[0] == 0
+    assert len(all_pages(history)) == 3
+
+
+def test_batch_spanning_many_months(history):
+    # 9 tháng > max_attached (4): chuyển qua nhiều lô
+    add_visits(history, [(f"Page {i}", f"https://site.example/{i}", days_ago(100 + 31 * i)) for i in range(9)])
+    maintain(history)
+    assert history.conn.execute("SELECT COUNT(*) FROM visits").fetchone()[0] == 0
+    assert len(all_pages(history)) == 9
+
+
+def test_delete_archived_visit_updates_url_stats(history):
+    add_visits(history, [
+        ("Site", "https://site.example/", days_ago(200)),
+        ("Site", "https://site.example/", days_ago(1)),
+    ])
+    maintain(history)
+    archived = [row for row in all_pages(history) if row[3] < days_ago(100)]
+    history.delete_entries([archived[0][0]])
+    visit_count = history.conn.execute(
+        "SELECT visit_count FROM urls WHERE url = 'https://site.example/'"
+    ).fetchone()[0]
+    assert visit_count == 1
+    assert len(all_pages(history)) == 1
+
+
+def test_maintenance_error_is_notified(history, monkeypatch):
+    events = []
+    history.add_listener(lambda event, *args: events.append((event, args)))
+
+    def broken(self, cutoff, batch_size):
+        raise sqlite3.OperationalError("database is locked")
+
+    monkeypatch.setattr("browser.history_manager.HistoryArchive.archive_batch", broken)
+    maintain(history)
+    assert events == [("maintenance_failed", ("database is locked",))]
@@ -0,0 +1,95 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from browser.history_manager import TIMESTAMP_FORMAT, HistoryManager, record_visits, url_host
+from browser.storage import StorageEngine
+
+BASE = datetime(2025, 6, 1, 12, 0, tzinfo=timezone.utc)
+
+
+def at(minutes):
+    return (BASE - timedelta(minutes=minutes)).strftime(TIMESTAMP_FORMAT)
+
+
+@pytest.fixture
+def history(tmp_path):
+    storage = StorageEngine(str(tmp_path / "test.db"))
+    history = HistoryManager(storage=storage, async_writes=False, archive_dir=str(tmp_path / "archive"))
+    yield history
+    history.close()
+    storage.close()
+
+
+def add_visits(history, visits):
+    """visits: [(title, url, timestamp)]"""
+    with history.conn:
+        record_visits(history.conn, [(title, url, url_host(url), ts, False) for title, url, ts in visits])
+
+
+def all_pages(history, limit, **filters):
+    pages, before = [], None
+    while True:
+        page = history.get_page(limit, before=before, **filters)
+        pages.append(page)
+        if len(page) < limit:
+            return pages
+        before = (page[-1][3], page[-1][0])
+
+
+def test_pages_are_newest_first_without_gaps(history):
+    add_visits(history, [(f"Page {i}", f"https://site.example/{i}", at(i)) for i in range(25)])
+    pages = all_pages(history, 10)
+    assert [len(page) for page in pages] == [10, 10, 5]
+    urls = [row[2] for page in pages for row in page]
+    assert urls == [f"https://site.example/{i}" for i in range(25)]
+
+
+def test_equal_timestamps_split_by_id(history):
+    # nhiều visit cùng giây: cursor (timestamp, id) không bỏ sót hay lặp dòng nào
+    add_visits(history, [(f"Page {i}", f"https://site.example/{i}", at(0)) for i in range(7)])
+    rows = [row for page in all_pages(history, 3) for row in page]
+    ids = [row[0] for row in rows]
+    assert len(ids) == 7
+    assert ids == sorted(ids, reverse=True)
+
+
+def test_new_visits_do_not_shift_later_pages(history):
+    add_visits(history, [(f"Page {i}", f"https://site.example/{i}", at(i + 10)) for i in range(10)])
+    first = history.get_page(5)
+    # visit mới tới giữa 2 lần tải: khác với OFFSET, trang sau không bị lặp dòng
+    add_visits(history, [("Fresh", "https://fresh.example/", at(0))])
+    second = history.get_page(5, before=(first[-1][3], first[-1][0]))
+    assert {row[0] for row in first}.isdisjoint(row[0] for row in second)
+    assert [row[2] for row in second] == [f"https://site.example/{i}" for i in range(5, 10)]
+
+
+def test_since_until_range(history):
+    add_visits(history, [(f"Page {i}", f"https://site.example/{i}", at(i * 60)) for i in range(10)])
+    # since tính cả mốc đầu, until không tính mốc cuối
+    rows = history.get_page(100, since=BASE - timedelta(hours=5), until=BASE - timedelta(hours=2))
+    assert [row[2] for row in rows] == [f"https://site.example/{i}" for i in (3, 4, 5)]
+
+
+def test_host_filter(history):
+    add_visits(history, [
+        ("A", "https://a.example/1", at(1)),
+        ("B", "https://b.example/1", at(2)),
+        ("A", "https://A.example/2", at(3)),
+    ])
+    rows = [row for page in all_pages(history, 1, host="A.example") for row in page]
+    assert [row[2] for row in rows] == ["https://a.example/1", "https://A.example/2"]
+
+
+def test_keyword_filter_with_paging(history):
+    add_visits(history, [(f"Python tip {i}", f"https://tips.example/{i}", at(i)) for i in range(6)])
+    add_visits(history, [(f"Other {i}", f"https://other.example/{i}", at(i + 100)) for i in range(6)])
+    rows = [row for page in all_pages(history, 4, keyword="pyth") for row in page]
+    assert [row[1] for row in rows] == [f"Python tip {i}" for i in range(6)]
+
+
+def test_timestamp_is_raw_utc(history):
+    add_visits(history, [("Page", "https://site.example/", at(0))])
+    ts = history.get_page(1)[0][3]
+    assert ts == "2025-06-01 12:00:00"
+    assert history.to_local_time(ts) == BASE
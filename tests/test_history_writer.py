@@ -0,0 +1,87 @@
+import sqlite3
+import time
+
+import pytest
+
+from browser.history_writer import HistoryWriter
+from browser.storage import StorageEngine
+
+
+@pytest.fixture
+def storage(tmp_path):
+    storage = StorageEngine(str(tmp_path / "test.db"))
+    storage.conn.execute("CREATE TABLE items (value INTEGER)")
+    storage.conn.commit()
+    yield storage
+    storage.close()
+
+
+def insert_items(conn, batch):
+    conn.executemany("INSERT INTO items VALUES (?)", [(value,) for value in batch])
+
+
+def count(storage):
+    return storage.conn.execute("SELECT COUNT(*) FROM items").fetchone()[0]
+
+
+def test_flush_commits_queued_items(storage):
+    writer = HistoryWriter(storage, insert_items, flush_interval=10)
+    writer.start()
+    for i in range(100):
+        writer.enqueue(i)
+    assert writer.flush() is True
+    assert count(storage) == 100
+    writer.close()
+
+
+def test_transient_error_is_retried(storage):
+    attempts = []
+
+    def flaky(conn, batch):
+        attempts.append(len(batch))
+        if len(attempts) < 3:
+            raise sqlite3.OperationalError("database is locked")
+        insert_items(conn, batch)
+
+    writer = HistoryWriter(storage, flaky)
+    writer.RETRY_DELAY = 0.01
+    writer.start()
+    writer.enqueue(1)
+    writer.close()
+    assert len(attempts) == 3
+    assert count(storage) == 1
+    assert writer.failed == []
+
+
+def test_permanent_error_reports_and_keeps_batch(storage):
+    errors = []
+
+    def broken(conn, batch):
+        raise sqlite3.OperationalError("disk I/O error")
+
+    writer = HistoryWriter(storage, broken, on_error=lambda error, batch: errors.append((str(error), batch)))
+    writer.RETRY_DELAY = 0.01
+    writer.start()
+    writer.enqueue(1)
+    writer.enqueue(2)
+    writer.close()
+    assert errors == [("disk I/O error", [1, 2])]
+    assert writer.failed == [1, 2]
+
+
+def test_flush_does_not_wait_out_retries(storage):
+    def slow_broken(conn, batch):
+        raise sqlite3.OperationalError("database is locked")
+
+    writer = HistoryWriter(storage, slow_broken)
+    writer.RETRY_DELAY = 0.2  # 0.2 + 0.4 + 0.8 + 1.6 giây nếu phải chờ hết
+    writer.start()
+    writer.enqueue(1)
+    start = time.monotonic()
+    assert writer.flush() is False
+    assert time.monotonic() - start < writer.FLUSH_TIMEOUT + 0.1
+    start = time.monotonic()
+    assert writer.flush() is False  # đang thử lại: trả về ngay
+    assert time.monotonic() - start < 0.05
+    writer.close()
+    assert writer.failed == [1]
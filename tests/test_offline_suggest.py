@@ -0,0 +1,80 @@
+import os
+
+import pytest
+
+from browser.offline_suggest import HEADER, OfflineSuggestFile, build, read_corpus
+
+
+@pytest.fixture
+def suggest_file(tmp_path):
+    counts = {f"query {i}": i for i in range(3000)}
+    counts.update({"python tutorial": 50, "python docs": 80, "pythonic": 10, "igi": 5, "igiuyze": 7})
+    path = str(tmp_path / "suggestions.sug")
+    build(counts, path, block_size=8, scan_limit=50)
+    f = OfflineSuggestFile(path)
+    yield f
+    f.close()
+
+
+def test_light_prefix_ranked_by_score(suggest_file):
+    assert suggest_file.query("pyth") == ["python docs", "python tutorial", "pythonic"]
+
+
+def test_heavy_prefix_uses_stored_top(suggest_file):
+    # "query" có 3000 entry > scan_limit: đi qua bảng prefix nặng
+    assert suggest_file.query("query", limit=3) == ["query 2999", "query 2998", "query 2997"]
+    assert suggest_file.query("query 29", limit=2) == ["query 2999", "query 2998"]
+
+
+def test_trailing_space_matches_whole_word(suggest_file):
+    assert suggest_file.query("igi") == ["igiuyze", "igi"]
+    assert suggest_file.query("igi ") == []
+
+
+def test_unknown_and_empty_prefix(suggest_file):
+    assert suggest_file.query("zzz") == []
+    assert suggest_file.query("") == []
+
+
+def test_empty_corpus(tmp_path):
+    path = str(tmp_path / "empty.sug")
+    build({}, path)
+    f = OfflineSuggestFile(path)
+    assert f.query("ab") == []
+    f.close()
+
+
+def test_read_corpus_merges_counts(tmp_path):
+    corpus = tmp_path / "corpus.txt"
+    corpus.write_text("Python\t3\npython\nbad\tx\n\n", encoding="utf-8")
+    assert read_corpus(str(corpus)) == {"python": 4, "bad": 1}
+
+
+@pytest.mark.parametrize("keep", [0, 10, HEADER.size - 1, HEADER.size + 5, 0.5, -1])
+def test_truncated_file_is_rejected_on_open(tmp_path, keep):
+    path = str(tmp_path / "s.sug")
+    build({f"query {i}": i for i in range(500)}, path, scan_limit=20)
+    data = open(path, "rb").read()
+    size = int(len(data) * keep) if isinstance(keep, float) else (len(data) + keep if keep < 0 else keep)
+    with open(path, "wb") as f:
+        f.write(data[:size])
+    with pytest.raises(ValueError):
+        OfflineSuggestFile(path)
+
+
+def test_bad_entry_offset_is_rejected_on_open(tmp_path):
+    path = str(tmp_path / "s.sug")
+    build({f"query {i}": i for i in range(500)}, path, scan_limit=20)
+    with open(path, "r+b") as f:
+        header = list(HEADER.unpack_from(f.read(HEADER.size)))
+        f.seek(header[8])  # bảng block: offset block đầu trỏ ra ngoài vùng dữ liệu
+        f.write((header[8] + 1000).to_bytes(8, "little"))
+    with pytest.raises(ValueError):
+        OfflineSuggestFile(path)
+
+
+def test_wrong_magic(tmp_path):
+    path = tmp_path / "s.sug"
+    path.write_bytes(os.urandom(HEADER.size * 2))
+    with pytest.raises(ValueError):
+        OfflineSuggestFile(str(path))
@@ -0,0 +1,178 @@
+import gzip
+import json
+import os
+
+import pytest
+
+from browser import request_export
+from browser.capture_log import CaptureLog
+from browser.request_export import (
+    capture_log_records, detect_format, export_records, har_entry, json_entry, store_records,
+)
+from browser.request_store import RequestStore
+
+
+def record(i, **fields):
+    data = {
+        "request_id": i + 1, "url": f"https://example.com/item?id={i}&q=a b", "method": "GET",
+        "headers": {"Accept": "*/*"}, "post_data": None, "status_code": 200,
+        "response_headers": {"Content-Type": "text/html"}, "response_size": 512,
+        "start_time": 1_700_000_000.0 + i, "end_time": None, "duration": 12.5, "error": None,
+        "mime_type": "text/html", "ip_address": "10.0.0.1", "first_party_url": "https://example.com/",
+    }
+    data.update(fields)
+    return data
+
+
+class FakeRequest:
+    """Request trong RequestStore: chỉ cần url và to_record()"""
+
+    def __init__(self, i):
+        self.request_id = None
+        self.url = f"https://example.com/{i}"
+        self.headers = {"Accept": "*/*"}
+        self.response_headers = None
+
+    def to_record(self):
+        return record(self.request_id - 1, url=self.url, headers=self.headers,
+                      response_headers=self.response_headers)
+
+
+@pytest.mark.parametrize("path, expected", [
+    ("out.har", ("har", False)),
+    ("out.HAR.gz", ("har", True)),
+    ("out.ndjson", ("ndjson", False)),
+    ("out.json.gz", ("json", True)),
+    ("out.txt", ("json", False)),
+])
+def test_detect_format(path, expected):
+    assert detect_format(path) == expected
+
+
+def test_har_is_valid_and_complete(tmp_path):
+    path = str(tmp_path / "out.har")
+    records = [record(0), record(1, method="POST", post_data="a=1", status_code=302,
+                                response_headers={"Location": "/next"}, error="redirected")]
+    assert export_records(iter(records), path) == (2, True)
+    with open(path, encoding="utf-8") as f:
+        log = json.load(f)["log"]
+    assert log["version"] == "1.2"
+    first, second = log["entries"]
+    assert first["request"]["queryString"] == [{"name": "id", "value": "0"}, {"name": "q", "value": "a b"}]
+    assert first["response"]["statusText"] == "OK"
+    assert first["serverIPAddress"] == "10.0.0.1"
+    assert second["request"]["postData"]["text"] == "a=1"
+    assert second["response"]["redirectURL"] == "/next"
+    assert second["comment"] == "redirected"
+
+
+def test_pending_request_in_har():
+    entry = har_entry(record(0, status_code=None, duration=None, response_size=None, response_headers=None))
+    assert entry["response"]["status"] == 0
+    assert entry["response"]["bodySize"] == -1
+    assert entry["time"] == 0
+
+
+@pytest.mark.parametrize("name", ["out.ndjson", "out.ndjson.gz", "out.json", "out.json.gz"])
+def test_json_formats_round_trip(tmp_path, name):
+    path = str(tmp_path / name)
+    records = [record(i, url=f"https://example.com/việt/{i}") for i in range(3)]
+    export_records(iter(records), path)
+    opener = gzip.open if name.endswith(".gz") else open
+    with opener(path, "rt", encoding="utf-8") as f:
+        text = f.read()
+    if ".ndjson" in name:
+        entries = [json.loads(line) for line in text.splitlines()]
+    else:
+        entries = json.loads(text)
+    assert entries == [json_entry(r) for r in records]
+
+
+def test_empty_export_is_valid(tmp_path):
+    path = str(tmp_path / "out.har")
+    assert export_records(iter(()), path) == (0, True)
+    with open(path, encoding="utf-8") as f:
+        assert json.load(f)["log"]["entries"] == []
+
+
+def test_progress_and_cancel(tmp_path, monkeypatch):
+    monkeypatch.setattr(request_export, "PROGRESS_EVERY", 10)
+    path = str(tmp_path / "out.json")
+    calls = []
+
+    def progress(written, total):
+        calls.append(written)
+
+    assert export_records((record(i) for i in range(25)), path, total=25, progress=progress) == (25, True)
+    assert calls == [10, 20, 25]
+
+    os.remove(path)
+    cancelled = []  # bấm hủy sau lần báo tiến độ đầu tiên: dừng ở lần kiểm tra kế tiếp
+    written, completed = export_records((record(i) for i in range(100)), path,
+                                        progress=lambda written, total: cancelled.append(True),
+                                        is_cancelled=lambda: bool(cancelled))
+    assert (written, completed) == (20, False)
+    assert os.listdir(tmp_path) == []  # không để lại file dở / file tạm
+
+
+def test_failure_keeps_previous_file(tmp_path):
+    path = tmp_path / "out.json"
+    path.write_text("old export", encoding="utf-8")
+
+    def broken():
+        yield record(0)
+        raise OSError("disk full")
+
+    with pytest.raises(OSError):
+        export_records(broken(), str(path))
+    assert path.read_text(encoding="utf-8") == "old export"
+    assert os.listdir(tmp_path) == ["out.json"]
+
+
+def test_unknown_format(tmp_path):
+    with pytest.raises(ValueError):
+        export_records(iter(()), str(tmp_path / "out.json"), fmt="csv")
+
+
+def test_store_records_copy_headers():
+    store = RequestStore(capacity=3)
+    requests = [FakeRequest(i) for i in range(5)]
+    for request in requests:
+        store.append(request)
+    records = list(store_records(store))
+    assert [r["url"] for r in records] == [f"https://example.com/{i}" for i in (2, 3, 4)]
+    records[0]["headers"]["X-Test"] = "1"
+    assert "X-Test" not in requests[2].headers
+    assert records[0]["response_headers"] == {}
+
+
+def test_store_records_skip_evicted_during_export():
+    store = RequestStore(capacity=3)
+    for i in range(3):
+        store.append(FakeRequest(i))
+    records = store_records(store)
+    first = next(records)
+    for i in range(3, 5):
+        store.append(FakeRequest(i))  # GUI thêm request trong lúc đang export
+    assert [first["url"]] + [r["url"] for r in records] == ["https://example.com/0", "https://example.com/2"]
+
+
+def test_capture_log_records_page_through_and_skip_corrupt(tmp_path):
+    log = CaptureLog(str(tmp_path / "capture"), segment_bytes=4000)
+    for i in range(120):
+        log.append(record(i))
+    assert len(log.segments) > 2
+    assert [r["request_id"] for r in capture_log_records(log, page_size=7)] == list(range(1, 121))
+    log.close()
+
+    # segment đầu hỏng ở giữa: phần còn lại vẫn được export
+    first = sorted(name for name in os.listdir(tmp_path / "capture") if name.endswith(".seg"))[0]
+    path = tmp_path / "capture" / first
+    data = bytearray(path.read_bytes())
+    data[len(data) // 2] ^= 0xFF
+    path.write_bytes(bytes(data))
+    log = CaptureLog(str(tmp_path / "capture"), read_only=True)
+    ids = [r["request_id"] for r in capture_log_records(log, page_size=7)]
+    assert 0 < len(ids) < 120
+    assert ids == sorted(ids) and ids[-1] == 120
+    log.close()
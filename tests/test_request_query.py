@@ -0,0 +1,149 @@
+import pytest
+
+from browser.request_query import (
+    DURATION, HOST, MIME, SIZE, STATUS, URL,
+    RequestIndex, RequestQuery, bucket, bucket_bounds, parse_terms,
+)
+
+
+class FakeRequest:
+    """Chỉ có các thuộc tính request_record dùng tới"""
+
+    def __init__(self, request_id, url, status_code=200, mime_type="text/html", method="GET",
+                 response_size=1000, duration=50.0, first_party_url="https://page.example/"):
+        self.request_id = request_id
+        self.url = url
+        self.status_code = status_code
+        self.mime_type = mime_type
+        self.method = method
+        self.response_size = response_size
+        self.duration = duration
+        self.first_party_url = first_party_url
+
+
+REQUESTS = [
+    FakeRequest(1, "https://page.example/", duration=120.0),
+    FakeRequest(2, "https://cdn.example/logo.png", mime_type="image/png", response_size=200 * 1024),
+    FakeRequest(3, "https://cdn.example/app.js", mime_type="application/javascript", response_size=50 * 1024),
+    FakeRequest(4, "https://api.example/data", method="POST", status_code=500, mime_type="application/json",
+                duration=1500.0),
+    FakeRequest(5, "https://api.example/missing", status_code=404, mime_type="", duration=8.0),
+    FakeRequest(6, "https://ads.other/track", status_code=None, mime_type=None, response_size=None,
+                duration=None, first_party_url="https://other.page/"),
+    FakeRequest(7, "https://api.example/data", method="OPTIONS", status_code=204, mime_type="", response_size=0,
+                duration=0.4),
+]
+
+
+@pytest.fixture
+def index():
+    index = RequestIndex()
+    for request in REQUESTS:
+        index.add(request)
+    return index
+
+
+def scan(text):
+    query = RequestQuery(text)
+    return {request.request_id for request in REQUESTS if query.matches(request)}
+
+
+QUERIES = [
+    ("", {1, 2, 3, 4, 5, 6, 7}),
+    ("host:cdn", {2, 3}),
+    ("domain:API.example", {4, 5, 7}),
+    ("-host:api", {1, 2, 3, 6}),
+    ("status:404", {5}),
+    ("status:4xx", {5}),
+    ("status:>=400", {4, 5}),
+    ("status:<300", {1, 2, 3, 7}),  # pending không tính là < 300
+    ("status:pending", {6}),
+    ("-status:pending", {1, 2, 3, 4, 5, 7}),
+    ("type:image", {2}),
+    ("type:script", {3}),
+    ("type:json", {4}),
+    ("type:unknown", {5, 6, 7}),
+    ("mime:html", {1}),
+    ("method:post", {4}),
+    ("-method:OPTIONS", {1, 2, 3, 4, 5, 6}),
+    ("size:>100k", {2}),
+    ("size:>=50kb", {2, 3}),
+    ("size:<1k", {1, 4, 5, 6, 7}),  # k = 1024; chưa có response thì size = 0
+    ("size:1000", {1, 4, 5}),
+    ("time:>1s", {4}),
+    ("time:>=100ms", {1, 4}),
+    ("time:<1", {7}),
+    ("page:other", {6}),
+    ("api data", {4, 7}),
+    ("url:.png", {2}),
+    ("-data", {1, 2, 3, 5, 6}),
+    ("host:api status:>=400 -status:500", {5}),
+    ("cdn type:image size:>100k", {2}),
+]
+
+
+@pytest.mark.parametrize("text, expected", QUERIES)
+def test_matches(text, expected):
+    assert scan(text) == expected
+
+
+@pytest.mark.parametrize("text, expected", QUERIES)
+def test_index_agrees_with_scan(index, text, expected):
+    assert index.evaluate(RequestQuery(text)) == expected
+
+
+def test_invalid_tokens_become_url_substrings():
+    terms = parse_terms("size:huge status:abc foo:bar")
+    assert [term.field for term in terms] == [URL, URL, URL]
+    assert [term.operand for term in terms] == ["size:huge", "status:abc", "foo:bar"]
+
+
+def test_partial_and_quoted_input():
+    assert parse_terms("status:") == []
+    assert [t.operand for t in parse_terms('url:"my file"')] == ["my file"]
+    assert [t.operand for t in parse_terms('url:"unterminated')] == ['"unterminated']
+    assert not RequestQuery("   ")
+
+
+def test_bucket_bounds_cover_value():
+    for value in (0, 0.4, 1, 2, 3, 1000, 1024, 5 * 1024 ** 2):
+        lo, hi = bucket_bounds(bucket(value))
+        assert lo <= value < hi
+    assert bucket(None) is None
+
+
+def test_update_moves_request_between_keys(index):
+    request = REQUESTS[5]
+    assert index.evaluate(RequestQuery("status:pending")) == {6}
+    done = FakeRequest(6, request.url, status_code=200, mime_type="image/gif", response_size=43,
+                       duration=30.0, first_party_url=request.first_party_url)
+    old, new = index.update(done)
+    assert old[STATUS] == 0 and new[STATUS] == 200
+    assert index.evaluate(RequestQuery("status:pending")) == set()
+    assert index.evaluate(RequestQuery("type:image")) == {2, 6}
+    assert index.update(done) is None  # không đổi gì
+
+
+def test_remove_and_clear(index):
+    index.remove(REQUESTS[1])
+    assert index.evaluate(RequestQuery("host:cdn")) == {3}
+    assert "image/png" not in index.keys(MIME)
+    assert index.remove(REQUESTS[1]) is None
+    index.clear()
+    assert index.evaluate(RequestQuery("")) == set()
+    assert index.keys(HOST) == []
+
+
+def test_keys_version_changes_only_for_new_status_or_mime(index):
+    version = index.keys_version
+    index.add(FakeRequest(8, "https://cdn.example/other.png", mime_type="image/png"))
+    assert index.keys_version == version
+    index.add(FakeRequest(9, "https://cdn.example/x", status_code=302, mime_type=""))
+    assert index.keys_version == version + 1
+    assert index.keys(STATUS) == [0, 200, 204, 302, 404, 500]
+
+
+def test_unfinished_request_has_no_duration_bucket(index):
+    assert index.ids_for(DURATION, None) == {6}
+    assert None not in index.keys(DURATION)
+    assert index.ids_for(SIZE, bucket(0)) == {6, 7}
@@ -0,0 +1,116 @@
+import random
+
+import pytest
+
+from browser.request_stats import LatencyHistogram, RequestStats, TrafficStats
+
+
+def record(host, status=200, mime="text/html", size=1000, duration=10.0, page="page.example"):
+    """Record cùng thứ tự trường với request_query.request_record"""
+    return (f"https://{host}/", host, status, mime, "GET", size, duration, page)
+
+
+def exact_percentile(values, p):
+    values = sorted(values)
+    return values[max(1, -(-len(values) * p // 100)) - 1]
+
+
+@pytest.mark.parametrize("value", [1, 1.5, 3, 100, 1000.5, 65535, 2 ** 20])
+def test_bucket_value_within_relative_error(value):
+    estimate = LatencyHistogram.bucket_value(LatencyHistogram.bucket(value))
+    assert abs(estimate - value) / value <= 1 / LatencyHistogram.SUB_BUCKETS
+
+
+def test_sub_millisecond_and_huge_values():
+    histogram = LatencyHistogram()
+    histogram.record(0.2)
+    histogram.record(10 ** 12)  # vượt MAX_EXPONENT: dồn vào bucket cuối, không lỗi
+    assert histogram.percentile(50) == 0.5
+    assert histogram.percentile(100) == LatencyHistogram.bucket_value(LatencyHistogram.SIZE - 1)
+
+
+def test_percentiles_match_exact_values():
+    rng = random.Random(7)
+    values = [rng.lognormvariate(4, 1.2) + 1 for _ in range(5000)]
+    histogram = LatencyHistogram()
+    for value in values:
+        histogram.record(value)
+    for p in (1, 50, 90, 99, 100):
+        exact = exact_percentile(values, p)
+        assert abs(histogram.percentile(p) - exact) / exact <= 1 / LatencyHistogram.SUB_BUCKETS
+
+
+def test_empty_and_removed_values():
+    histogram = LatencyHistogram()
+    assert histogram.percentile(50) is None
+    for value in (10, 20, 5000):
+        histogram.record(value)
+    histogram.record(5000, -1)
+    assert histogram.total == 2
+    assert histogram.percentile(100) < 25
+    histogram.record(10, -1)
+    histogram.record(20, -1)
+    assert histogram.percentile(50) is None
+
+
+def test_merge_equals_recording_both():
+    a, b, both = LatencyHistogram(), LatencyHistogram(), LatencyHistogram()
+    for i in range(1, 200):
+        (a if i % 3 else b).record(i * 7)
+        both.record(i * 7)
+    a.merge(b)
+    assert a.counts == both.counts
+    assert a.total == both.total
+
+
+def test_request_stats_add_and_remove():
+    stats = RequestStats()
+    records = [
+        record("a.example", duration=10.0),
+        record("a.example", status=404, mime="", size=50, duration=30.0),
+        record("b.example", status=0, mime="", size=0, duration=None),  # pending
+    ]
+    for r in records:
+        stats.apply(r, 1)
+    summary = stats.to_dict()
+    assert summary["total_requests"] == 3
+    assert summary["finished_requests"] == 2
+    assert summary["total_size"] == 1050
+    assert summary["average_time"] == 20.0
+    assert summary["status_codes"] == {200: 1, 404: 1}
+    assert summary["mime_types"] == {"text/html": 1}
+
+    for r in records:
+        stats.apply(r, -1)
+    assert stats.to_dict() == {}
+    assert stats.status_codes == {} and stats.mime_types == {}
+
+
+def test_traffic_stats_groups_by_host_and_page():
+    traffic = TrafficStats()
+    for i in range(5):
+        traffic.apply(record("cdn.example", page="news.example"), 1)
+    traffic.apply(record("api.example", page="news.example"), 1)
+    traffic.apply(record("cdn.example", page="shop.example"), 1)
+
+    assert traffic.summary()["total_requests"] == 7
+    assert traffic.summary(host="cdn.example")["total_requests"] == 6
+    assert traffic.summary(page="news.example")["total_requests"] == 6
+    assert traffic.summary(host="missing.example") == {}
+    assert traffic.top_hosts(1) == [("cdn.example", 6)]
+
+
+def test_traffic_update_moves_request():
+    traffic = TrafficStats()
+    pending = record("api.example", status=0, mime="", size=0, duration=None)
+    traffic.apply(pending, 1)
+    done = record("api.example", status=200, mime="application/json", size=300, duration=80.0)
+    traffic.update(pending, done)
+    summary = traffic.summary(host="api.example")
+    assert summary["finished_requests"] == 1
+    assert summary["status_codes"] == {200: 1}
+    assert summary["p50"] == pytest.approx(80.0, rel=1 / LatencyHistogram.SUB_BUCKETS)
+
+    traffic.apply(done, -1)
+    assert traffic.hosts == {} and traffic.pages == {}
+    assert traffic.summary() == {}
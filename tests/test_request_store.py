@@ -0,0 +1,163 @@
+import threading
+
+import pytest
+
+from browser.request_store import RequestStore, sync_window
+
+
+class FakeRequest:
+    """Chỉ có các thuộc tính RequestStore dùng tới"""
+
+    def __init__(self, url):
+        self.url = url
+        self.request_id = None
+
+
+def fill(store, count, urls=("https://a.example/", "https://b.example/", "https://c.example/")):
+    return [store.append(FakeRequest(urls[i % len(urls)])) for i in range(count)]
+
+
+def ids(store):
+    return [request.request_id for request in store]
+
+
+def test_ids_increase_until_full():
+    store = RequestStore(capacity=5)
+    assert fill(store, 5) == [None] * 5
+    assert ids(store) == [1, 2, 3, 4, 5]
+    assert len(store) == 5
+    assert store.get(3).request_id == 3
+    assert store.get(6) is None
+
+
+def test_wraparound_evicts_oldest():
+    store = RequestStore(capacity=5)
+    evicted = fill(store, 12)
+    assert [request.request_id for request in evicted if request] == [1, 2, 3, 4, 5, 6, 7]
+    assert ids(store) == [8, 9, 10, 11, 12]
+    assert (store.first_id, store.next_id) == (8, 13)
+    assert 7 not in store and 8 in store
+    assert store.get(7) is None
+    assert store.get(12).request_id == 12
+
+
+def test_url_index_follows_evictions():
+    store = RequestStore(capacity=4)
+    fill(store, 9)  # url a: 1, 4, 7 - b: 2, 5, 8 - c: 3, 6, 9
+    assert store.ids_for_url("https://a.example/") == [7]
+    assert store.ids_for_url("https://b.example/") == [8]
+    assert store.ids_for_url("https://c.example/") == [6, 9]
+    assert store.latest_for_url("https://c.example/").request_id == 9
+    fill(store, 4, urls=("https://d.example/",))
+    assert store.ids_for_url("https://a.example/") == []
+    assert store.latest_for_url("https://a.example/") is None
+    assert set(store.url_ids) == {"https://d.example/"}
+
+
+def test_clear_keeps_ids_increasing():
+    store = RequestStore(capacity=3)
+    fill(store, 5)
+    store.clear()
+    assert len(store) == 0
+    assert list(store) == []
+    assert store.get(5) is None
+    store.append(FakeRequest("https://a.example/"))
+    assert ids(store) == [6]
+
+
+@pytest.mark.parametrize("count", [3, 7, 10])
+def test_grow_keeps_everything(count):
+    store = RequestStore(capacity=5)
+    fill(store, count)
+    before = ids(store)
+    assert store.resize(8) == []
+    assert ids(store) == before
+    fill(store, 3)  # tối đa 5 request đang giữ + 3 request mới: chưa vượt 8
+    assert ids(store) == list(range(max(1, count - 4), count + 4))
+    assert all(store.get(request_id).request_id == request_id for request_id in ids(store))
+
+
+def test_shrink_drops_oldest():
+    store = RequestStore(capacity=6)
+    fill(store, 9)  # đang giữ 4..9, đã quay vòng
+    evicted = store.resize(4)
+    assert [request.request_id for request in evicted] == [4, 5]
+    assert ids(store) == [6, 7, 8, 9]
+    assert store.ids_for_url("https://a.example/") == [7]
+    evicted_next = store.append(FakeRequest("https://a.example/"))
+    assert evicted_next.request_id == 6
+    assert ids(store) == [7, 8, 9, 10]
+
+
+def test_invalid_capacity():
+    with pytest.raises(ValueError):
+        RequestStore(capacity=0)
+    with pytest.raises(ValueError):
+        RequestStore().resize(0)
+
+
+def test_concurrent_appends_keep_ids_unique():
+    store = RequestStore(capacity=100)
+
+    def worker():
+        fill(store, 500)
+
+    threads = [threading.Thread(target=worker) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert store.next_id == 2001
+    assert ids(store) == list(range(1901, 2001))
+
+
+class View:
+    """Giả lập RequestTableModel: giữ list id đang hiện, áp dụng sync_window như flush()"""
+
+    def __init__(self, store):
+        self.store = store
+        self.first_id, self.next_id = store.first_id, store.next_id
+        self.rows = list(range(self.first_id, self.next_id))
+
+    def flush(self):
+        removed, self.first_id, next_id = sync_window(
+            self.first_id, self.next_id, self.store.first_id, self.store.next_id)
+        del self.rows[:removed]
+        if next_id != self.next_id:
+            assert self.rows == []  # chỉ nhảy cóc khi không còn dòng nào
+        self.rows.extend(range(next_id, self.store.next_id))
+        self.next_id = self.store.next_id
+        return removed
+
+
+@pytest.mark.parametrize("added", [0, 1, 3, 5, 12])
+def test_view_follows_store_each_frame(added):
+    store = RequestStore(capacity=5)
+    fill(store, 3)
+    view = View(store)
+    fill(store, added)
+    view.flush()
+    assert view.rows == ids(store)
+    assert all(store.get(request_id) is not None for request_id in view.rows)
+
+
+def test_view_follows_resize_and_clear():
+    store = RequestStore(capacity=6)
+    view = View(store)
+    fill(store, 4)
+    assert view.flush() == 0
+    store.resize(2)
+    assert view.flush() == 2
+    assert view.rows == [3, 4]
+    store.clear()
+    fill(store, 1)
+    view.flush()
+    assert view.rows == [5]
+    store.clear()
+    view.flush()
+    assert view.rows == [] and view.first_id == view.next_id == 6
+
+
+def test_sync_window_without_changes():
+    assert sync_window(4, 9, 4, 9) == (0, 4, 9)
+    assert sync_window(4, 9, 4, 12) == (0, 4, 9)  # chỉ có dòng mới ở cuối
@@ -0,0 +1,128 @@
+import sqlite3
+import threading
+
+import pytest
+
+from browser.bookmark_manager import BookmarkManager
+from browser.history_manager import HistoryManager
+from browser.storage import StorageEngine
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    return str(tmp_path / "test.db")
+
+
+def version(storage, component):
+    row = storage.conn.execute("SELECT version FROM schema_versions WHERE component = ?", (component,)).fetchone()
+    return row[0] if row else 0
+
+
+def test_migrate_runs_only_new_steps(db_path):
+    calls = []
+    steps = [lambda conn: calls.append(1), lambda conn: calls.append(2)]
+    storage = StorageEngine(db_path)
+    assert storage.migrate("demo", steps) == 2
+    assert calls == [1, 2]
+    storage.close()
+
+    storage = StorageEngine(db_path)
+    storage.migrate("demo", steps + [lambda conn: calls.append(3)])
+    assert calls == [1, 2, 3]
+    assert version(storage, "demo") == 3
+    storage.close()
+
+
+def test_failed_step_is_retried_next_time(db_path):
+    storage = StorageEngine(db_path)
+
+    def broken(conn):
+        raise sqlite3.OperationalError("boom")
+
+    with pytest.raises(sqlite3.OperationalError):
+        storage.migrate("demo", [lambda conn: None, broken])
+    assert version(storage, "demo") == 1
+    ran = []
+    storage.migrate("demo", [lambda conn: None, lambda conn: ran.append(True)])
+    assert ran == [True]
+    storage.close()
+
+
+def test_legacy_history_table_is_migrated(db_path):
+    conn = sqlite3.connect(db_path)
+    conn.executescript("""
+    CREATE TABLE history (id INTEGER PRIMARY KEY, title TEXT, url TEXT, timestamp DATETIME);
+    INSERT INTO history (title, url, timestamp) VALUES
+        ('Old title', 'https://a.example/', '2024-01-01 10:00:00'),
+        ('New title', 'https://a.example/', '2024-02-01 10:00:00'),
+        ('B', 'https://b.example/', '2024-01-15 10:00:00');
+    """)
+    conn.close()
+
+    storage = StorageEngine(db_path)
+    history = HistoryManager(storage=storage, async_writes=False)
+    rows = storage.conn.execute("SELECT url, title, visit_count FROM urls ORDER BY url").fetchall()
+    assert rows == [("https://a.example/", "New title", 2), ("https://b.example/", "B", 1)]
+    assert storage.conn.execute("SELECT COUNT(*) FROM visits").fetchone()[0] == 3
+    assert [url for _, url in history.search("new title")] == ["https://a.example/"]
+    history.close()
+    storage.close()
+
+    # mở lại: migration không chạy lại, dữ liệu không bị nhân đôi
+    storage = StorageEngine(db_path)
+    history = HistoryManager(storage=storage, async_writes=False)
+    assert storage.conn.execute("SELECT COUNT(*) FROM visits").fetchone()[0] == 3
+    history.close()
+    storage.close()
+
+
+def test_history_and_bookmarks_share_one_engine(db_path):
+    storage = StorageEngine.get(db_path)
+    assert StorageEngine.get(db_path) is storage
+    HistoryManager(storage=storage, async_writes=False).close()
+    BookmarkManager(storage=storage)
+    components = {row[0] for row in storage.conn.execute("SELECT component FROM schema_versions")}
+    assert {"history", "bookmarks"} <= components
+    storage.close()
+    assert StorageEngine.get(db_path) is not storage
+
+
+def test_reader_pool_used_off_owner_thread(db_path):
+    storage = StorageEngine(db_path)
+    seen = []
+
+    def read():
+        with storage.read() as conn:
+            seen.append(conn is storage.conn)
+            conn.execute("SELECT 1").fetchone()
+
+    thread = threading.Thread(target=read)
+    thread.start()
+    thread.join()
+    with storage.read() as conn:
+        seen.append(conn is storage.conn)
+    assert seen == [False, True]
+    storage.close()
+
+
+def test_new_db_is_incremental_without_vacuum(db_path):
+    storage = StorageEngine(db_path)
+    assert storage.needs_vacuum is False
+    assert storage.conn.execute("PRAGMA auto_vacuum").fetchone()[0] == 2
+    storage.close()
+
+
+def test_old_db_is_converted_at_close(db_path):
+    conn = sqlite3.connect(db_path)
+    conn.execute("CREATE TABLE t (x)")
+    conn.commit()
+    conn.close()
+
+    storage = StorageEngine(db_path)
+    assert storage.needs_vacuum is True
+    storage.incremental_vacuum(100)  # chưa INCREMENTAL: không làm gì, không lỗi
+    storage.close()
+
+    storage = StorageEngine(db_path)
+    assert storage.needs_vacuum is False
+    storage.close()
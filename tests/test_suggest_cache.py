@@ -0,0 +1,247 @@
+import json
+import threading
+import time
+import urllib.parse
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from browser import suggest_cache
+from browser.suggest_cache import SuggestCache, normalize_query, parse_response, suggest_url
+
+
+class SuggestHandler(BaseHTTPRequestHandler):
+    """Server gợi ý giả: trả về ["query", [...]] giống suggestqueries.google.com (client=firefox)"""
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        query = urllib.parse.parse_qs(urllib.parse.urlsplit(self.path).query).get("q", [""])[0]
+        self.server.queries.append(query)
+        if query == "broken":
+            body = b"<html>rate limited</html>"  # server trả về trang lỗi thay vì JSON
+        else:
+            body = json.dumps([query, [query + " news", query + " weather", query + "s"]]).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+@pytest.fixture
+def suggest_server():
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), SuggestHandler)
+    httpd.daemon_threads = True
+    httpd.queries = []
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    httpd.endpoint = f"http://127.0.0.1:{httpd.server_address[1]}/complete/search?client=firefox"
+    yield httpd
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def fetch(server, query):
+    """
+    Hỏi server giả bằng đúng URL và parser mà GoogleSuggestProvider dùng,
+    chỉ thay QNetworkAccessManager bằng urllib (không cần Qt)
+    """
+    with urllib.request.urlopen(suggest_url(server.endpoint, query), timeout=5) as response:
+        return parse_response(response.read())
+
+
+def cached_fetch(cache, server, query):
+    """Luồng của GoogleSuggestProvider.fetch / on_finished: cache hit thì không hỏi server"""
+    suggestions = cache.get(query)
+    if suggestions is None:
+        parsed = fetch(server, query)
+        if parsed is None:
+            return []
+        suggestions = parsed[1]
+        cache.put(query or parsed[0], suggestions)
+    return suggestions
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1_000_000.0]
+    monkeypatch.setattr(suggest_cache.time, "time", lambda: now[0])
+    return now
+
+
+def test_normalize_query():
+    assert normalize_query("  Hello   World ") == "hello world"
+
+
+def test_suggest_url_keeps_endpoint_query():
+    assert suggest_url("http://x/search?client=firefox", "a b&c") == "http://x/search?client=firefox&q=a+b%26c"
+    assert suggest_url("http://x/search", "việt") == "http://x/search?q=vi%E1%BB%87t"
+
+
+@pytest.mark.parametrize("body, expected", [
+    (b'["py", ["python", "pypi"]]', ("py", ["python", "pypi"])),
+    (b'["py", [], [], {"google:suggesttype": []}]', ("py", [])),  # trường thừa bị bỏ qua
+    ('["việt", ["việt nam"]]'.encode("utf-8"), ("việt", ["việt nam"])),
+    (b"<html>", None),
+    (b"\xff\xfe", None),
+    (b'{"q": "py"}', None),
+    (b'["py"]', None),
+    (b'["py", "python"]', None),
+    (b'["py", ["python", 1]]', None),
+    (b'[null, ["python"]]', None),
+])
+def test_parse_response(body, expected):
+    assert parse_response(body) == expected
+
+
+def test_bad_server_response_is_not_cached(suggest_server):
+    cache = SuggestCache()
+    assert cached_fetch(cache, suggest_server, "broken") == []
+    assert cache.get("broken") is None
+    assert cached_fetch(cache, suggest_server, "broken") == []
+    assert suggest_server.queries == ["broken", "broken"]
+
+
+def test_cache_hit_skips_server(suggest_server):
+    cache = SuggestCache()
+    first = cached_fetch(cache, suggest_server, "python")
+    second = cached_fetch(cache, suggest_server, "Python ")
+    assert first == second == ["python news", "python weather", "pythons"]
+    assert suggest_server.queries == ["python"]
+
+
+def test_lru_eviction(suggest_server):
+    cache = SuggestCache(max_entries=2)
+    cached_fetch(cache, suggest_server, "aa")
+    cached_fetch(cache, suggest_server, "bb")
+    assert cache.get("aa") is not None  # aa thành mới dùng gần nhất
+    cached_fetch(cache, suggest_server, "cc")  # đẩy bb ra
+    assert cache.get("bb") is None
+    assert cache.get("aa") is not None
+    assert cache.get("cc") is not None
+    assert len(cache.entries) == 2
+
+
+def test_ttl_expiry(suggest_server, clock):
+    cache = SuggestCache(ttl=60)
+    cached_fetch(cache, suggest_server, "weather")
+    clock[0] += 59
+    assert cache.get("weather") is not None
+    clock[0] += 2
+    assert cache.get("weather") is None
+    cached_fetch(cache, suggest_server, "weather")
+    assert suggest_server.queries == ["weather", "weather"]
+
+
+def test_prefix_reuse(suggest_server):
+    cache = SuggestCache()
+    cached_fetch(cache, suggest_server, "pyth")
+    # chưa có "python" trong cache: dùng kết quả của "pyth", lọc theo query đầy đủ
+    assert cache.get("python") is None
+    assert cache.get_prefix("python") == []
+    assert cache.get_prefix("pythons") == []
+    assert cache.get_prefix("pyth n") == ["pyth news"]
+    assert cache.get_prefix("pyth w") == ["pyth weather"]
+    assert suggest_server.queries == ["pyth"]
+
+
+def test_prefix_reuse_picks_longest_prefix(suggest_server):
+    cache = SuggestCache()
+    cached_fetch(cache, suggest_server, "py")
+    cached_fetch(cache, suggest_server, "pyth")
+    assert cache.get_prefix("pyth news") == ["pyth news"]
+    assert cache.get_prefix("x") is None
+
+
+def test_prefix_ignores_expired_entries(suggest_server, clock):
+    cache = SuggestCache(ttl=60)
+    cached_fetch(cache, suggest_server, "pyth")
+    clock[0] += 61
+    assert cache.get_prefix("pyth n") is None
+
+
+def test_persistence_round_trip(suggest_server, tmp_path, clock):
+    path = str(tmp_path / "suggest_cache.json")
+    cache = SuggestCache(ttl=60, path=path)
+    cached_fetch(cache, suggest_server, "aa")
+    clock[0] += 30
+    cached_fetch(cache, suggest_server, "bb")
+    cache.save()
+    assert not cache.dirty
+
+    reloaded = SuggestCache(ttl=60, path=path)
+    assert reloaded.get("aa") == ["aa news", "aa weather", "aas"]
+    assert reloaded.get("bb") == ["bb news", "bb weather", "bbs"]
+
+    clock[0] += 40  # aa đã quá 60 giây, bb thì chưa
+    reloaded = SuggestCache(ttl=60, path=path)
+    assert reloaded.get("aa") is None
+    assert reloaded.get("bb") is not None
+
+
+def test_save_without_changes_does_not_write(tmp_path):
+    path = tmp_path / "suggest_cache.json"
+    SuggestCache(path=str(path)).save()
+    assert not path.exists()
+
+
+@pytest.mark.parametrize("content", [
+    "not json",
+    '{"aa": ["x"]}',
+    "[1, 2, 3]",
+    '[["aa", "yesterday", ["x"]], ["bb", 1, "not a list"], ["cc", 1, [1, 2]], ["dd"]]',
+])
+def test_load_skips_malformed_file(tmp_path, clock, content):
+    path = tmp_path / "suggest_cache.json"
+    path.write_text(content, encoding="utf-8")
+    cache = SuggestCache(path=str(path))
+    assert len(cache.entries) == 0
+
+
+def test_load_keeps_valid_entries_next_to_bad_ones(tmp_path, clock):
+    path = tmp_path / "suggest_cache.json"
+    path.write_text(json.dumps([
+        ["Good  Query", clock[0] - 10, ["good query 1"]],
+        ["bad", None, ["x"]],
+        {"key": "also bad"},
+    ]), encoding="utf-8")
+    cache = SuggestCache(path=str(path))
+    assert list(cache.entries) == ["good query"]
+    assert cache.get("good query") == ["good query 1"]
+
+
+def test_google_provider_against_stand_in_endpoint(suggest_server):
+    QtCore = pytest.importorskip("PyQt5.QtCore")
+    pytest.importorskip("PyQt5.QtNetwork")
+    from browser.google_suggest import GoogleSuggestProvider
+
+    app = QtCore.QCoreApplication.instance() or QtCore.QCoreApplication([])
+    provider = GoogleSuggestProvider(endpoint=suggest_server.endpoint, cache=SuggestCache())
+    received = []
+    provider.suggestions_ready.connect(lambda keyword, suggestions: received.append((keyword, suggestions)))
+
+    def wait_for(count, timeout=5.0):
+        deadline = time.monotonic() + timeout
+        while len(received) < count and time.monotonic() < deadline:
+            app.processEvents()
+            time.sleep(0.01)
+        assert len(received) >= count
+
+    provider.fetch("pyth")
+    wait_for(1)
+    assert received[-1] == ("pyth", ["pyth news", "pyth weather", "pyths"])
+
+    # cache hit: trả ngay trong fetch, không hỏi server
+    provider.fetch("Pyth")
+    assert received[-1] == ("Pyth", ["pyth news", "pyth weather", "pyths"])
+    assert suggest_server.queries == ["pyth"]
+
+    # prefix đã cache: hiện ngay kết quả đã lọc, rồi kết quả thật khi server trả về
+    provider.fetch("pyth n")
+    assert received[-1] == ("pyth n", ["pyth news"])
+    wait_for(4)
+    assert received[-1] == ("pyth n", ["pyth n news", "pyth n weather", "pyth ns"])
+    assert suggest_server.queries == ["pyth", "pyth n"]
@@ -0,0 +1,64 @@
+import pytest
+
+from browser import suggest_debounce
+from browser.suggest_debounce import AdaptiveDebounce
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(suggest_debounce.time, "monotonic", lambda: now[0])
+    return now
+
+
+def type_keys(debounce, clock, intervals_ms):
+    if debounce.last_keystroke is None:
+        debounce.record_keystroke()
+    for interval in intervals_ms:
+        clock[0] += interval / 1000
+        debounce.record_keystroke()
+
+
+def test_default_before_cadence_is_known(clock):
+    debounce = AdaptiveDebounce()
+    assert debounce.interval_ms() == AdaptiveDebounce.DEFAULT_MS
+    debounce.record_keystroke()  # 1 phím chưa đủ để biết nhịp gõ
+    assert debounce.interval_ms() == AdaptiveDebounce.DEFAULT_MS
+
+
+def test_follows_typing_cadence(clock):
+    debounce = AdaptiveDebounce()
+    type_keys(debounce, clock, [150] * 10)
+    assert debounce.interval_ms() == int(150 * 1.3)
+
+
+def test_cadence_is_smoothed(clock):
+    debounce = AdaptiveDebounce()
+    type_keys(debounce, clock, [100] * 10)
+    type_keys(debounce, clock, [300])  # 1 lần gõ chậm không đổi hẳn nhịp
+    assert debounce.cadence_ms == pytest.approx(100 + AdaptiveDebounce.SMOOTHING * 200)
+
+
+def test_long_pause_is_ignored(clock):
+    debounce = AdaptiveDebounce()
+    type_keys(debounce, clock, [120] * 5)
+    type_keys(debounce, clock, [AdaptiveDebounce.PAUSE_MS + 1, 120])
+    assert debounce.cadence_ms == pytest.approx(120)
+
+
+def test_server_latency_adds_delay(clock):
+    debounce = AdaptiveDebounce()
+    type_keys(debounce, clock, [100] * 5)
+    assert debounce.interval_ms(latency_ms=200) == debounce.interval_ms() + 50
+    assert debounce.interval_ms(latency_ms=None) == debounce.interval_ms(latency_ms=0)
+
+
+@pytest.mark.parametrize("interval, latency, expected", [
+    (10, 0, AdaptiveDebounce.MIN_MS),
+    (1000, 0, AdaptiveDebounce.MAX_MS),
+    (200, 10_000, AdaptiveDebounce.MAX_MS),
+])
+def test_interval_is_clamped(clock, interval, latency, expected):
+    debounce = AdaptiveDebounce()
+    type_keys(debounce, clock, [interval] * 5)
+    assert debounce.interval_ms(latency) == expected
@@ -0,0 +1,133 @@
+import time
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from browser.bookmark_manager import BookmarkManager
+from browser.history_manager import TIMESTAMP_FORMAT, HistoryManager, visit_score
+from browser.storage import StorageEngine
+from browser.suggest_index import SuggestIndex, fold, index_keys, strip_url
+
+
+def timestamp(days_ago=0):
+    return (datetime.now(timezone.utc) - timedelta(days=days_ago)).strftime(TIMESTAMP_FORMAT)
+
+
+@pytest.fixture
+def index():
+    index = SuggestIndex(top_k=5)
+    index.add("https://www.github.com/", "GitHub", frecency=visit_score(timestamp()) + 3)
+    index.add("https://gitlab.com/explore", "GitLab Explore", frecency=visit_score(timestamp()))
+    index.add("https://docs.python.org/3/", "Python documentation", frecency=visit_score(timestamp(5)))
+    index.add("https://vi.wikipedia.org/wiki/Việt_Nam", "Việt Nam – Wikipedia", frecency=visit_score(timestamp(60)))
+    return index
+
+
+@pytest.fixture
+def storage(tmp_path):
+    storage = StorageEngine(str(tmp_path / "test.db"))
+    yield storage
+    storage.close()
+
+
+def test_fold_and_keys():
+    assert fold("Việt Nam Đẹp") == "viet nam dep"
+    assert strip_url("https://www.GitHub.com/x") == "github.com/x"
+    keys = index_keys("https://www.github.com/features", "GitHub Features")
+    assert {"github.com/features", "github.com", "github", "features"} <= set(keys)
+
+
+def test_prefix_ranked_by_score(index):
+    assert [url for _, url in index.complete("git")] == ["https://www.github.com/", "https://gitlab.com/explore"]
+    assert [url for _, url in index.complete("https://www.gith")] == ["https://www.github.com/"]
+
+
+def test_title_words_and_accents(index):
+    assert index.complete("documentation")[0][1] == "https://docs.python.org/3/"
+    assert index.complete("viet")[0][1] == "https://vi.wikipedia.org/wiki/Việt_Nam"
+
+
+def test_multiple_words_must_all_match(index):
+    assert [url for _, url in index.complete("git explore")] == ["https://gitlab.com/explore"]
+    assert index.complete("git python") == []
+
+
+def test_frecency_change_reorders(index):
+    index.add("https://gitlab.com/explore", "GitLab Explore", frecency=visit_score(timestamp()) + 10)
+    assert index.complete("git")[0][1] == "https://gitlab.com/explore"
+    index.add("https://gitlab.com/explore", "GitLab Explore", frecency=0.0)
+    assert index.complete("git")[0][1] == "https://www.github.com/"
+
+
+def test_remove_and_unbookmark(index):
+    index.add("https://bookmarked.example/", "Saved", bookmarked=True)
+    assert index.complete("saved")[0][1] == "https://bookmarked.example/"
+    index.add("https://bookmarked.example/", "Saved", bookmarked=False)
+    assert index.complete("saved") == []
+    index.remove("https://www.github.com/")
+    assert [url for _, url in index.complete("git")] == ["https://gitlab.com/explore"]
+
+
+def test_node_budget_evicts_lowest_scores():
+    index = SuggestIndex(max_nodes=2000)
+    for i in range(500):
+        index.add(f"https://site{i}.example/page", f"Site {i}", frecency=float(i))
+    assert index.node_count <= 2000
+    assert "https://site499.example/page" in index.entries
+    assert "https://site0.example/page" not in index.entries
+
+
+def test_fuzzy_complete(index):
+    assert index.fuzzy_complete("githbu")[0][1] == "https://www.github.com/"
+
+
+def fill_db(storage, count):
+    history = HistoryManager(storage=storage, async_writes=False, archive_dir=str(storage.db_path) + ".archive")
+    bookmarks = BookmarkManager(storage=storage)
+    for i in range(count):
+        history.add_entry(f"Page {i} about topic{i % 50}", f"https://host{i % 200}.example/page{i}")
+    bookmarks.add_bookmark("Bookmarked page", "https://bookmarked.example/")
+    return history, bookmarks
+
+
+def test_load_in_background_fills_every_top(storage):
+    history, bookmarks = fill_db(storage, 300)
+    index = SuggestIndex()
+    index.load_in_background(history, bookmarks).join(timeout=10)
+
+    assert len(index.entries) == 301
+    stack = [index.root]
+    while stack:
+        node = stack.pop()
+        assert node.top is not None  # không nút nào phải tính lười khi có query
+        stack.extend(node.children.values())
+    assert index.complete("bookmarked")[0][1] == "https://bookmarked.example/"
+    history.close()
+
+
+def test_events_during_load_are_applied_after(storage):
+    history, bookmarks = fill_db(storage, 20)
+    index = SuggestIndex()
+    index._begin_load(history, bookmarks)
+    # tới trước khi nạp xong: được giữ lại rồi áp dụng sau
+    bookmarks.add_bookmark("Late bookmark", "https://late.example/")
+    history.add_entry("Late visit", "https://visited-late.example/")
+    assert "https://late.example/" not in index.entries
+    index._load_rows(history, bookmarks)
+
+    assert index.complete("late")[0][1] in ("https://late.example/", "https://visited-late.example/")
+    assert {"https://late.example/", "https://visited-late.example/"} <= set(index.entries)
+    bookmarks.delete_bookmark_by_url("https://late.example/")
+    assert "https://late.example/" not in index.entries
+    history.close()
+
+
+def test_query_after_load_is_fast(storage):
+    history, bookmarks = fill_db(storage, 3000)
+    index = SuggestIndex()
+    index.load(history, bookmarks)
+    start = time.perf_counter()
+    for prefix in ("h", "ho", "host1", "page", "topic", "pa"):
+        assert index.complete(prefix)
+    assert (time.perf_counter() - start) / 6 < 0.001
+    history.close()